@@ -1,12 +1,228 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-from library import Library
+from library import DEFAULT_LIBRARY_PATHS, Library
 from book import Book
+from book_transfer import MEDIA_TYPES, BookImporter, format_for, iter_export
+from open_library import DEFAULT_RATE, AsyncOpenLibraryClient, OpenLibraryUnavailable
+from cache import MemoryCache, SqliteCache
+from isbn import normalize_isbn
+from isbn_mirror import IsbnMirror
+from job_queue import EnrichmentWorkers, Job, JobQueue
+from metrics import CONTENT_TYPE, Metrics
+from rate_limit import AdaptiveConcurrency, TokenBucket
+from retry import RetryPolicy
 
-app = FastAPI(title="Library API", description="Simple library management API")
+def make_metrics() -> Metrics:
+    metrics = Metrics()
+    # Read from the API's objects when /metrics is scraped; the ones not set
+    # up yet are left out rather than created.
+    metrics.registry.collect(
+        "librarian_books", "Books in the catalogue",
+        lambda: len(library.books) if library is not None else None)
+    metrics.registry.collect(
+        "librarian_openlibrary_cache_lookups_total", "Open Library cache lookups by result",
+        lambda: cache_stats() and {(result,): getattr(cache_stats(), result)
+                                   for result in ("hits", "negative_hits", "misses")},
+        ("result",), type="counter")
+    metrics.registry.collect(
+        "librarian_openlibrary_cache_hit_ratio", "Share of Open Library cache lookups answered from the cache",
+        lambda: cache_stats() and cache_stats().hit_ratio)
+    metrics.registry.collect(
+        "librarian_jobs", "Enrichment jobs by status",
+        lambda: job_queue and {(status,): count for status, count in job_queue.counts().items()},
+        ("status",))
+    return metrics
 
-library = Library()
+
+def cache_stats():
+    return open_library_options["cache"].stats if open_library_options is not None else None
+
+
+# LIBRARIAN_METRICS=1 serves Prometheus metrics at GET /metrics: latency of
+# API requests, Open Library round-trips, saves and searches, the stages of
+# adding a book, cache and coalescing counts, catalogue size and job counts.
+# Without it nothing is measured.
+metrics = make_metrics() if os.environ.get("LIBRARIAN_METRICS") == "1" else None
+
+# The catalogue, the job queue and the Open Library settings (whose cache
+# and mirror open files) are set up on first use, through the get_*
+# functions below, rather than when this module is imported: the lifespan
+# builds them as the server starts, and a bare import stays cheap for
+# tools, tests and workers that never serve a request. Tests patch the
+# module globals, which the getters then return as they are.
+_startup_lock = threading.Lock()
+open_library_options = None
+
+
+def get_open_library_options() -> dict:
+    global open_library_options
+    if open_library_options is None:
+        with _startup_lock:
+            if open_library_options is None:
+                open_library_options = make_open_library_options()
+    return open_library_options
+
+
+def make_open_library_options() -> dict:
+    # Set LIBRARIAN_CACHE_DB to a file path to keep Open Library responses across restarts.
+    if os.environ.get("LIBRARIAN_CACHE_DB"):
+        open_library_cache = SqliteCache(os.environ["LIBRARIAN_CACHE_DB"])
+    else:
+        open_library_cache = MemoryCache()
+
+    # One retry budget, rate limit and concurrency limit for every Open Library
+    # request the API makes. LIBRARIAN_OPENLIBRARY_RATE sets requests per second
+    # (0 disables the limit); LIBRARIAN_HTTP2=1 talks HTTP/2 (needs the h2 package).
+    open_library_rate = float(os.environ.get("LIBRARIAN_OPENLIBRARY_RATE", DEFAULT_RATE))
+    return {
+        "cache": open_library_cache,
+        "retry": RetryPolicy(),
+        "http2": os.environ.get("LIBRARIAN_HTTP2") == "1",
+        "rate_limiter": TokenBucket(open_library_rate) if open_library_rate > 0 else None,
+        "concurrency": AdaptiveConcurrency(),
+        # LIBRARIAN_MIRROR points at a local ISBN mirror (python main.py build-mirror)
+        # checked before Open Library; LIBRARIAN_OFFLINE=1 never contacts Open Library.
+        "mirror": IsbnMirror(os.environ["LIBRARIAN_MIRROR"]) if os.environ.get("LIBRARIAN_MIRROR") else None,
+        "offline": os.environ.get("LIBRARIAN_OFFLINE") == "1",
+        "metrics": metrics,
+    }
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The catalogue is loaded before the first request is accepted, and
+    # jobs left pending by a previous run are resumed right away.
+    get_library()
+    get_enrichment().start()
+    async with AsyncOpenLibraryClient(**get_open_library_options()) as client:
+        app.state.open_library_client = client
+        yield
+        app.state.open_library_client = None
+    get_enrichment().stop()
+    if library is not None and library.journal:
+        library.journal.close()
+
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON = "application/x-ndjson"
+encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+app = FastAPI(title="Library API", description="Simple library management API", lifespan=lifespan)
+
+
+class RequestMetrics:
+    """ASGI middleware timing each request by route template and status code.
+
+    Does nothing but pass the request on while ``metrics`` is None.
+    Streamed responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if metrics is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route in the scope; labelling by
+            # its template keeps /books/{isbn} from becoming a label per ISBN.
+            route = scope.get("route")
+            metrics.request_seconds.observe(time.perf_counter() - start, scope["method"],
+                                            getattr(route, "path", "unmatched"), str(status))
+
+
+app.add_middleware(RequestMetrics)
+
+# LIBRARIAN_STORAGE=journal appends each change to library.json.journal
+# instead of rewriting library.json on every request; LIBRARIAN_STORAGE=sqlite
+# keeps the catalogue in library.db (see sqlite_catalog.py to migrate).
+# LIBRARIAN_STORAGE=snapshot serves library.snapshot through mmap without
+# parsing it at startup (see snapshot.py to convert library.json).
+# LIBRARIAN_COLUMNAR=1 holds an in-memory catalogue in the compact BookStore.
+# LIBRARIAN_SHARED=1 lets several workers (uvicorn --workers N) serve the
+# same json/journal files; journal storage lets them sync incrementally.
+library = None
+
+
+def get_library() -> Library:
+    global library
+    if library is None:
+        with _startup_lock:
+            if library is None:
+                storage = os.environ.get("LIBRARIAN_STORAGE", "json")
+                library = Library(
+                    file_path=os.environ.get("LIBRARIAN_LIBRARY_PATH",
+                                             DEFAULT_LIBRARY_PATHS.get(storage, "library.json")),
+                    storage=storage,
+                    columnar=os.environ.get("LIBRARIAN_COLUMNAR") == "1",
+                    shared=os.environ.get("LIBRARIAN_SHARED") == "1",
+                    metrics=metrics,
+                    tracer=metrics.trace_add_book if metrics is not None else None,
+                )
+    return library
+
+
+# POST /books queues ISBNs in LIBRARIAN_JOBS_DB for LIBRARIAN_ENRICH_WORKERS
+# background workers; the queue survives restarts. The workers share the
+# API's cache, retry budget and rate limit; their own number bounds how many
+# lookups they run at once.
+job_queue = None
+enrichment = None
+
+
+def get_job_queue() -> JobQueue:
+    global job_queue
+    if job_queue is None:
+        with _startup_lock:
+            if job_queue is None:
+                job_queue = JobQueue(os.environ.get("LIBRARIAN_JOBS_DB", "jobs.db"))
+    return job_queue
+
+
+def get_enrichment() -> EnrichmentWorkers:
+    global enrichment
+    if enrichment is None:
+        library, queue, options = get_library(), get_job_queue(), get_open_library_options()
+        with _startup_lock:
+            if enrichment is None:
+                enrichment = EnrichmentWorkers(
+                    library, queue,
+                    lambda: AsyncOpenLibraryClient(**{**options, "concurrency": None}),
+                    workers=int(os.environ.get("LIBRARIAN_ENRICH_WORKERS", "4")),
+                )
+    return enrichment
+
+
+async def get_open_library_client():
+    client = getattr(app.state, "open_library_client", None)
+    if client is not None:
+        yield client
+    else:
+        # The app is being served without its lifespan (e.g. a bare
+        # TestClient), so fall back to a client scoped to this request.
+        async with AsyncOpenLibraryClient(**get_open_library_options()) as client:
+            yield client
 
 # Pydantic models
 class BookResponse(BaseModel):
@@ -14,9 +230,23 @@ class BookResponse(BaseModel):
     author: str
     isbn: str
 
+class SearchResult(BookResponse):
+    score: Optional[float] = None
+    distance: Optional[int] = None
+
 class ISBN(BaseModel):
     isbn: str
 
+class ISBNList(BaseModel):
+    isbns: List[str]
+
+class BulkAddResponse(BaseModel):
+    added: List[BookResponse]
+    duplicates: List[str]
+    not_found: List[str]
+    unavailable: List[str]
+    invalid: List[str]
+
 class BookSearch(BaseModel):
     query: str
     search_by: Optional[str] = "title"
@@ -24,50 +254,173 @@ class BookSearch(BaseModel):
 class ErrorResponse(BaseModel):
     error: str
 
+class ImportResponse(BaseModel):
+    records: int
+    added: int
+    duplicates: int
+    invalid: int
+    errors: List[str]
+
+class JobResponse(BaseModel):
+    id: int
+    isbn: str
+    status: str
+    book: Optional[BookResponse] = None
+    error: Optional[str] = None
+
+
+def job_response(job: Job) -> JobResponse:
+    book = BookResponse(**job.book.to_dict()) if job.book else None
+    return JobResponse(id=job.id, isbn=job.isbn, status=job.status, book=book, error=job.error)
+
+
+async def stream_books(cursor: Optional[int], limit: Optional[int]):
+    # Pages are pulled one at a time, so nothing but the current page is held
+    # in memory and concurrent writes are picked up. Each is read in a worker
+    # thread, as the library's locks may wait on other workers.
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = MAX_PAGE_SIZE if remaining is None else min(MAX_PAGE_SIZE, remaining)
+        books, cursor = await asyncio.to_thread(get_library().get_books_page, cursor, size)
+        yield "".join(encode_json(book.to_dict()) + "\n" for book in books)
+        if cursor is None:
+            return
+        if remaining is not None:
+            remaining -= len(books)
+
 
 @app.get("/books", response_model=List[BookResponse])
-async def get_books():
-    return library.books
+async def get_books(request: Request, response: Response,
+                    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                    cursor: Optional[int] = Query(None, ge=0)):
+    # With Accept: application/x-ndjson every book from the cursor on is
+    # streamed, one JSON object per line; otherwise one page is returned and
+    # the next page's URL is sent in the Link header.
+    if NDJSON in request.headers.get("accept", ""):
+        return StreamingResponse(stream_books(cursor, limit), media_type=NDJSON)
 
-@app.post("/books", response_model=BookResponse)
-async def add_book(book_data: ISBN):
+    limit = limit or PAGE_SIZE
+    books, next_cursor = await asyncio.to_thread(get_library().get_books_page, cursor, limit)
+    if next_cursor is not None:
+        next_url = request.url.include_query_params(limit=limit, cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return books
+
+@app.post("/books", response_model=JobResponse, response_model_exclude_none=True, status_code=202)
+async def add_book(book_data: ISBN, response: Response):
+    # Only the cheap checks happen here; the Open Library lookup and the
+    # save are done by the enrichment workers. Poll GET /jobs/{id}.
     try:
-        library.add_book(book_data.isbn)
-        
-        matching_books = library.find_book(book_data.isbn, "isbn")
-        if matching_books:
-            library.save_books()  
-            return matching_books[0]
+        normalize_isbn(book_data.isbn)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to add book: {str(e)}")
+    existing_book = await asyncio.to_thread(get_library().get_book, book_data.isbn)
+    if existing_book:
+        raise HTTPException(status_code=400, detail=f"ISBN must be unique. Already exists: {existing_book}")
+
+    enrichment = get_enrichment()
+    enrichment.start()
+    job = get_job_queue().submit(book_data.isbn)
+    enrichment.notify()
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job_response(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, response_model_exclude_none=True)
+async def get_job(job_id: int):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job_response(job)
+
+
+@app.post("/books/bulk", response_model=BulkAddResponse)
+async def add_books(book_data: ISBNList, client: AsyncOpenLibraryClient = Depends(get_open_library_client)):
+    library = get_library()
+    result = await library.add_books_async(book_data.isbns, client)
+    if result["added"]:
+        # Rewriting the library file would block the event loop.
+        await asyncio.to_thread(library.persist)
+    return result
+
+
+@app.post("/books/import", response_model=ImportResponse)
+async def import_books(request: Request, format: Optional[str] = None):
+    # The body is CSV (with a title,author,isbn header) or NDJSON, chosen by
+    # ?format= or the Content-Type. It is parsed as it arrives and added in
+    # batches without Open Library lookups; invalid records and ISBNs the
+    # library already has are counted and skipped.
+    format = format_for(format or request.headers.get("content-type"))
+    if format is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson")
+    library = get_library()
+    importer = BookImporter(library, format)
+    # Parsing, adding the batches (under the library's write lock) and the
+    # final save run in a worker thread, one chunk at a time, so other
+    # requests are served while a large file is imported.
+    try:
+        async for chunk in request.stream():
+            await asyncio.to_thread(importer.feed, chunk)
+        return await asyncio.to_thread(importer.close)
+    except ValueError as e:
+        # Batches added before the error stay in the library.
+        await asyncio.to_thread(library.persist)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/books/export")
+async def export_books(format: str = "ndjson"):
+    # Generated a page at a time from the library as the client reads it.
+    if format_for(format) != format:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}. Use csv or ndjson")
+    return StreamingResponse(iter_export(get_library(), format), media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="books.{format}"'})
 
 
 @app.delete("/books/{isbn}")
 async def delete_book(isbn: str):
-    book_exists = any(book.isbn == isbn for book in library.books)
-    if not book_exists:
+    library = get_library()
+    if not await asyncio.to_thread(library.get_book, isbn):
         raise HTTPException(status_code=404, detail=f"Book with ISBN {isbn} not found")
     
-    library.remove_book(isbn)
-    library.save_books()
+    # Removing takes the library's locks (and, when shared, the file lock
+    # and a rewrite of the file), so neither it nor the save blocks the loop.
+    await asyncio.to_thread(library.remove_book, isbn)
+    await asyncio.to_thread(library.persist)
     return {"message": f"Book with ISBN {isbn} has been removed"}
 
 
-@app.get("/books/search", response_model=List[BookResponse])
-async def search_books(query: str, search_by: str = "title"):
+@app.get("/books/search", response_model=List[SearchResult], response_model_exclude_none=True)
+async def search_books(query: str, search_by: str = "title", mode: str = "ranked", fuzzy: bool = False,
+                       limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), offset: int = Query(0, ge=0)):
+    library = get_library()
     try:
-        matching_books = library.find_book(query, search_by)
+        if fuzzy:
+            matches = await asyncio.to_thread(library.fuzzy_search, query, search_by, offset + limit)
+            return [SearchResult(**match.book.to_dict(), score=match.score, distance=match.distance)
+                    for match in matches[offset:]]
+        if mode == "ranked" and search_by in ("title", "author"):
+            matches = await asyncio.to_thread(library.ranked_search, query, search_by, limit, offset)
+            return [SearchResult(**match.book.to_dict(), score=match.score) for match in matches]
+        matching_books = await asyncio.to_thread(library.find_book, query, search_by, mode, limit, offset)
         return matching_books
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/metrics")
+async def get_metrics():
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled; set LIBRARIAN_METRICS=1")
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/books/search/online", response_model=List[BookResponse])
-async def search_books_online(query: str):
-    books = library.open_library_client.search_books(query)
-    return books
+async def search_books_online(query: str, client: AsyncOpenLibraryClient = Depends(get_open_library_client)):
+    try:
+        return await client.search_books(query)
+    except OpenLibraryUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
 if __name__ == "__main__":
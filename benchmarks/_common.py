@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from book import Book
+from isbn import with_check_digit
+
+WORDS = [
+    "river", "shadow", "garden", "silent", "winter", "empire", "letters", "night",
+    "ocean", "stone", "journey", "memory", "golden", "city", "forest", "secret",
+    "hikaye", "şehir", "yolculuk", "gece", "deniz", "ışık", "kitap", "rüzgar",
+]
+NAMES = [
+    "Charles Dickens", "Oğuz Atay", "Jack London", "Virginia Woolf", "Orhan Pamuk",
+    "Jane Austen", "Sabahattin Ali", "Leo Tolstoy", "Yaşar Kemal", "Mary Shelley",
+]
+
+
+def make_isbn(i: int) -> str:
+    return with_check_digit(f"978{i:09d}")
+
+
+def make_books(n: int, start: int = 0) -> list[Book]:
+    books = []
+    for i in range(start, start + n):
+        title = " ".join(WORDS[(i * k + k) % len(WORDS)] for k in (3, 7, 11)) + f" {i}"
+        author = NAMES[i % len(NAMES)]
+        books.append(Book(title, author, make_isbn(i)))
+    return books
+
+
+def write_library_file(path: str, n: int):
+    with open(path, 'w') as file:
+        json.dump([book.to_dict() for book in make_books(n)], file, ensure_ascii=False)
+
+
+def parse_sizes(value: str) -> list[int]:
+    return [int(float(size)) for size in value.split(",")]
+
+
+@contextmanager
+def timer(results: dict, name: str):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def report(title: str, rows: list[dict]):
+    print(f"\n=== {title} ===")
+    if not rows:
+        return
+    columns = list(rows[0])
+    print(" | ".join(f"{column:>14}" for column in columns))
+    for row in rows:
+        cells = []
+        for column in columns:
+            value = row[column]
+            cells.append(f"{value:>14.6f}" if isinstance(value, float) else f"{value!s:>14}")
+        print(" | ".join(cells))
@@ -0,0 +1,65 @@
+"""Memory held by the book collection: plain objects, slotted Book and BookStore.
+
+Usage: python benchmarks/bench_book_store.py [--books 1e6]
+
+Each variant is built from the same generated titles/authors/ISBNs and
+measured with tracemalloc, so only the collection itself is counted.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from _common import make_books, parse_sizes, report
+
+from book import Book
+from book_store import BookStore
+from catalog import Catalog
+
+
+class DictBook:
+    """The pre-slots Book layout: one __dict__ per instance."""
+
+    def __init__(self, title, author, isbn):
+        self.title = title
+        self.author = author
+        self.isbn = isbn
+
+
+def measure(name: str, build) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    collection = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = len(collection)
+    del collection
+    return {"variant": name, "books": size, "build_s": elapsed,
+            "MiB": current / 2**20, "bytes/book": current // size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e6"))
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.books:
+        # Copy the strings so every variant pays for its own title/author/isbn.
+        records = [(book.title, book.author, book.isbn) for book in make_books(n)]
+
+        def fresh():
+            return ((title.encode().decode(), author, isbn.encode().decode())
+                    for title, author, isbn in records)
+
+        rows.append(measure("dict objects", lambda: [DictBook(*r) for r in fresh()]))
+        rows.append(measure("slotted Book", lambda: [Book(*r) for r in fresh()]))
+        rows.append(measure("Catalog + index", lambda: Catalog(Book(*r) for r in fresh())))
+        rows.append(measure("BookStore + index", lambda: BookStore(Book(*r) for r in fresh())))
+    report("book collection memory", rows)
+
+
+if __name__ == "__main__":
+    main()
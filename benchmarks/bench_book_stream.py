@@ -0,0 +1,86 @@
+"""Peak RSS of reading a library file: streaming parser vs json.load.
+
+Usage: python benchmarks/bench_book_stream.py [--sizes-mb 10,100,1000] [--skip-json-load-above 200]
+
+Each measurement runs in a fresh interpreter so ru_maxrss only reflects that
+read. Files are generated with the streaming writer, so generation itself
+stays flat too.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import make_books, parse_sizes, report
+
+from book_stream import write_books
+
+READER = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from book import Book
+from book_stream import iter_books
+start = time.perf_counter()
+count = 0
+with open({path!r}, 'r', encoding='utf-8') as file:
+    if {mode!r} == "stream":
+        for book in iter_books(file):
+            count += 1
+    else:
+        for record in json.load(file):
+            Book(**record)
+            count += 1
+elapsed = time.perf_counter() - start
+print(count, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def generate(path: str, target_bytes: int):
+    def books():
+        i = 0
+        while True:
+            for book in make_books(10_000, start=i):
+                yield book
+            i += 10_000
+            if file.tell() >= target_bytes:
+                return
+
+    with open(path, 'w', encoding='utf-8') as file:
+        write_books(file, books())
+
+
+def measure(path: str, mode: str) -> dict:
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    output = subprocess.run(
+        [sys.executable, "-c", READER.format(root=root, path=path, mode=mode)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    count, elapsed, maxrss_kb = int(output[0]), float(output[1]), int(output[2])
+    return {"books": count, "read_s": elapsed, "peak_rss_MiB": maxrss_kb / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=parse_sizes, default=parse_sizes("10,100,1000"))
+    parser.add_argument("--skip-json-load-above", type=int, default=200,
+                        help="json.load needs several times the file size in RAM")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp, f"library_{size_mb}mb.json")
+            start = time.perf_counter()
+            generate(path, size_mb * 2**20)
+            print(f"generated {os.path.getsize(path) / 2**20:.0f} MiB in {time.perf_counter() - start:.1f}s")
+            modes = ["stream"] if size_mb > args.skip_json_load_above else ["stream", "json.load"]
+            for mode in modes:
+                rows.append({"mode": mode, "file_MiB": size_mb, **measure(path, mode)})
+            os.unlink(path)
+    report("reading library.json", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Cold start of the CLI and the API: import time and time to the first request.
+
+Usage: python benchmarks/bench_cold_start.py [--books 0,1e4,1e5] [--storage json,snapshot] [--repeat 5]
+                                             [--max-import-api-ms 1500] [--max-import-main-ms 300]
+
+Every measurement runs in a fresh interpreter. ``import_main_ms`` is
+``import main`` (the CLI) and ``import_api_ms`` is ``import api``; neither
+should load the catalogue or open an HTTP client. ``first_request_ms`` is
+the first GET /books?limit=10 on a TestClient after ``import api``, which
+is where the catalogue is loaded now (the TestClient import is left out).
+``eager_ms`` is ``import api`` followed by what importing it used to do
+straight away: loading the catalogue, opening the job queue and creating
+the Open Library clients. Times are medians over ``--repeat`` runs.
+
+With ``--max-import-api-ms``/``--max-import-main-ms`` the benchmark exits
+with status 1 when a median import time goes over the limit, so it can
+guard against startup regressions in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from _common import make_books, parse_sizes, report
+
+from book_stream import write_books
+from snapshot import write_snapshot
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROGRAMS = {
+    "import_main": """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+""",
+    "import_api": """
+import time
+start = time.perf_counter()
+import api
+print(time.perf_counter() - start)
+""",
+    "first_request": """
+import time
+import api
+from fastapi.testclient import TestClient
+client = TestClient(api.app)
+start = time.perf_counter()
+assert client.get("/books?limit=10").status_code == 200
+print(time.perf_counter() - start)
+""",
+    "eager": """
+import time
+start = time.perf_counter()
+import api
+from open_library import AsyncOpenLibraryClient
+api.get_enrichment()
+api.get_library().open_library_client
+AsyncOpenLibraryClient(**api.get_open_library_options())
+print(time.perf_counter() - start)
+""",
+}
+
+
+def measure(program: str, directory: str, env: dict, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {ROOT!r})\n{program}"],
+                                cwd=directory, env=env, capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.split()[-1]))
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("0,1e4,1e5"))
+    parser.add_argument("--storage", default="json,snapshot")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-import-api-ms", type=float, default=None)
+    parser.add_argument("--max-import-main-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in args.storage.split(","):
+            for n in args.books:
+                path = os.path.join(directory, f"library_{n}.{storage}")
+                if storage == "snapshot":
+                    write_snapshot(path, make_books(n))
+                else:
+                    with open(path, 'w', encoding='utf-8') as file:
+                        write_books(file, make_books(n))
+                env = {**os.environ, "LIBRARIAN_STORAGE": storage, "LIBRARIAN_LIBRARY_PATH": path,
+                       "LIBRARIAN_JOBS_DB": os.path.join(directory, "jobs.db")}
+                row = {"storage": storage, "books": n}
+                for name, program in PROGRAMS.items():
+                    row[f"{name}_ms"] = measure(program, directory, env, args.repeat)
+                rows.append(row)
+    report("cold start: import time and first request", rows)
+
+    failed = False
+    for column, limit in (("import_api_ms", args.max_import_api_ms), ("import_main_ms", args.max_import_main_ms)):
+        slowest = max(row[column] for row in rows)
+        if limit is not None and slowest > limit:
+            print(f"❌ {column} is {slowest:.0f} ms, over the {limit:.0f} ms limit")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Import a generated Open Library editions/authors dump with import_dump.
+
+Usage: python benchmarks/bench_dump_import.py [--editions 1e5,1e6] [--workers 1,2,4]
+       [--storage json] [--authors 100000]
+
+Writes gzip TSV dumps shaped like the official ones (type, key, revision,
+last_modified, JSON) and reports how long parsing + bulk loading took and
+the resulting editions per second, for each number of parser processes.
+Parsing is what the pool spreads out; gzip decompression and the catalog
+inserts stay in the main process.
+"""
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+from _common import NAMES, WORDS, make_isbn, parse_sizes, report
+
+from dump_import import import_dump
+from library import Library
+
+
+def write_dumps(directory: str, editions: int, authors: int) -> tuple[str, str]:
+    authors_path = os.path.join(directory, "authors.txt.gz")
+    editions_path = os.path.join(directory, f"editions_{editions}.txt.gz")
+    if not os.path.exists(authors_path):
+        with gzip.open(authors_path, 'wt', encoding='utf-8', compresslevel=1) as file:
+            for i in range(authors):
+                record = {"type": {"key": "/type/author"}, "key": f"/authors/OL{i}A",
+                          "name": f"{NAMES[i % len(NAMES)]} {i}", "revision": 1}
+                file.write(f"/type/author\t/authors/OL{i}A\t1\t2024-01-01T00:00:00\t{json.dumps(record, ensure_ascii=False)}\n")
+    with gzip.open(editions_path, 'wt', encoding='utf-8', compresslevel=1) as file:
+        for i in range(editions):
+            record = {
+                "type": {"key": "/type/edition"}, "key": f"/books/OL{i}M",
+                "title": " ".join(WORDS[(i * k + k) % len(WORDS)] for k in (3, 7, 11)),
+                "authors": [{"key": f"/authors/OL{i % authors}A"}],
+                "isbn_13": [make_isbn(i)], "publishers": ["Stub Press"], "number_of_pages": 100 + i % 500,
+                "publish_date": "2001", "works": [{"key": f"/works/OL{i}W"}], "revision": 1,
+            }
+            file.write(f"/type/edition\t/books/OL{i}M\t1\t2024-01-01T00:00:00\t{json.dumps(record, ensure_ascii=False)}\n")
+    return editions_path, authors_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--editions", type=parse_sizes, default=parse_sizes("1e5,1e6"))
+    parser.add_argument("--workers", type=parse_sizes, default=[1, 2, 4])
+    parser.add_argument("--storage", default="json")
+    parser.add_argument("--authors", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for editions in args.editions:
+            editions_path, authors_path = write_dumps(directory, editions, args.authors)
+            for workers in args.workers:
+                file_path = os.path.join(directory, f"library_{editions}_{workers}.{'db' if args.storage == 'sqlite' else 'json'}")
+                with redirect_stdout(StringIO()):
+                    library = Library(file_path=file_path, storage=args.storage)
+                    start = time.perf_counter()
+                    counts = import_dump(library, editions_path, authors_path, workers=workers)
+                    elapsed = time.perf_counter() - start
+                rows.append({
+                    "editions": editions,
+                    "workers": workers,
+                    "added": counts["added"],
+                    "seconds": elapsed,
+                    "editions_per_s": editions / elapsed,
+                    "dump_mb": os.path.getsize(editions_path) / 1e6,
+                })
+                os.remove(file_path)
+    report(f"import_dump ({args.storage} storage, {os.cpu_count()} CPUs)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""POST /books through the enrichment queue vs adding books synchronously.
+
+Usage: python benchmarks/bench_enrichment_queue.py [--isbns 200] [--books 1e4]
+       [--latency-ms 100] [--workers 1,4,16]
+
+A stub Open Library answers every lookup after ``--latency-ms``, and the
+library starts with ``--books`` books saved as JSON, so every persist
+rewrites them. ``sync`` adds one ISBN at a time the way POST /books used
+to (lookup, then ``persist``), timed in-process without any HTTP overhead.
+The queued rows POST each ISBN through the API and report how long the
+caller waited for its 202, then the time until the workers had added
+every book.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from _common import make_books, make_isbn, parse_sizes, report
+
+from fastapi.testclient import TestClient
+
+import api
+from job_queue import DONE, FAILED, EnrichmentWorkers, JobQueue
+from library import Library
+from open_library import AsyncOpenLibraryClient
+from tests.stub_server import StubOpenLibrary
+
+
+def make_library(path: Path, books: int) -> Library:
+    with redirect_stdout(StringIO()):
+        library = Library(make_books(books), file_path=str(path))
+    library.persist()
+    return library
+
+
+async def sync_adds(library: Library, isbns: list[str], url: str) -> list[float]:
+    latencies = []
+    async with AsyncOpenLibraryClient(base_url=url) as client:
+        for isbn in isbns:
+            start = time.perf_counter()
+            await library.add_book_async(isbn, client)
+            library.persist()
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def queued_adds(library: Library, queue: JobQueue, isbns: list[str], url: str, workers: int):
+    pool = EnrichmentWorkers(library, queue, lambda: AsyncOpenLibraryClient(base_url=url),
+                             workers=workers, poll_interval=0.05)
+    latencies = []
+    with patch("api.library", library), patch("api.job_queue", queue), patch("api.enrichment", pool):
+        client = TestClient(api.app)
+        start = time.perf_counter()
+        for isbn in isbns:
+            posted = time.perf_counter()
+            response = client.post("/books", json={"isbn": isbn})
+            latencies.append(time.perf_counter() - posted)
+            assert response.status_code == 202, response.text
+        while sum(queue.counts()[status] for status in (DONE, FAILED)) < len(isbns):
+            time.sleep(0.01)
+        drained = time.perf_counter() - start
+    pool.stop()
+    return latencies, drained
+
+
+def row(mode: str, latencies: list[float], total: float, added: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "mode": mode,
+        "added": added,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "all_added_s": total,
+        "books_per_s": added / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--isbns", type=int, default=200)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e4"))
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--workers", type=parse_sizes, default=parse_sizes("1,4,16"))
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory, StubOpenLibrary(delay=args.latency_ms / 1000) as stub:
+        directory = Path(directory)
+        for books in args.books:
+            isbns = [make_isbn(books + i) for i in range(args.isbns)]
+            library = make_library(directory / f"sync-{books}.json", books)
+            start = time.perf_counter()
+            latencies = asyncio.run(sync_adds(library, isbns, stub.url))
+            rows.append(row(f"sync {books}", latencies, time.perf_counter() - start, len(library.books) - books))
+
+            for workers in args.workers:
+                library = make_library(directory / f"queued-{books}-{workers}.json", books)
+                queue = JobQueue(str(directory / f"jobs-{books}-{workers}.db"))
+                latencies, drained = queued_adds(library, queue, isbns, stub.url, workers)
+                rows.append(row(f"{workers} workers {books}", latencies, drained, len(library.books) - books))
+                queue.close()
+    report(f"adding {args.isbns} ISBNs with {args.latency_ms:g} ms Open Library latency", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Typo-tolerant (fuzzy) title/author search on a synthetic catalogue.
+
+Usage: python benchmarks/bench_fuzzy_search.py [--books 1e5,1e6] [--repeat 20] [--limit 20]
+
+Every query is misspelled, so index and substring searches find nothing.
+Reports the time of the first fuzzy search (which builds the trigram
+index over the field's vocabulary) and the median time of later ones,
+next to a substring scan for the correctly spelled query as a reference.
+"""
+import argparse
+import statistics
+import time
+from unittest.mock import patch
+
+from _common import make_books, parse_sizes, report
+
+from library import Library
+
+# (field, misspelled query, correct spelling)
+QUERIES = [
+    ("author", "dikens", "dickens"),
+    ("author", "orhan pamk", "orhan pamuk"),
+    ("author", "vriginia wolf", "virginia woolf"),
+    ("title", "shadw", "shadow"),
+    ("title", "goldn denz", "golden deniz"),
+    ("title", "sehr 4242", "şehir 4242"),
+]
+
+
+def median_time(search, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = search()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e5,1e6"))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.books:
+        with patch.object(Library, 'load_books'):
+            library = Library([])
+        library.books = make_books(n)
+        first_search = {}
+        for field in ("title", "author"):
+            start = time.perf_counter()
+            library.fuzzy_search("xxxxxx", field)
+            first_search[field] = time.perf_counter() - start
+        print(f"{n} books: first fuzzy search (vocabulary index build) "
+              f"title {first_search['title']:.2f}s, author {first_search['author']:.3f}s")
+
+        for field, query, correct in QUERIES:
+            fuzzy_s, matches = median_time(lambda: library.fuzzy_search(query, field, args.limit), args.repeat)
+            exact = library.find_book(query, field)
+            scan_s, _ = median_time(lambda: library.find_book(correct, field, "substring"), max(1, args.repeat // 5))
+            rows.append({
+                "books": n,
+                "query": f"{field}:{query}"[:14],
+                "exact_hits": len(exact),
+                "fuzzy_hits": len(matches),
+                "best_score": matches[0].score if matches else 0.0,
+                "fuzzy_ms": fuzzy_s * 1000,
+                "scan_ms": scan_s * 1000,
+            })
+    report(f"fuzzy_search (limit {args.limit}) vs substring scan", rows)
+
+
+if __name__ == "__main__":
+    main()
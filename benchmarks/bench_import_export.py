@@ -0,0 +1,146 @@
+"""Throughput of bulk CSV/NDJSON import and export, in MB/s per format.
+
+Usage: python benchmarks/bench_import_export.py [--books 1e5,1e6] [--repeat 3]
+
+``export`` writes every book of a library to a file with ``export_books``
+(what ``python main.py export`` does) and ``import`` reads that file back
+into an empty library with ``import_books`` in 64 KiB chunks, validating
+and deduplicating as it goes. ``api_import``/``api_export`` go through
+POST /books/import and GET /books/export on a TestClient, the upload sent
+as a stream of 64 KiB chunks. ``json`` is the existing whole-file format
+(``write_books`` / ``Library.import_books(iter_books(...))``) for
+comparison. ``parse`` is the import with books discarded instead of
+added, i.e. reading, validating and normalizing alone; the rest of the
+import time is spent indexing the books in the catalogue, which costs the
+same for every format. Saving the library after an import is left out too.
+MB/s is file bytes over wall time.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+from _common import make_books, parse_sizes, report
+
+from fastapi.testclient import TestClient
+
+import api
+from book_stream import CHUNK_SIZE, iter_books, write_books
+from book_transfer import MEDIA_TYPES, export_books, import_books
+from library import Library
+
+
+def empty_library(path: str) -> Library:
+    with redirect_stdout(StringIO()):
+        library = Library([], file_path=path)
+    library.persist = lambda: None
+    return library
+
+
+def median_time(run, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def export_file(library: Library, path: str, format: str):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if format == "json":
+            write_books(file, library)
+        else:
+            export_books(file, library, format)
+
+
+def import_file(path: str, format: str, directory: str) -> Library:
+    library = empty_library(os.path.join(directory, "imported.json"))
+    if format == "json":
+        with open(path, 'r', encoding='utf-8') as file:
+            library.import_books(iter_books(file))
+    else:
+        with open(path, 'rb') as file:
+            import_books(library, file, format)
+    return library
+
+
+def parse_file(path: str, format: str, directory: str):
+    library = empty_library(os.path.join(directory, "imported.json"))
+    library.import_books = lambda books, batch_size=0, persist=True: len(books)
+    if format == "json":
+        with open(path, 'r', encoding='utf-8') as file:
+            for _ in iter_books(file):
+                pass
+    else:
+        with open(path, 'rb') as file:
+            import_books(library, file, format)
+
+
+def api_import(client: TestClient, path: str, format: str, directory: str) -> Library:
+    library = empty_library(os.path.join(directory, "imported.json"))
+
+    def body():
+        with open(path, 'rb') as file:
+            while chunk := file.read(CHUNK_SIZE):
+                yield chunk
+
+    with patch("api.library", library):
+        response = client.post("/books/import", content=body(), headers={"Content-Type": MEDIA_TYPES[format]})
+    assert response.status_code == 200, response.text
+    return library
+
+
+def api_export(client: TestClient, library: Library, format: str) -> int:
+    size = 0
+    with patch("api.library", library), client.stream("GET", f"/books/export?format={format}") as response:
+        for chunk in response.iter_bytes():
+            size += len(chunk)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e5,1e6"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client = TestClient(api.app)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for n in args.books:
+            library = empty_library(os.path.join(directory, "library.json"))
+            library.import_books(make_books(n))
+            for format in ("json", "csv", "ndjson"):
+                path = os.path.join(directory, f"books.{format}")
+                export_s = median_time(lambda: export_file(library, path, format), args.repeat)
+                megabytes = os.path.getsize(path) / 1e6
+                parse_s = median_time(lambda: parse_file(path, format, directory), args.repeat)
+                import_s = median_time(lambda: import_file(path, format, directory), args.repeat)
+                assert len(import_file(path, format, directory).books) == n
+                row = {
+                    "books": n,
+                    "format": format,
+                    "file_MB": megabytes,
+                    "export_MB_s": megabytes / export_s,
+                    "parse_MB_s": megabytes / parse_s,
+                    "import_MB_s": megabytes / import_s,
+                    "api_export_MB_s": 0.0,
+                    "api_import_MB_s": 0.0,
+                }
+                if format != "json":
+                    api_export_s = median_time(lambda: api_export(client, library, format), args.repeat)
+                    api_import_s = median_time(lambda: api_import(client, path, format, directory), args.repeat)
+                    row["api_export_MB_s"] = megabytes / api_export_s
+                    row["api_import_MB_s"] = megabytes / api_import_s
+                rows.append(row)
+                os.unlink(path)
+    report("bulk import/export throughput (MB/s of file data)", rows)
+
+
+if __name__ == "__main__":
+    main()
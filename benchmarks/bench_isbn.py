@@ -0,0 +1,70 @@
+"""ISBN normalization, one value at a time and batched as imports do it.
+
+Usage: python benchmarks/bench_isbn.py [--sizes 1e5,1e6]
+
+Inputs are a realistic dump mix: mostly clean ISBN-13s, some hyphenated
+ones, ISBN-10s (with and without an X check digit) and a few invalid
+values. Reports ISBNs per second for ``to_isbn13`` in a loop, for
+``normalize_isbns`` on the whole batch, and for the bare
+``str.translate`` pass both of them start with.
+"""
+import argparse
+import random
+
+from _common import make_isbn, parse_sizes, report, timer
+
+from isbn import SEPARATORS, normalize_isbns, to_isbn13
+
+
+def isbn10(isbn13: str) -> str:
+    body = isbn13[3:12]
+    check = -sum((10 - i) * int(digit) for i, digit in enumerate(body)) % 11
+    return body + ("X" if check == 10 else str(check))
+
+
+def make_inputs(n: int, rng: random.Random) -> list[str]:
+    values = []
+    for i in range(n):
+        isbn = make_isbn(i)
+        roll = rng.random()
+        if roll < 0.70:
+            values.append(isbn)
+        elif roll < 0.85:
+            values.append(f"{isbn[:3]}-{isbn[3:5]}-{isbn[5:9]}-{isbn[9:12]}-{isbn[12]}")
+        elif roll < 0.97:
+            values.append(isbn10(isbn))
+        else:
+            values.append(isbn[:12] + str((int(isbn[12]) + 1) % 10))
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1e5,1e6"))
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = []
+    for size in args.sizes:
+        values = make_inputs(size, rng)
+        times = {}
+        with timer(times, "per_item"):
+            single = [to_isbn13(value) for value in values]
+        with timer(times, "bulk"):
+            bulk = normalize_isbns(values)
+        with timer(times, "translate"):
+            "\0".join(values).translate(SEPARATORS)
+        assert single == bulk
+        rows.append({
+            "isbns": size,
+            "invalid": bulk.count(None),
+            "per_item_k_s": size / times["per_item"] / 1000,
+            "bulk_k_s": size / times["bulk"] / 1000,
+            "speedup": times["per_item"] / times["bulk"],
+            "translate_k_s": size / times["translate"] / 1000,
+        })
+    report("ISBN normalization", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""ISBN lookups from an IsbnMirror compared with a (local stub) network lookup.
+
+Usage: python benchmarks/bench_isbn_mirror.py [--sizes 1e5,1e6] [--lookups 100000]
+
+For each mirror size reports build time, file size, how long opening takes,
+how much resident memory opening adds (the file is mapped, not loaded) and
+the per-lookup latency for hits and misses. The last row is the same lookup
+through OpenLibraryClient against the in-process stub server, i.e. the
+cheapest possible network round trip.
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+
+from _common import make_books, make_isbn, parse_sizes, report
+
+from isbn_mirror import IsbnMirror, write_mirror
+from open_library import OpenLibraryClient
+from tests.stub_server import StubOpenLibrary
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 1e6
+
+
+def per_lookup_us(lookup, isbns) -> float:
+    start = time.perf_counter()
+    for isbn in isbns:
+        lookup(isbn)
+    return (time.perf_counter() - start) / len(isbns) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1e5,1e6"))
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"mirror_{size}.bin")
+            start = time.perf_counter()
+            write_mirror(path, (book for i in range(0, size, 100_000) for book in make_books(min(100_000, size - i), i)))
+            build = time.perf_counter() - start
+
+            before = rss_mb()
+            start = time.perf_counter()
+            mirror = IsbnMirror(path)
+            opened = time.perf_counter() - start
+            hits = [make_isbn(rng.randrange(size)) for _ in range(args.lookups)]
+            misses = [make_isbn(size + rng.randrange(size)) for _ in range(args.lookups)]
+            rows.append({
+                "books": size,
+                "build_s": build,
+                "file_mb": os.path.getsize(path) / 1e6,
+                "open_ms": opened * 1000,
+                "open_rss_mb": rss_mb() - before,
+                "hit_us": per_lookup_us(mirror.get, hits),
+                "miss_us": per_lookup_us(mirror.get, misses),
+            })
+            mirror.close()
+
+    with StubOpenLibrary() as stub, OpenLibraryClient(base_url=stub.url) as client:
+        isbns = [make_isbn(i) for i in range(min(args.lookups, 2000))]
+        network = per_lookup_us(client.get_book_by_isbn, isbns)
+    rows.append({"books": "stub network", "build_s": 0.0, "file_mb": 0.0, "open_ms": 0.0,
+                 "open_rss_mb": 0.0, "hit_us": network, "miss_us": network})
+    report("IsbnMirror lookups", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Per-mutation persistence latency: full library.json rewrite vs append-only journal.
+
+Usage: python benchmarks/bench_journal.py [--sizes 1e4,1e5,1e6] [--ops 200]
+
+Each mutation adds one book and then persists it the way the API does
+(``Library.persist``). Full rewrites are capped at ``--rewrite-ops`` per size
+because each one is O(n).
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from unittest.mock import patch
+
+from _common import make_books, parse_sizes, report, write_library_file
+
+from library import Library
+
+
+def mutation_latencies(library: Library, start: int, ops: int) -> list[float]:
+    timings = []
+    for book in make_books(ops, start=start):
+        began = time.perf_counter()
+        library.books.append(book)
+        library.persist()
+        timings.append(time.perf_counter() - began)
+    return timings
+
+
+def row(mode: str, n: int, timings: list[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "mode": mode,
+        "books": n,
+        "ops": len(timings),
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1e4,1e5,1e6"))
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--rewrite-ops", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, patch('library.OpenLibraryClient'):
+        for n in args.sizes:
+            path = os.path.join(tmp, f"rewrite_{n}.json")
+            write_library_file(path, n)
+            library = Library([], path)
+            rows.append(row("rewrite", n, mutation_latencies(library, n, args.rewrite_ops)))
+
+            path = os.path.join(tmp, f"journal_{n}.json")
+            write_library_file(path, n)
+            library = Library([], path, storage="journal")
+            rows.append(row("journal", n, mutation_latencies(library, n, args.ops)))
+            library.journal.close()
+    report("persist latency per mutation", rows)
+
+
+if __name__ == "__main__":
+    main()
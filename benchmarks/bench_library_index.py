@@ -0,0 +1,90 @@
+"""Scaling of Library load/add/remove with the ISBN index.
+
+Usage: python benchmarks/bench_library_index.py [--sizes 1e3,1e4,1e5,1e6]
+
+The ``list`` rows replay the previous linear-scan implementation and are only
+run up to ``--baseline-max`` books because loading is quadratic there.
+"""
+import argparse
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+
+from _common import make_books, make_isbn, parse_sizes, report, timer, write_library_file
+
+from book import Book
+from library import Library
+
+OPS = 1000
+
+
+class StubClient:
+    def get_book_by_isbn(self, isbn):
+        return Book("Stub Title", "Stub Author", isbn)
+
+
+def bench_indexed(empty_path: str, path: str, n: int) -> dict:
+    results = {"impl": "catalog", "books": n}
+    library = Library([], empty_path)
+    library.open_library_client = StubClient()
+    with timer(results, "load_s"):
+        library.load_books(path)
+
+    with timer(results, f"add_{OPS}_s"):
+        for i in range(n, n + OPS):
+            library.add_book(make_isbn(i))
+    with timer(results, f"remove_{OPS}_s"), redirect_stdout(io.StringIO()):
+        for i in range(n, n + OPS):
+            library.remove_book(make_isbn(i))
+    return results
+
+
+def bench_list(n: int) -> dict:
+    results = {"impl": "list", "books": n}
+    records = make_books(n)
+    with timer(results, "load_s"):
+        books = []
+        for book in records:
+            if any(existing_book.isbn == book.isbn for existing_book in books):
+                continue
+            books.append(book)
+
+    with timer(results, f"add_{OPS}_s"):
+        for i in range(n, n + OPS):
+            isbn = make_isbn(i)
+            for existing_book in books:
+                if existing_book.isbn == isbn:
+                    raise ValueError(isbn)
+            books.append(Book("Stub Title", "Stub Author", isbn))
+    with timer(results, f"remove_{OPS}_s"):
+        for i in range(n, n + OPS):
+            isbn = make_isbn(i)
+            for ix, book in enumerate(books):
+                if book.isbn == isbn:
+                    books.pop(ix)
+                    break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1e3,1e4,1e5,1e6"))
+    parser.add_argument("--baseline-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        empty_path = os.path.join(tmp, "empty.json")
+        write_library_file(empty_path, 0)
+        for n in args.sizes:
+            path = os.path.join(tmp, f"library_{n}.json")
+            write_library_file(path, n)
+            rows.append(bench_indexed(empty_path, path, n))
+            if n <= args.baseline_max:
+                rows.append(bench_list(n))
+    report("Library ISBN index", rows)
+
+
+if __name__ == "__main__":
+    main()
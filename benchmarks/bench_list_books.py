@@ -0,0 +1,81 @@
+"""Latency of listing the catalogue over HTTP: whole-list GET /books vs pages and NDJSON.
+
+Usage: python benchmarks/bench_list_books.py [--books 1e6] [--pages 500] [--full-runs 3]
+
+"full list" re-creates the old endpoint that returned every book through
+List[BookResponse]. "page" requests use random cursors across the whole
+catalogue; "ndjson" streams every book with Accept: application/x-ndjson.
+"""
+import argparse
+import random
+import statistics
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import List
+from unittest.mock import patch
+
+from _common import make_books, parse_sizes, report
+from fastapi.testclient import TestClient
+
+import api
+from library import Library
+
+
+@api.app.get("/bench/books/full", response_model=List[api.BookResponse])
+async def full_list():
+    return list(api.get_library().books)
+
+
+def row(name: str, n: int, timings: list[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "request": name,
+        "books": n,
+        "runs": len(timings),
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+    }
+
+
+def timed(client: TestClient, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    response = client.get(url, **kwargs)
+    response.read()
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.text
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e6"))
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=api.PAGE_SIZE)
+    parser.add_argument("--full-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    client = TestClient(api.app)
+    for n in args.books:
+        with redirect_stdout(StringIO()):
+            library = Library(make_books(n), file_path="/nonexistent/library.json")
+        with patch("api.library", library):
+            # A fresh catalogue numbers its books 1..n, so any integer below
+            # n is a valid cursor somewhere in the middle of it.
+            cursors = [random.randrange(n) for _ in range(args.pages)]
+            rows.append(row("page", n, [
+                timed(client, f"/books?limit={args.page_size}&cursor={cursor}") for cursor in cursors
+            ]))
+            rows.append(row("ndjson stream", n, [
+                timed(client, "/books", headers={"Accept": "application/x-ndjson"})
+                for _ in range(args.full_runs)
+            ]))
+            rows.append(row("full list (old)", n, [
+                timed(client, "/bench/books/full") for _ in range(args.full_runs)
+            ]))
+    report("listing books", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Cost of the metrics and the add_book tracer, with metrics disabled and enabled.
+
+Usage: python benchmarks/bench_metrics.py [--books 1e4,1e5] [--repeat 2000] [--max-overhead-pct 1]
+
+For each instrumented operation ``disabled_us`` is its median time with
+``metrics=None`` (what runs unless LIBRARIAN_METRICS=1) and ``enabled_us``
+with a ``Metrics`` instance and the add_book tracer. ``hooks_ns`` is what
+the disabled instrumentation alone costs per call (the ``_timed`` context,
+the stage marks of add_book, the pass-through of the request middleware),
+timed on its own less the cost of calling an empty function, and
+``hooks_pct`` that cost as a share of the disabled operation. ``add_book`` uses a client answering from memory, so no
+network time hides the overhead; ``request`` is GET /books?limit=10 on a
+TestClient. With ``--max-overhead-pct`` the benchmark exits with status 1
+when the disabled instrumentation costs more than that share of any
+operation.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+from _common import WORDS, make_books, make_isbn, parse_sizes, report
+
+from fastapi.testclient import TestClient
+
+import api
+from book import Book
+from library import Library
+from metrics import Metrics
+
+
+class MemoryClient:
+    """Open Library client answering every ISBN at once."""
+
+    def get_book_by_isbn(self, isbn: str) -> Book:
+        return Book("Metrics", "Someone", isbn)
+
+
+def make_library(books: list[Book], path: str, metrics) -> Library:
+    with redirect_stdout(StringIO()):
+        library = Library(books, file_path=path, metrics=metrics,
+                          tracer=metrics.trace_add_book if metrics is not None else None)
+    library.open_library_client = MemoryClient()
+    return library
+
+
+def per_call(run, repeat: int) -> float:
+    """Median seconds per call of ``run`` over batches of ``repeat`` calls."""
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        timings.append((time.perf_counter() - start) / repeat)
+    return statistics.median(timings)
+
+
+def add_and_remove(library: Library, isbn: str):
+    library.add_book(isbn)
+    library.books.pop_isbn(isbn)
+
+
+def no_hook(library: Library):
+    pass
+
+
+def timed_hook(library: Library):
+    with library._timed("search_seconds", "index"):
+        pass
+
+
+def stage_hooks(library: Library):
+    stage = library._stage_timer()
+    stage("validate")
+    stage("lookup")
+    stage("insert")
+
+
+def save_hook(library: Library, path: str):
+    with library._timed_save(path):
+        pass
+
+
+def middleware_cost(repeat: int) -> float:
+    async def endpoint(scope, receive, send):
+        pass
+
+    async def run(app):
+        scope = {"type": "http", "method": "GET"}
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await app(scope, None, None)
+        return (time.perf_counter() - start) / repeat
+
+    wrapped = api.RequestMetrics(endpoint)
+    with patch("api.metrics", None):
+        return max(0.0, asyncio.run(run(wrapped)) - asyncio.run(run(endpoint)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e4,1e5"))
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--max-overhead-pct", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = []
+    client = TestClient(api.app)
+    new_isbn = make_isbn(10 ** 8)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "library.json")
+        for n in args.books:
+            books = make_books(n)
+            disabled, enabled = make_library(books, path, None), make_library(books, path, Metrics())
+            query = f"{WORDS[3]} {WORDS[7]}"
+            save_repeat = max(1, args.repeat * 1000 // n // 100)
+            operations = {
+                "find_book": (lambda library: library.find_book(query, "title", limit=20),
+                              args.repeat, lambda: timed_hook(disabled)),
+                "ranked_search": (lambda library: library.ranked_search(query, "title", limit=20),
+                                  args.repeat, lambda: timed_hook(disabled)),
+                "add_book": (lambda library: add_and_remove(library, new_isbn),
+                             args.repeat, lambda: stage_hooks(disabled)),
+                "save_books": (lambda library: library.save_books(path),
+                               save_repeat, lambda: save_hook(disabled, path)),
+            }
+            # The cost of calling a hook function, taken off every hook timing.
+            call_s = per_call(lambda: no_hook(disabled), args.repeat * 10)
+            for name, (operation, repeat, hooks) in operations.items():
+                disabled_s = per_call(lambda: operation(disabled), repeat)
+                enabled_s = per_call(lambda: operation(enabled), repeat)
+                hooks_s = max(0.0, per_call(hooks, args.repeat * 10) - call_s)
+                rows.append({"operation": name, "books": n, "disabled_us": disabled_s * 1e6,
+                             "enabled_us": enabled_s * 1e6, "hooks_ns": hooks_s * 1e9,
+                             "hooks_pct": hooks_s / disabled_s * 100})
+
+            request_repeat = max(1, args.repeat // 10)
+            with patch("api.library", disabled), patch("api.metrics", None):
+                disabled_s = per_call(lambda: client.get("/books?limit=10"), request_repeat)
+            with patch("api.library", enabled), patch("api.metrics", Metrics()):
+                enabled_s = per_call(lambda: client.get("/books?limit=10"), request_repeat)
+            hooks_s = middleware_cost(args.repeat * 10)
+            rows.append({"operation": "request", "books": n, "disabled_us": disabled_s * 1e6,
+                         "enabled_us": enabled_s * 1e6, "hooks_ns": hooks_s * 1e9,
+                         "hooks_pct": hooks_s / disabled_s * 100})
+    report("metrics overhead: disabled vs enabled", rows)
+
+    worst = max(rows, key=lambda row: row["hooks_pct"])
+    if args.max_overhead_pct is not None and worst["hooks_pct"] > args.max_overhead_pct:
+        print(f"❌ disabled metrics cost {worst['hooks_pct']:.2f}% of {worst['operation']}, "
+              f"over {args.max_overhead_pct}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""ISBN lookups against a stub Open Library that injects latency and failures.
+
+Usage: python benchmarks/bench_open_library_retry.py [--lookups 2000] [--concurrency 50]
+       [--failure-rates 0,0.05,0.2] [--latency-ms 20]
+
+Compares a client that gives up on the first transient failure with the
+default retry policy (jittered exponential backoff + retry budget) and
+reports how many lookups succeeded, throughput and per-lookup latency.
+The stub runs in the same process, so on few cores absolute throughput is
+bounded by CPU; compare the policies against each other.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from _common import make_isbn, report
+
+from open_library import AsyncOpenLibraryClient, OpenLibraryUnavailable
+from retry import RetryPolicy
+from tests.stub_server import StubOpenLibrary
+
+
+def unreliable(stub: StubOpenLibrary, failure_rate: float, latency: float):
+    respond = stub.respond
+    rng = random.Random(42)
+
+    def failing(path, params):
+        time.sleep(rng.expovariate(1 / latency) if latency else 0)
+        if rng.random() < failure_rate:
+            return rng.choice([500, 502, 503]), {}, {}
+        return respond(path, params)
+
+    stub.respond = failing
+
+
+async def run(url: str, retry: RetryPolicy, lookups: int, concurrency: int) -> tuple[list[float], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, failed = [], 0
+
+    async with AsyncOpenLibraryClient(base_url=url, retry=retry) as client:
+        async def lookup(i):
+            nonlocal failed
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await client.get_book_by_isbn(make_isbn(i))
+                    timings.append(time.perf_counter() - start)
+                except OpenLibraryUnavailable:
+                    failed += 1
+
+        await asyncio.gather(*(lookup(i) for i in range(lookups)))
+    return timings, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--failure-rates", default="0,0.05,0.2")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for failure_rate in [float(rate) for rate in args.failure_rates.split(",")]:
+        policies = {
+            "no retries": RetryPolicy(attempts=1),
+            "retry policy": RetryPolicy(),
+        }
+        for name, retry in policies.items():
+            with StubOpenLibrary() as stub:
+                unreliable(stub, failure_rate, args.latency_ms / 1000)
+                start = time.perf_counter()
+                timings, failed = asyncio.run(run(stub.url, retry, args.lookups, args.concurrency))
+                elapsed = time.perf_counter() - start
+                requests = stub.requests
+            timings.sort()
+            rows.append({
+                "policy": name,
+                "failure_rate": failure_rate,
+                "ok": len(timings),
+                "unavailable": failed,
+                "requests": requests,
+                "lookups_per_s": args.lookups / elapsed,
+                "p50_ms": statistics.median(timings) * 1000 if timings else 0.0,
+                "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000 if timings else 0.0,
+            })
+    report("Open Library lookups under injected failures", rows)
+
+
+if __name__ == "__main__":
+    main()
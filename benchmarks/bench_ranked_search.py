@@ -0,0 +1,85 @@
+"""BM25-ranked top-k search vs returning every match, by query selectivity.
+
+Usage: python benchmarks/bench_ranked_search.py [--books 1e5,1e6] [--repeat 5] [--limit 20]
+
+Titles get a varying number of extra (sometimes repeated) words so field
+lengths and term frequencies differ. High-selectivity queries match a
+handful of books (or a hundred, for a number prefix); low-selectivity
+ones a tenth of the catalogue or more.
+``top_ms`` is ``ranked_search`` for the first page, ``deep_ms`` the page
+at offset 1000, ``sorted_ms`` ranks every match (``limit=None``) as a
+full sort would, and ``all_ms`` is ``find_book`` returning all matches in
+insertion order, which is what the search endpoint used to serialize.
+"""
+import argparse
+import statistics
+import time
+from unittest.mock import patch
+
+from _common import WORDS, make_books, parse_sizes, report
+
+from book import Book
+from library import Library
+
+# (field, query): high selectivity first, then low.
+QUERIES = [
+    ("title", "424242"),
+    ("title", "gece 4242"),
+    ("title", "4242"),
+    ("author", "jack london"),
+    ("title", "ışık river"),
+    ("title", "river"),
+    ("title", "s"),
+]
+
+
+def median_time(search, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = search()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def varied_books(n: int) -> list[Book]:
+    books = []
+    for i, book in enumerate(make_books(n)):
+        extra = " ".join(WORDS[(i * k) % len(WORDS)] for k in range(i % 4))
+        books.append(Book(f"{book.title} {extra}".strip(), book.author, book.isbn))
+    return books
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e5,1e6"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.books:
+        with patch.object(Library, 'load_books'):
+            library = Library([])
+        library.books = varied_books(n)
+
+        for field, query in QUERIES:
+            top_s, top = median_time(lambda: library.ranked_search(query, field, args.limit), args.repeat)
+            deep_s, _ = median_time(lambda: library.ranked_search(query, field, args.limit, 1000), args.repeat)
+            sorted_s, ranked = median_time(lambda: library.ranked_search(query, field, None), max(1, args.repeat // 2))
+            all_s, _ = median_time(lambda: library.find_book(query, field), max(1, args.repeat // 2))
+            rows.append({
+                "books": n,
+                "query": f"{field}:{query}"[:14],
+                "matches": len(ranked),
+                "best_score": top[0].score if top else 0.0,
+                "top_ms": top_s * 1000,
+                "deep_ms": deep_s * 1000,
+                "sorted_ms": sorted_s * 1000,
+                "all_ms": all_s * 1000,
+            })
+    report(f"ranked_search (limit {args.limit}) vs ranking or returning every match", rows)
+
+
+if __name__ == "__main__":
+    main()
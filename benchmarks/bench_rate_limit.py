@@ -0,0 +1,99 @@
+"""ISBN lookups against a stub Open Library that enforces its own rate limit.
+
+Usage: python benchmarks/bench_rate_limit.py [--lookups 300] [--concurrency 50]
+       [--server-rate 100] [--rates 0,50,90,150] [--latency-ms 20]
+
+The stub answers 429 with Retry-After once a client exceeds
+``--server-rate`` requests per second. For each client-side rate (0 means
+no limiter) reports configured vs achieved throughput, how many requests
+were rejected and the adaptive concurrency limit the client ended with.
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from _common import make_isbn, report
+
+from open_library import AsyncOpenLibraryClient, OpenLibraryUnavailable
+from rate_limit import AdaptiveConcurrency, TokenBucket
+from retry import RetryPolicy
+from tests.stub_server import StubOpenLibrary
+
+
+def enforce_rate(stub: StubOpenLibrary, rate: float, latency: float) -> list:
+    respond = stub.respond
+    state = {"tokens": rate / 10, "updated": time.monotonic()}
+    rejected = []
+    lock = threading.Lock()
+
+    def limiting(path, params):
+        time.sleep(latency)
+        with lock:
+            now = time.monotonic()
+            state["tokens"] = min(rate / 10, state["tokens"] + (now - state["updated"]) * rate)
+            state["updated"] = now
+            allowed = state["tokens"] >= 1
+            if allowed:
+                state["tokens"] -= 1
+            else:
+                rejected.append(now)
+        if not allowed:
+            return 429, {"Retry-After": "1"}, {}
+        return respond(path, params)
+
+    stub.respond = limiting
+    return rejected
+
+
+async def run(url: str, rate: float, lookups: int, concurrency: int) -> tuple[int, AdaptiveConcurrency]:
+    semaphore = asyncio.Semaphore(concurrency)
+    adaptive = AdaptiveConcurrency(maximum=concurrency)
+    limiter = TokenBucket(rate, burst=rate / 10) if rate else None
+    failed = 0
+
+    async with AsyncOpenLibraryClient(base_url=url, retry=RetryPolicy(attempts=5),
+                                      rate_limiter=limiter, concurrency=adaptive) as client:
+        async def lookup(i):
+            nonlocal failed
+            async with semaphore:
+                try:
+                    await client.get_book_by_isbn(make_isbn(i))
+                except OpenLibraryUnavailable:
+                    failed += 1
+
+        await asyncio.gather(*(lookup(i) for i in range(lookups)))
+    return failed, adaptive
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--server-rate", type=float, default=100)
+    parser.add_argument("--rates", default="0,50,90,150")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for rate in [float(rate) for rate in args.rates.split(",")]:
+        with StubOpenLibrary() as stub:
+            rejected = enforce_rate(stub, args.server_rate, args.latency_ms / 1000)
+            start = time.perf_counter()
+            failed, adaptive = asyncio.run(run(stub.url, rate, args.lookups, args.concurrency))
+            elapsed = time.perf_counter() - start
+            requests = stub.requests
+        rows.append({
+            "client_rate": rate or "unlimited",
+            "server_rate": args.server_rate,
+            "achieved_per_s": (args.lookups - failed) / elapsed,
+            "requests": requests,
+            "rejected_429": len(rejected),
+            "unavailable": failed,
+            "final_concurrency": round(adaptive.limit, 1),
+        })
+    report("Open Library lookups against a rate-limiting server", rows)
+
+
+if __name__ == "__main__":
+    main()
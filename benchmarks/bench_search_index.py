@@ -0,0 +1,61 @@
+"""Indexed vs substring-scan title/author search on a synthetic catalogue.
+
+Usage: python benchmarks/bench_search_index.py [--books 1e4,1e5,1e6] [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+from unittest.mock import patch
+
+from _common import make_books, parse_sizes, report
+
+from library import Library
+
+QUERIES = [
+    ("title", "river"),
+    ("title", "golden city"),
+    ("title", "yolculuk 4242"),
+    ("author", "dickens"),
+    ("author", "oğuz atay"),
+]
+
+
+def median_query_time(library: Library, search_by: str, query: str, mode: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matches = library.find_book(query, search_by, mode)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(matches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e4,1e5,1e6"))
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.books:
+        with patch.object(Library, 'load_books'):
+            library = Library([])
+        start = time.perf_counter()
+        library.books = make_books(n)
+        build_s = time.perf_counter() - start
+        print(f"built catalogue of {n} books (with index) in {build_s:.2f}s")
+        for search_by, query in QUERIES:
+            indexed_s, matches = median_query_time(library, search_by, query, "index", args.repeat)
+            scan_s, scan_matches = median_query_time(library, search_by, query, "substring", max(1, args.repeat // 5))
+            rows.append({
+                "books": n,
+                "query": f"{search_by}:{query}"[:14],
+                "matches": matches,
+                "index_s": indexed_s,
+                "scan_s": scan_s,
+                "speedup": scan_s / indexed_s if indexed_s else float("inf"),
+            })
+    report("find_book: index vs substring", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-query lowercasing vs search keys stored at ingest.
+
+Usage: python benchmarks/bench_search_keys.py [--books 1e5,1e6] [--repeat 5]
+
+Titles are title-cased ("Işık Şehir ...") so Turkish capitals occur.
+``lowered`` is what a substring search used to do: ``.lower()`` every
+title per query, allocating one new string per book. ``keys`` is
+``find_book(..., "substring")`` comparing against the stored search keys,
+which allocates only the query's key and the result list. Allocated
+bytes are the summed sizes of those strings; matches show where
+``lower()`` gets Turkish text wrong.
+"""
+import argparse
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+from _common import make_books, parse_sizes, report
+
+from book import Book
+from library import Library
+from search_index import fold
+
+QUERIES = ["ışık", "şehir", "İstanbul", "river", "gece 42"]
+
+
+def lowered_scan(books, query):
+    query_lower = query.lower()
+    return [book for book in books if query_lower in book.title.lower()]
+
+
+def median_time(search, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = search()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e5,1e6"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.books:
+        books = [Book(book.title.title(), book.author, book.isbn) for book in make_books(n)]
+        with patch.object(Library, 'load_books'):
+            library = Library([])
+        start = time.perf_counter()
+        library.books = books
+        print(f"{n} books: catalogue with search keys built in {time.perf_counter() - start:.2f}s")
+        lowered_bytes = sum(sys.getsizeof(book.title.lower()) for book in books)
+
+        for query in QUERIES:
+            lowered_s, lowered = median_time(lambda: lowered_scan(books, query), args.repeat)
+            keys_s, found = median_time(lambda: library.find_book(query, "title", "substring"), args.repeat)
+            index_s, _ = median_time(lambda: library.find_book(query, "title"), args.repeat)
+            rows.append({
+                "books": n,
+                "query": query,
+                "lowered_hits": len(lowered),
+                "keys_hits": len(found),
+                "lowered_ms": lowered_s * 1000,
+                "keys_ms": keys_s * 1000,
+                "index_ms": index_s * 1000,
+                "lowered_mb": (lowered_bytes + sys.getsizeof(lowered)) / 1e6,
+                "keys_mb": (sys.getsizeof(fold(query)) + sys.getsizeof(found)) / 1e6,
+            })
+    report("title substring search: per-query lower() vs stored search keys", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Throughput of N worker processes sharing one library (Library(shared=True)).
+
+Usage: python benchmarks/bench_shared_library.py [--workers 1,2,4,8] [--ops 500] [--writes 0.2] [--storage journal]
+
+Each worker mimics an API worker: a mix of lookups/searches/pages and
+adds/removes against a local stub Open Library. After the run the library
+is reloaded and checked against what the workers report they added.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+from _common import parse_sizes, report
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from isbn import with_check_digit
+from library import Library
+from open_library import OpenLibraryClient
+from tests.stub_server import StubOpenLibrary
+
+
+def worker(index, file_path, storage, base_url, ops, writes, results):
+    rng = random.Random(index)
+    with redirect_stdout(StringIO()):
+        library = Library(file_path=file_path, storage=storage, shared=True)
+        library.open_library_client = OpenLibraryClient(base_url=base_url)
+        added = []
+        start = time.perf_counter()
+        for i in range(ops):
+            if rng.random() < writes:
+                if added and rng.random() < 0.3:
+                    library.remove_book(added.pop(rng.randrange(len(added))))
+                else:
+                    isbn = with_check_digit(f"978{index:03d}{i:06d}")
+                    library.add_book(isbn)
+                    added.append(isbn)
+            else:
+                choice = rng.random()
+                if choice < 0.5 and added:
+                    library.get_book(rng.choice(added))
+                elif choice < 0.8:
+                    library.find_book("stub", "author")
+                else:
+                    library.get_books_page(limit=100)
+        elapsed = time.perf_counter() - start
+    results.put((added, elapsed))
+
+
+def collect(processes, results, timeout: float) -> list:
+    """Each worker's outcome; stops early if a worker exits without reporting."""
+    outcomes, deadline = [], time.monotonic() + timeout
+    while len(outcomes) < len(processes):
+        try:
+            outcomes.append(results.get(timeout=1))
+        except queue.Empty:
+            failed = [process.exitcode for process in processes if process.exitcode not in (None, 0)]
+            if failed or time.monotonic() > deadline:
+                for process in processes:
+                    process.terminate()
+                raise SystemExit(f"❌ workers did not finish (exit codes {[p.exitcode for p in processes]})")
+    return outcomes
+
+
+def run(workers: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp, StubOpenLibrary() as stub:
+        file_path = os.path.join(tmp, "library.json")
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(i, file_path, args.storage, stub.url, args.ops, args.writes, results))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = collect(processes, results, timeout=600)
+        for process in processes:
+            process.join()
+        if any(process.exitcode != 0 for process in processes):
+            raise SystemExit(f"❌ workers failed (exit codes {[p.exitcode for p in processes]})")
+
+        expected = {isbn for added, _ in outcomes for isbn in added}
+        with redirect_stdout(StringIO()):
+            reloaded = Library(file_path=file_path, storage=args.storage, shared=True)
+        consistent = {book.isbn for book in reloaded.books} == expected
+    wall = max(elapsed for _, elapsed in outcomes)
+    return {"storage": args.storage, "workers": workers, "ops": workers * args.ops,
+            "ops_per_s": workers * args.ops / wall, "books": len(expected), "consistent": consistent}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=parse_sizes, default=parse_sizes("1,2,4,8"))
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--writes", type=float, default=0.2, help="fraction of operations that write")
+    parser.add_argument("--storage", choices=["json", "journal"], default="journal")
+    args = parser.parse_args()
+
+    report("shared library throughput", [run(workers, args) for workers in args.workers])
+
+
+if __name__ == "__main__":
+    main()
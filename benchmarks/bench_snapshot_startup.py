@@ -0,0 +1,99 @@
+"""Library startup time: binary snapshot through mmap vs parsing library.json.
+
+Usage: python benchmarks/bench_snapshot_startup.py [--books 1e4,1e5,1e6,1e7] [--skip-json-above 1e6]
+
+Every measurement runs in a fresh interpreter, so ``startup_s`` is the
+cold cost of getting a library ready and ``peak_rss_MiB`` only reflects
+that process. ``json.load`` is parsing library.json into dicts, without
+even building the catalogue; ``json`` is ``Library(storage="json")``,
+which is what the API does at import time today; ``snapshot`` is
+``Library(storage="snapshot")`` on the same books. ``lookup_ms`` is the
+first ``get_book`` after startup and ``page_ms`` the first
+``get_books_page`` of 100 books. Parsing JSON needs several times the file
+size in RAM, so the JSON modes are skipped above ``--skip-json-above``.
+Both library modes include importing ``library`` and its dependencies.
+Linux only (peak RSS comes from /proc).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import make_books, make_isbn, parse_sizes, report
+
+from book_stream import write_books
+from snapshot import write_snapshot
+
+# Peak RSS is read from VmHWM: ru_maxrss would include the forking benchmark process.
+STARTUP = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+def peak_rss_kb():
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+start = time.perf_counter()
+if {mode!r} == "json.load":
+    with open({path!r}, 'r', encoding='utf-8') as file:
+        json.load(file)
+    print(time.perf_counter() - start, 0, 0, peak_rss_kb())
+    sys.exit()
+from library import Library
+library = Library(file_path={path!r}, storage={mode!r})
+startup = time.perf_counter() - start
+start = time.perf_counter()
+assert library.get_book({isbn!r}) is not None
+lookup = time.perf_counter() - start
+start = time.perf_counter()
+library.get_books_page(limit=100)
+page = time.perf_counter() - start
+print(startup, lookup, page, peak_rss_kb())
+"""
+
+
+def generate(n: int):
+    for start in range(0, n, 10_000):
+        yield from make_books(min(10_000, n - start), start=start)
+
+
+def measure(path: str, mode: str, isbn: str) -> dict:
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP.format(root=root, path=path, mode=mode, isbn=isbn)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    startup, lookup, page, maxrss_kb = float(output[0]), float(output[1]), float(output[2]), int(output[3])
+    return {"startup_s": startup, "lookup_ms": lookup * 1000, "page_ms": page * 1000,
+            "peak_rss_MiB": maxrss_kb / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=parse_sizes, default=parse_sizes("1e4,1e5,1e6,1e7"))
+    parser.add_argument("--skip-json-above", type=float, default=1e6)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.books:
+            isbn = make_isbn(n * 2 // 3)
+            files = {"snapshot": os.path.join(tmp, f"library_{n}.snapshot")}
+            start = time.perf_counter()
+            write_snapshot(files["snapshot"], generate(n))
+            print(f"{n} books: snapshot written in {time.perf_counter() - start:.1f}s")
+            if n <= args.skip_json_above:
+                files["json"] = files["json.load"] = os.path.join(tmp, f"library_{n}.json")
+                with open(files["json"], 'w', encoding='utf-8') as file:
+                    write_books(file, generate(n))
+            for mode in ("json.load", "json", "snapshot"):
+                if mode in files:
+                    rows.append({"books": n, "mode": mode, "file_MB": os.path.getsize(files[mode]) / 1e6,
+                                 **measure(files[mode], mode, isbn)})
+            for path in set(files.values()):
+                os.unlink(path)
+    report("library startup: json vs mmap snapshot", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Startup time, startup memory and query latency: JSON vs SQLite storage.
+
+Usage: python benchmarks/bench_sqlite_catalog.py [--sizes 1e4,1e5,1e6]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from _common import make_isbn, parse_sizes, report, write_library_file
+
+from library import Library
+from sqlite_catalog import migrate_json
+
+
+def open_library(path: str, storage: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    library = Library([], path, storage=storage)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return library, elapsed, peak
+
+
+def median_ms(fn, repeat: int = 20) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes("1e4,1e5,1e6"))
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, patch('library.OpenLibraryClient'):
+        for n in args.sizes:
+            json_path = os.path.join(tmp, f"library_{n}.json")
+            db_path = os.path.join(tmp, f"library_{n}.db")
+            write_library_file(json_path, n)
+            start = time.perf_counter()
+            migrate_json(json_path, db_path)
+            print(f"migrated {n} books in {time.perf_counter() - start:.2f}s")
+
+            for storage, path in (("json", json_path), ("sqlite", db_path)):
+                library, startup_s, peak = open_library(path, storage)
+                isbn = make_isbn(n // 2)
+                rows.append({
+                    "storage": storage,
+                    "books": n,
+                    "startup_s": startup_s,
+                    "startup_MiB": peak / 2**20,
+                    "isbn_ms": median_ms(lambda: library.find_book(isbn, "isbn")),
+                    "title_ms": median_ms(lambda: library.find_book(f"yolculuk {n // 2}", "title")),
+                    "author_ms": median_ms(lambda: library.find_book("dickens", "author"), repeat=3),
+                })
+                del library
+    report("JSON vs SQLite storage", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 class Book:
+    __slots__ = ("title", "author", "isbn")
+
     def __init__(self, title:str, author:str, isbn:str):
         self.title = title
         self.author = author
         self.isbn = isbn
 
+    def to_dict(self) -> dict:
+        return {"title": self.title, "author": self.author, "isbn": self.isbn}
+
     def __str__(self):
-        return f"{self.title} by {self.author} (ISBN: {self.isbn})"
\ No newline at end of file
+        return f"{self.title} by {self.author} (ISBN: {self.isbn})"
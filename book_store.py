@@ -0,0 +1,242 @@
+from array import array
+from bisect import bisect_right
+from collections.abc import MutableSequence
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from book import Book
+from catalog import Catalog
+from search_index import FieldIndex, FuzzyMatch, RankedMatch, fold, tokenize
+
+
+class StringColumn:
+    """Append-only column of strings packed as UTF-8 into one buffer."""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return self._data[self._offsets[row]:self._offsets[row + 1]].decode('utf-8')
+
+    def append(self, value: str):
+        self._data += value.encode('utf-8')
+        self._offsets.append(len(self._data))
+
+
+class InternedColumn:
+    """Column of strings with few distinct values, stored as ids into a string table."""
+
+    def __init__(self):
+        self._values: list[str] = []
+        self._ids_by_value: dict[str, int] = {}
+        self._ids = array('I')
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, row: int) -> str:
+        return self._values[self._ids[row]]
+
+    def append(self, value: str):
+        value_id = self._ids_by_value.get(value)
+        if value_id is None:
+            value_id = self._ids_by_value[value] = len(self._values)
+            self._values.append(value)
+        self._ids.append(value_id)
+
+
+class BookStore(MutableSequence):
+    """Columnar, memory-compact alternative to ``catalog.Catalog``.
+
+    Titles and ISBNs are packed into UTF-8 buffers and authors are interned,
+    so no Book object exists per stored book; every read hands out a fresh
+    Book built from the columns. Removed rows are tombstoned and the columns
+    are compacted once half of them are dead. Title/author searches use
+    FieldIndex instances keyed by row number and compare against search
+    keys (``fold``) stored in columns of their own.
+    """
+
+    def __init__(self, books: Iterable[Book] = (), indexes: Iterable = ()):
+        self._indexes = list(indexes)
+        self._next_seq = 1
+        self._reset()
+        self.extend(books)
+
+    key = staticmethod(Catalog.key)
+
+    def _reset(self):
+        self._titles = StringColumn()
+        self._authors = InternedColumn()
+        self._isbns = StringColumn()
+        self._keys = {"title": StringColumn(), "author": InternedColumn()}
+        self._alive = bytearray()
+        self._seqs = array('Q')
+        self._rows: dict[str, int] = {}
+        self._fields = {"title": FieldIndex(), "author": FieldIndex()}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Book]:
+        for row, alive in enumerate(self._alive):
+            if alive:
+                yield self._book(row)
+
+    def __contains__(self, book) -> bool:
+        if not isinstance(book, Book):
+            return False
+        existing_book = self.get(book.isbn)
+        return existing_book is not None and existing_book.to_dict() == book.to_dict()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        size = len(self._rows)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("BookStore index out of range")
+        if size == len(self._alive):
+            return self._book(index)
+        for position, book in enumerate(self):
+            if position == index:
+                return book
+
+    def __setitem__(self, index, value):
+        books = list(self)
+        books[index] = value
+        self._rebuild(books)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            books = list(self)
+            del books[index]
+            self._rebuild(books)
+        else:
+            self.pop_isbn(self[index].isbn)
+
+    def __repr__(self) -> str:
+        return f"BookStore({len(self)} books)"
+
+    def insert(self, index: int, book: Book):
+        if index >= len(self):
+            self.append(book)
+            return
+        books = list(self)
+        books.insert(index, book)
+        self._rebuild(books)
+
+    def append(self, book: Book):
+        key = self.key(book.isbn)
+        if key in self._rows:
+            raise ValueError(f"ISBN must be unique. Already exists: {self._book(self._rows[key])}")
+        row = len(self._alive)
+        self._titles.append(book.title)
+        self._authors.append(book.author)
+        self._isbns.append(book.isbn)
+        self._alive.append(1)
+        self._seqs.append(self._next_seq)
+        self._next_seq += 1
+        self._rows[key] = row
+        for field, keys in self._keys.items():
+            search_key = fold(getattr(book, field))
+            keys.append(search_key)
+            self._fields[field].add(row, search_key)
+        for index in self._indexes:
+            index.add(book)
+
+    def remove(self, book: Book):
+        if book not in self:
+            raise ValueError(f"{book} is not in the catalog")
+        self.pop_isbn(book.isbn)
+
+    def clear(self):
+        self._reset()
+        for index in self._indexes:
+            index.clear()
+
+    def add_index(self, index):
+        self._indexes.append(index)
+
+    def get(self, isbn: str) -> Optional[Book]:
+        row = self._rows.get(self.key(isbn))
+        return None if row is None else self._book(row)
+
+    def has_isbn(self, isbn: str) -> bool:
+        return self.key(isbn) in self._rows
+
+    def pop_isbn(self, isbn: str) -> Optional[Book]:
+        row = self._rows.pop(self.key(isbn), None)
+        if row is None:
+            return None
+        book = self._book(row)
+        self._alive[row] = 0
+        for field, keys in self._keys.items():
+            self._fields[field].remove(row, keys[row])
+        for index in self._indexes:
+            index.remove(book)
+        if len(self._alive) > 2 * len(self._rows) + 1024:
+            self._compact()
+        return book
+
+    def page(self, after: Optional[int] = None, limit: int = 100) -> tuple[list[Book], Optional[int]]:
+        """Return up to ``limit`` books following cursor ``after`` and the cursor of the next page."""
+        start = 0 if after is None else bisect_right(self._seqs, after)
+        books, last_seq = [], after
+        for row in range(start, len(self._alive)):
+            if not self._alive[row]:
+                continue
+            if len(books) == limit:
+                return books, last_seq
+            books.append(self._book(row))
+            last_seq = self._seqs[row]
+        return books, None
+
+    def search(self, field: str, query: str, mode: str = "index",
+               limit: Optional[int] = None, offset: int = 0) -> list[Book]:
+        keys = self._keys["title" if field == "title" else "author"]
+        query_key = fold(query)
+        tokens = tokenize(query)
+
+        if mode == "index" and tokens:
+            rows = sorted(self._fields[field].match(tokens))
+        else:
+            rows = (row for row, alive in enumerate(self._alive) if alive)
+        matches = (row for row in rows if query_key in keys[row])
+        return [self._book(row) for row in islice(matches, offset, None if limit is None else offset + limit)]
+
+    def rank(self, field: str, query: str, limit: Optional[int] = None, offset: int = 0) -> list[RankedMatch]:
+        index = self._fields.get(field)
+        if index is None:
+            raise ValueError(f"Cannot search by {field}")
+        ranked = index.rank(query, None if limit is None else offset + limit)
+        return [RankedMatch(self._book(row), score) for row, score in ranked[offset:]]
+
+    def fuzzy_search(self, field: str, query: str, limit: int = 20) -> list[FuzzyMatch]:
+        index = self._fields.get(field)
+        if index is None:
+            raise ValueError(f"Cannot search by {field}")
+        return [FuzzyMatch(self._book(row), score, distance) for row, score, distance in index.fuzzy(query, limit)]
+
+    def _book(self, row: int) -> Book:
+        return Book(self._titles[row], self._authors[row], self._isbns[row])
+
+    def _compact(self):
+        # Row numbers change but the books and their sequence numbers do
+        # not, so external indexes are left alone while the columns are
+        # rewritten.
+        books = list(self)
+        seqs = array('Q', (seq for seq, alive in zip(self._seqs, self._alive) if alive))
+        indexes, self._indexes = self._indexes, []
+        next_seq = self._next_seq
+        self._reset()
+        self.extend(books)
+        self._seqs, self._next_seq = seqs, next_seq
+        self._indexes = indexes
+
+    def _rebuild(self, books: list[Book]):
+        self.clear()
+        self.extend(books)
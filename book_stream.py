@@ -0,0 +1,94 @@
+import json
+import os
+import re
+import tempfile
+from typing import IO, Iterable, Iterator
+from book import Book
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"\s*")
+_encode_string = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def iter_book_records(file: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """Yield the objects of a top-level JSON array one at a time.
+
+    Only the current chunk and the record being decoded are held in memory,
+    so peak usage does not depend on the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                return buffer[pos:pos + 1]
+            refill()
+
+    if peek() != "[":
+        raise ValueError("Expected a JSON array of books")
+    pos += 1
+    if peek() == "]":
+        return
+
+    while True:
+        while True:
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                refill()
+        yield record
+
+        separator = peek()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {separator or 'end of file'!r}")
+        pos += 1
+        peek()
+
+
+def iter_books(file: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Book]:
+    for record in iter_book_records(file, chunk_size):
+        yield Book(**record)
+
+
+def write_books(file: IO[str], books: Iterable[Book]):
+    """Stream books as the same indented JSON array ``json.dump(..., indent=4)`` produces."""
+    # Book has three string fields, so the record layout is fixed; encoding
+    # just the strings avoids building a JSON encoder per book.
+    encode = _encode_string
+    first = True
+    for book in books:
+        file.write("[\n    " if first else ",\n    ")
+        file.write(f'{{\n        "title": {encode(book.title)},\n        "author": {encode(book.author)},'
+                   f'\n        "isbn": {encode(book.isbn)}\n    }}')
+        first = False
+    file.write("[]" if first else "\n]")
+
+
+def write_books_atomically(file_path: str, books: Iterable[Book]):
+    """Write books as a JSON array without ever leaving a half-written file behind."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".library-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            write_books(file, books)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
@@ -0,0 +1,210 @@
+import codecs
+import csv
+import io
+import json
+from typing import IO, Iterable, Iterator, Optional
+from book import Book
+from book_stream import CHUNK_SIZE, _encode_string
+from isbn import normalize_isbns
+
+FORMATS = ("csv", "ndjson")
+FIELDS = ("title", "author", "isbn")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+# Rows are validated and added this many at a time.
+BATCH_SIZE = 10_000
+# Only the first few rejected records are described in the result.
+MAX_ERRORS = 10
+# Characters a record may reach before it is refused; an unbalanced CSV
+# quote would otherwise hold back the whole rest of the upload.
+MAX_RECORD_SIZE = 1 << 20
+
+
+def format_for(name: Optional[str]) -> Optional[str]:
+    """Transfer format for a media type or file name, or None if it is neither CSV nor NDJSON."""
+    if not name:
+        return None
+    name = name.split(";")[0].strip().lower()
+    for format, media_type in MEDIA_TYPES.items():
+        if name in (format, media_type):
+            return format
+    for extension, format in EXTENSIONS.items():
+        if name.endswith(extension):
+            return format
+    return None
+
+
+class BookImporter:
+    """Adds books to a library from CSV or NDJSON text fed in arbitrary chunks.
+
+    Only complete records are parsed; the unfinished tail of a chunk waits
+    for the next one, so the upload is never held in memory as a whole.
+    Every ``batch_size`` records are validated (fields present, ISBN valid,
+    stored as its ISBN-13) and handed to ``Library.import_books``, which
+    skips ISBNs the library or an earlier batch already has. The library is
+    persisted once, by ``close``. A record still unfinished after
+    ``max_record_size`` characters raises ValueError.
+    """
+
+    def __init__(self, library, format: str, batch_size: int = BATCH_SIZE,
+                 max_record_size: int = MAX_RECORD_SIZE):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format: {format}. Use one of: {', '.join(FORMATS)}")
+        self.library = library
+        self.format = format
+        self.batch_size = batch_size
+        self.max_record_size = max_record_size
+        self.counts = {"records": 0, "added": 0, "duplicates": 0, "invalid": 0}
+        self.errors: list[str] = []
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+        # Parity of the quotes in the buffer, so each chunk is counted once.
+        self._quotes = 0
+        self._columns: Optional[tuple[int, int, int]] = None
+        self._pending: list[tuple[int, object]] = []
+
+    def feed(self, data: bytes):
+        self._feed_text(self._decoder.decode(data))
+
+    def close(self) -> dict:
+        """Import whatever is left, persist the library and return the counts."""
+        self._feed_text(self._decoder.decode(b"", final=True))
+        if self._buffer.strip():
+            self._parse(self._buffer)
+        self._buffer = ""
+        self._flush()
+        self.library.persist()
+        return {**self.counts, "errors": self.errors}
+
+    def _feed_text(self, text: str):
+        end = text.rfind("\n") + 1
+        if self.format == "csv":
+            # A CSV line break inside a quoted field does not end the record;
+            # the quotes before a record boundary always pair up.
+            quotes = text.count('"', 0, end)
+            if end and (self._quotes + quotes) % 2 == 0:
+                self._quotes = text.count('"', end) % 2
+            else:
+                self._quotes = (self._quotes + quotes + text.count('"', end)) % 2
+                end = 0
+        if end:
+            complete, self._buffer = self._buffer + text[:end], text[end:]
+            self._parse(complete)
+        else:
+            self._buffer += text
+        if len(self._buffer) > self.max_record_size:
+            raise ValueError(f"A record is longer than {self.max_record_size} characters"
+                             + (" (is a quote left open?)" if self.format == "csv" else ""))
+
+    def _parse(self, text: str):
+        if self.format == "csv":
+            rows = csv.reader(io.StringIO(text, newline=""))
+            if self._columns is None:
+                header = next((row for row in rows if row), None)
+                if header is None:
+                    return
+                self._columns = self._header(header)
+            records = [tuple(row[i] if i < len(row) else None for i in self._columns) for row in rows if row]
+        else:
+            lines = [line for line in text.split("\n") if line.strip()]
+            try:
+                # One decode for the whole block; a bad line falls back to line by line.
+                records = json.loads(f"[{','.join(lines)}]")
+            except ValueError:
+                records = None
+            if records is None or len(records) != len(lines):
+                records = [self._decode_line(line) for line in lines]
+        number = self.counts["records"]
+        self.counts["records"] += len(records)
+        self._pending.extend(enumerate(records, number + 1))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    @staticmethod
+    def _header(row: list[str]) -> tuple[int, int, int]:
+        names = [name.strip().lower() for name in row]
+        missing = [field for field in FIELDS if field not in names]
+        if missing:
+            raise ValueError(f"CSV header must name the columns {', '.join(FIELDS)}; missing {', '.join(missing)}")
+        return tuple(names.index(field) for field in FIELDS)
+
+    @staticmethod
+    def _decode_line(line: str):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return ValueError(f"invalid JSON ({e})")
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        books, rows, rejected = [], [], []
+        for number, record in pending:
+            kind = type(record)
+            if kind is dict:
+                title, author, isbn = record.get("title"), record.get("author"), record.get("isbn")
+            elif kind is tuple:
+                title, author, isbn = record
+            else:
+                title = author = isbn = None
+            if type(title) is str and type(author) is str and type(isbn) is str:
+                rows.append((number, title, author, isbn))
+            else:
+                rejected.append((number, str(record) if kind is ValueError
+                                 else f"needs string fields {', '.join(FIELDS)}"))
+        for (number, title, author, isbn), canonical in zip(rows, normalize_isbns([row[3] for row in rows])):
+            if canonical is None:
+                rejected.append((number, f"Invalid ISBN: {isbn!r}"))
+            else:
+                books.append(Book(title, author, canonical))
+        for number, reason in sorted(rejected):
+            self._reject(number, reason)
+        added = self.library.import_books(books, self.batch_size, persist=False)
+        self.counts["added"] += added
+        self.counts["duplicates"] += len(books) - added
+
+    def _reject(self, number: int, reason: str):
+        self.counts["invalid"] += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"record {number}: {reason}")
+
+
+def import_books(library, file: IO[bytes], format: str, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Import a CSV or NDJSON file into ``library``, reading it ``chunk_size`` bytes at a time."""
+    importer = BookImporter(library, format)
+    while chunk := file.read(chunk_size):
+        importer.feed(chunk)
+    return importer.close()
+
+
+def iter_export(books: Iterable[Book], format: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield ``books`` as CSV (with a header) or NDJSON, in pieces of about ``chunk_size`` characters."""
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format: {format}. Use one of: {', '.join(FORMATS)}")
+    buffer = io.StringIO()
+    if format == "csv":
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(FIELDS)
+        write = lambda book: writer.writerow((book.title, book.author, book.isbn))
+    else:
+        # The same bytes as json.dumps(book.to_dict(), ensure_ascii=False).
+        encode = _encode_string
+        write = lambda book: buffer.write(f'{{"title": {encode(book.title)}, "author": {encode(book.author)}, '
+                                          f'"isbn": {encode(book.isbn)}}}\n')
+    for book in books:
+        write(book)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_books(file: IO[str], books: Iterable[Book], format: str) -> int:
+    """Write ``books`` to ``file`` as CSV or NDJSON; returns the number of characters written."""
+    written = 0
+    for piece in iter_export(books, format):
+        written += file.write(piece)
+    return written
@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+MISSING = object()
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.negative_hits + self.misses
+        return (self.hits + self.negative_hits) / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+class MemoryCache:
+    """Bounded in-process LRU cache with per-entry expiry.
+
+    Values must be JSON-compatible; ``None`` is a cached "not found" and
+    lives for ``negative_ttl`` seconds instead of ``ttl``.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600, negative_ttl: float = 300,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            if value is None:
+                self.stats.negative_hits += 1
+            else:
+                self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        pass
+
+
+class SqliteCache:
+    """On-disk LRU cache with the same behaviour as MemoryCache that survives restarts."""
+
+    def __init__(self, path: str, max_size: int = 100_000, ttl: float = 7 * 24 * 3600,
+                 negative_ttl: float = 3600, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+        self._size = self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Any:
+        now = self.clock()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return MISSING
+            value, expires_at = row
+            if expires_at <= now:
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._size -= 1
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return MISSING
+            self._connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            value = json.loads(value)
+            if value is None:
+                self.stats.negative_hits += 1
+            else:
+                self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        now = self.clock()
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            exists = self._connection.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+            )
+            if not exists:
+                self._size += 1
+            overflow = self._size - self.max_size
+            if overflow > 0:
+                self._connection.execute(
+                    "DELETE FROM cache WHERE key IN"
+                    " (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (overflow,)
+                )
+                self._size -= overflow
+                self.stats.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM cache")
+            self._size = 0
+
+    def close(self):
+        self._connection.close()
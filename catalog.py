@@ -0,0 +1,180 @@
+from array import array
+from bisect import bisect_right
+from collections.abc import MutableSequence
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from book import Book
+from isbn import isbn_key
+from search_index import FuzzyMatch, RankedMatch, SearchIndex
+
+
+class Catalog(MutableSequence):
+    """Insertion-ordered collection of books keyed by ISBN.
+
+    Behaves like the plain list ``Library.books`` used to be, but keeps an
+    ISBN -> Book dict as its backing store so membership, duplicate checks,
+    lookups and removals by ISBN are O(1). Title/author searches are served
+    from a SearchIndex; it and any extra ``indexes`` (objects with
+    ``add``/``remove``/``clear``) are kept in sync with every mutation.
+
+    Every added book also gets a sequence number that never changes, which
+    ``page`` uses as a cursor so paging stays stable while books come and go.
+
+    ``sqlite_catalog.SqliteCatalog`` implements the same interface on disk.
+    """
+
+    def __init__(self, books: Iterable[Book] = (), indexes: Iterable = ()):
+        self._by_isbn: dict[str, Book] = {}
+        # Append-only order log; entries whose book was removed are skipped
+        # by ``page`` and dropped once they outnumber the live ones.
+        self._order: list[Book] = []
+        self._seqs = array('Q')
+        self._next_seq = 1
+        self._stale = 0
+        self.search_index = SearchIndex()
+        self._indexes = [self.search_index, *indexes]
+        self.extend(books)
+
+    @staticmethod
+    def key(isbn: str) -> str:
+        # ISBN-10 and ISBN-13 spellings of a book share their ISBN-13 key.
+        return isbn_key(isbn)
+
+    def __len__(self) -> int:
+        return len(self._by_isbn)
+
+    def __iter__(self) -> Iterator[Book]:
+        return iter(self._by_isbn.values())
+
+    def __reversed__(self) -> Iterator[Book]:
+        return reversed(self._by_isbn.values())
+
+    def __contains__(self, book) -> bool:
+        if not isinstance(book, Book):
+            return False
+        return self._by_isbn.get(self.key(book.isbn)) is book
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._by_isbn.values())[index]
+        size = len(self._by_isbn)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("Catalog index out of range")
+        if index > size // 2:
+            return next(islice(reversed(self._by_isbn.values()), size - index - 1, None))
+        return next(islice(self._by_isbn.values(), index, None))
+
+    def __setitem__(self, index, value):
+        books = list(self._by_isbn.values())
+        books[index] = value
+        self._rebuild(books)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            books = list(self._by_isbn.values())
+            del books[index]
+            self._rebuild(books)
+        else:
+            self._discard(self[index])
+
+    def __repr__(self) -> str:
+        return f"Catalog({list(self._by_isbn.values())!r})"
+
+    def insert(self, index: int, book: Book):
+        if index >= len(self._by_isbn):
+            self.append(book)
+            return
+        books = list(self._by_isbn.values())
+        books.insert(index, book)
+        self._rebuild(books)
+
+    def append(self, book: Book):
+        key = self.key(book.isbn)
+        existing_book = self._by_isbn.get(key)
+        if existing_book is not None:
+            raise ValueError(f"ISBN must be unique. Already exists: {existing_book}")
+        self._by_isbn[key] = book
+        self._order.append(book)
+        self._seqs.append(self._next_seq)
+        self._next_seq += 1
+        for index in self._indexes:
+            index.add(book)
+
+    def remove(self, book: Book):
+        if book not in self:
+            raise ValueError(f"{book} is not in the catalog")
+        self._discard(book)
+
+    def clear(self):
+        self._by_isbn.clear()
+        self._order.clear()
+        self._seqs = array('Q')
+        self._stale = 0
+        for index in self._indexes:
+            index.clear()
+
+    def add_index(self, index):
+        self._indexes.append(index)
+
+    def get(self, isbn: str) -> Optional[Book]:
+        return self._by_isbn.get(self.key(isbn))
+
+    def has_isbn(self, isbn: str) -> bool:
+        return self.key(isbn) in self._by_isbn
+
+    def pop_isbn(self, isbn: str) -> Optional[Book]:
+        book = self._by_isbn.get(self.key(isbn))
+        if book is not None:
+            self._discard(book)
+        return book
+
+    def page(self, after: Optional[int] = None, limit: int = 100) -> tuple[list[Book], Optional[int]]:
+        """Return up to ``limit`` books following cursor ``after`` and the cursor of the next page."""
+        start = 0 if after is None else bisect_right(self._seqs, after)
+        books, last_seq = [], after
+        for position in range(start, len(self._order)):
+            book = self._order[position]
+            if self._by_isbn.get(self.key(book.isbn)) is not book:
+                continue
+            if len(books) == limit:
+                return books, last_seq
+            books.append(book)
+            last_seq = self._seqs[position]
+        return books, None
+
+    def search(self, field: str, query: str, mode: str = "index",
+               limit: Optional[int] = None, offset: int = 0) -> list[Book]:
+        if mode == "index":
+            matching_books = self.search_index.search(field, query, limit, offset)
+            if matching_books is not None:
+                return matching_books
+
+        return self.search_index.scan(field, query, limit, offset)
+
+    def rank(self, field: str, query: str, limit: Optional[int] = None, offset: int = 0) -> list[RankedMatch]:
+        return self.search_index.rank(field, query, limit, offset)
+
+    def fuzzy_search(self, field: str, query: str, limit: int = 20) -> list[FuzzyMatch]:
+        return self.search_index.fuzzy_search(field, query, limit)
+
+    def _discard(self, book: Book):
+        del self._by_isbn[self.key(book.isbn)]
+        for index in self._indexes:
+            index.remove(book)
+        self._stale += 1
+        if self._stale > len(self._by_isbn) + 1024:
+            self._compact_order()
+
+    def _compact_order(self):
+        live = [(book, seq) for book, seq in zip(self._order, self._seqs)
+                if self._by_isbn.get(self.key(book.isbn)) is book]
+        self._order = [book for book, _ in live]
+        self._seqs = array('Q', (seq for _, seq in live))
+        self._stale = 0
+
+    def _rebuild(self, books: Iterable[Book]):
+        books = list(books)
+        self.clear()
+        self.extend(books)
@@ -0,0 +1,134 @@
+import gzip
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Callable, Iterable, Iterator, Optional
+from book import Book
+from isbn import normalize_isbns
+
+# Raw bytes handed to a worker at a time; big enough that pickling the chunk
+# and the results costs little next to parsing it.
+CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def open_dump(path: str) -> IO[bytes]:
+    """Open a dump file, gzip-compressed (``.gz``) or plain."""
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def iter_chunks(file: IO[bytes], chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """Split a dump into chunks of whole lines."""
+    while True:
+        chunk = file.read(chunk_bytes)
+        if not chunk:
+            return
+        if not chunk.endswith(b"\n"):
+            chunk += file.readline()
+        yield chunk
+
+
+def _record(line: bytes) -> Optional[dict]:
+    # Official dumps are TSV (type, key, revision, last_modified, JSON);
+    # plain JSON lines are accepted too.
+    line = line.strip()
+    if not line:
+        return None
+    if not line.startswith(b"{"):
+        line = line.rsplit(b"\t", 1)[-1]
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def parse_authors(chunk: bytes) -> list[tuple[str, str]]:
+    """(key, name) for every author record in ``chunk``."""
+    authors = []
+    for line in chunk.split(b"\n"):
+        if b'"name"' not in line:
+            continue
+        record = _record(line)
+        if record and record.get("key") and record.get("name"):
+            authors.append((record["key"], record["name"]))
+    return authors
+
+
+def parse_editions(chunk: bytes) -> list[tuple[str, str, list[str], str]]:
+    """(title, ISBN-13, author keys, by_statement) for every edition with a valid ISBN."""
+    editions, isbns = [], []
+    for line in chunk.split(b"\n"):
+        if b'"isbn_' not in line:
+            continue
+        record = _record(line)
+        if not record:
+            continue
+        candidates = record.get("isbn_13") or record.get("isbn_10")
+        if not candidates or not isinstance(candidates[0], str):
+            continue
+        title = record.get("title") or "Unknown Title"
+        if record.get("subtitle"):
+            title = f"{title}: {record['subtitle']}"
+        keys = [author["key"] for author in record.get("authors", ()) if isinstance(author, dict) and "key" in author]
+        editions.append((title, keys, record.get("by_statement", "")))
+        isbns.append(candidates[0])
+    return [(title, isbn, keys, by_statement)
+            for (title, keys, by_statement), isbn in zip(editions, normalize_isbns(isbns)) if isbn]
+
+
+def parallel_map(fn: Callable, chunks: Iterable[bytes], workers: int) -> Iterator:
+    """``fn`` over ``chunks`` in a process pool, in order, with bounded read-ahead.
+
+    ``Executor.map`` would read the whole dump up front; here at most two
+    chunks per worker are waiting at a time.
+    """
+    if workers <= 1:
+        yield from map(fn, chunks)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def load_authors(path: str, workers: int, chunk_bytes: int = CHUNK_BYTES) -> dict[str, str]:
+    authors = {}
+    with open_dump(path) as file:
+        for parsed in parallel_map(parse_authors, iter_chunks(file, chunk_bytes), workers):
+            authors.update(parsed)
+    return authors
+
+
+def iter_dump_books(editions_path: str, authors: dict[str, str], workers: int,
+                    chunk_bytes: int = CHUNK_BYTES) -> Iterator[Book]:
+    with open_dump(editions_path) as file:
+        for parsed in parallel_map(parse_editions, iter_chunks(file, chunk_bytes), workers):
+            for title, isbn, keys, by_statement in parsed:
+                names = [authors[key] for key in keys if key in authors]
+                author = names[0] if names else by_statement or "Unknown Author"
+                yield Book(title, author, isbn)
+
+
+def import_dump(library, editions_path: str, authors_path: Optional[str] = None,
+                workers: Optional[int] = None, chunk_bytes: int = CHUNK_BYTES) -> dict[str, int]:
+    """Load an Open Library editions dump into ``library`` without any API calls.
+
+    Author keys are resolved with the authors dump when one is given;
+    editions already in the library (or repeated in the dump) are skipped.
+    """
+    workers = workers or os.cpu_count() or 1
+    authors = load_authors(authors_path, workers, chunk_bytes) if authors_path else {}
+    counts = {"editions": 0, "added": 0, "authors": len(authors)}
+
+    def counted(books):
+        for book in books:
+            counts["editions"] += 1
+            yield book
+
+    counts["added"] = library.import_books(counted(iter_dump_books(editions_path, authors, workers, chunk_bytes)))
+    counts["skipped"] = counts["editions"] - counts["added"]
+    return counts
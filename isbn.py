@@ -0,0 +1,87 @@
+from typing import Iterable, Optional
+
+# Hyphens (ASCII and Unicode), spaces and tabs people put inside ISBNs.
+SEPARATORS = {ord(char): None for char in "- \t\u00a0\u2010\u2011\u2012\u2013\u2014\u2212"}
+# Weighted sum of each two-digit pair of an ISBN-13 (weights 1 and 3), so the
+# checksum is six dict lookups instead of twelve int() calls.
+_PAIR_SUMS = {f"{a}{b}": a + 3 * b for a in range(10) for b in range(10)}
+_DIGITS = frozenset("0123456789")
+
+
+class InvalidISBN(ValueError):
+    pass
+
+
+def _isbn13_check_digit(first12: str) -> str:
+    pairs = _PAIR_SUMS
+    total = (pairs[first12[0:2]] + pairs[first12[2:4]] + pairs[first12[4:6]]
+             + pairs[first12[6:8]] + pairs[first12[8:10]] + pairs[first12[10:12]])
+    return str(-total % 10)
+
+
+def _canonical(isbn: str) -> Optional[str]:
+    # ``isbn`` has already had its separators removed.
+    if len(isbn) == 13:
+        if _DIGITS.issuperset(isbn) and isbn[:3] in ("978", "979") and _isbn13_check_digit(isbn) == isbn[12]:
+            return isbn
+        return None
+    if len(isbn) == 10 and _DIGITS.issuperset(isbn[:9]):
+        last = isbn[9]
+        check = 10 if last in "xX" else int(last) if last in _DIGITS else -1
+        if check < 0 or (sum((10 - i) * int(digit) for i, digit in enumerate(isbn[:9])) + check) % 11:
+            return None
+        return with_check_digit("978" + isbn[:9])
+    return None
+
+
+def with_check_digit(first12: str) -> str:
+    """Complete the first twelve digits of an ISBN-13 with its check digit."""
+    return first12 + _isbn13_check_digit(first12)
+
+
+def to_isbn13(value: str) -> Optional[str]:
+    """Canonical ISBN-13 for an ISBN-10 or ISBN-13 in any common spelling, or None if invalid."""
+    return _canonical(value.translate(SEPARATORS))
+
+
+def normalize_isbn(value: str) -> str:
+    """Like ``to_isbn13`` but raises InvalidISBN instead of returning None."""
+    isbn = to_isbn13(value)
+    if isbn is None:
+        raise InvalidISBN(f"Invalid ISBN: {value!r}")
+    return isbn
+
+
+def isbn_key(value: str) -> str:
+    """Lookup key for ``value``: its ISBN-13 if valid, otherwise the cleaned, lowercased text.
+
+    Strings that are not ISBNs (old records, partial searches) still get a
+    stable key, so lookups never fail on them; they just match nothing else.
+    """
+    cleaned = value.translate(SEPARATORS)
+    return _canonical(cleaned) or cleaned.lower()
+
+
+def normalize_isbns(values: Iterable[str]) -> list[Optional[str]]:
+    """``to_isbn13`` for a whole batch, as used by bulk imports.
+
+    Separators are stripped from the joined batch in one ``translate`` and
+    the common case (an already clean ISBN-13) is checked inline without a
+    function call per item.
+    """
+    values = list(values)
+    joined = "\0".join(values)
+    if joined.count("\0") != len(values) - 1:
+        return [to_isbn13(value) for value in values]
+    cleaned = joined.translate(SEPARATORS).split("\0") if values else []
+    pairs, digits, canonical = _PAIR_SUMS, _DIGITS, _canonical
+    result = []
+    append = result.append
+    for isbn in cleaned:
+        if (len(isbn) == 13 and digits.issuperset(isbn) and isbn[:3] in ("978", "979")
+                and str(-(pairs[isbn[0:2]] + pairs[isbn[2:4]] + pairs[isbn[4:6]] + pairs[isbn[6:8]]
+                          + pairs[isbn[8:10]] + pairs[isbn[10:12]]) % 10) == isbn[12]):
+            append(isbn)
+        else:
+            append(canonical(isbn))
+    return result
@@ -0,0 +1,207 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Iterable, Iterator, Optional
+from book import Book
+from catalog import Catalog
+
+MAGIC = b"LIBMIRR1"
+# Magic, record count, offset of the index.
+HEADER = struct.Struct("<8sQQ")
+# Key, title and author lengths in front of each record's UTF-8 bytes.
+RECORD = struct.Struct("<BII")
+OFFSET = struct.Struct("<Q")
+
+
+def write_mirror(path: str, books: Iterable[Book]) -> int:
+    """Write ``books`` as a mirror file at ``path`` and return how many were stored.
+
+    Records are written as they come; only (key, offset) pairs are held in
+    memory to sort the index at the end. The first book per ISBN wins.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".mirror-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, 0, 0))
+            entries, seen, offset = [], set(), HEADER.size
+            for book in books:
+                key = Catalog.key(book.isbn).encode()
+                if key in seen or len(key) > 255:
+                    continue
+                seen.add(key)
+                isbn, title, author = book.isbn.encode(), book.title.encode(), book.author.encode()
+                record = RECORD.pack(len(key), len(title), len(author)) + key + title + author + isbn
+                entries.append((key, offset))
+                file.write(OFFSET.pack(len(record)) + record)
+                offset += OFFSET.size + len(record)
+            entries.sort()
+            file.write(b"".join(OFFSET.pack(entry_offset) for _, entry_offset in entries))
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, len(entries), offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return len(entries)
+
+
+class IsbnMirror:
+    """Local ISBN → book metadata mirror that is read through mmap.
+
+    The mirror file holds length-prefixed records followed by an index of
+    record offsets sorted by ISBN key, so a lookup is a binary search over
+    the mapped file and nothing is loaded up front. Books added later
+    (write-backs of network lookups) go to an append-only ``<path>.log``
+    that is kept in memory and folded into the file by ``compact``, which
+    runs on its own once the log holds ``compact_every`` books and a
+    quarter of the file's size.
+    """
+
+    def __init__(self, path: str, compact_every: int = 10_000):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.compact_every = compact_every
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._offsets = ()
+        self._count = 0
+        self._open()
+        self._added: dict[str, Book] = {}
+        self._read_log()
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+
+    def __len__(self) -> int:
+        return self._count + len(self._added)
+
+    def __contains__(self, isbn: str) -> bool:
+        return self.get(isbn) is not None
+
+    def get(self, isbn: str) -> Optional[Book]:
+        key = Catalog.key(isbn)
+        with self._lock:
+            book = self._added.get(key)
+            if book is None:
+                book = self._lookup(key.encode())
+        if book is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return book
+
+    def add(self, book: Book):
+        """Record a book (e.g. one fetched from Open Library) unless it is already known."""
+        key = Catalog.key(book.isbn)
+        with self._lock:
+            if key in self._added or self._lookup(key.encode()) is not None:
+                return
+            self._added[key] = book
+            self._log.write(json.dumps(book.to_dict(), ensure_ascii=False) + "\n")
+            self._log.flush()
+            compact = len(self._added) >= max(self.compact_every, self._count // 4)
+        if compact:
+            self.compact()
+
+    def compact(self):
+        """Fold the log into the mirror file."""
+        with self._lock:
+            if not self._added:
+                return
+            write_mirror(self.path, self._merged())
+            self._close_map()
+            self._open()
+            self._added.clear()
+            self._log.truncate(0)
+
+    def close(self):
+        with self._lock:
+            self._close_map()
+            self._log.close()
+
+    def __iter__(self) -> Iterator[Book]:
+        with self._lock:
+            return iter(list(self._merged()))
+
+    def _merged(self) -> Iterator[Book]:
+        added = sorted(self._added.items())
+        position = 0
+        for index in range(self._count):
+            book = self._record(self._offsets[index])
+            key = Catalog.key(book.isbn)
+            while position < len(added) and added[position][0] < key:
+                yield added[position][1]
+                position += 1
+            yield book
+        for _, book in added[position:]:
+            yield book
+
+    def _open(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= HEADER.size:
+            self._count = 0
+            return
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._close_map()
+            raise ValueError(f"{self.path} is not an ISBN mirror file")
+        # Zero-copy view of the sorted offsets; pages are read on demand.
+        # The cast is native-endian, which matches the little-endian file
+        # on every platform this runs on.
+        self._offsets = memoryview(self._map)[index_offset:index_offset + self._count * OFFSET.size].cast("Q")
+
+    def _close_map(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._offsets = ()
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = self._file = None
+        self._count = 0
+
+    def _read_log(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    book = Book(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # torn last line
+                self._added.setdefault(Catalog.key(book.isbn), book)
+
+    def _lookup(self, key: bytes) -> Optional[Book]:
+        data, offsets = self._map, self._offsets
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset = offsets[middle]
+            start = offset + OFFSET.size + RECORD.size
+            found = data[start:start + data[offset + OFFSET.size]]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return self._record(offset)
+        return None
+
+    def _record(self, offset: int) -> Book:
+        (size,) = OFFSET.unpack_from(self._map, offset)
+        key_length, title_length, author_length = RECORD.unpack_from(self._map, offset + OFFSET.size)
+        data = self._map[offset + OFFSET.size + RECORD.size:offset + OFFSET.size + size]
+        title_start = key_length
+        author_start = title_start + title_length
+        isbn_start = author_start + author_length
+        return Book(data[title_start:author_start].decode(), data[author_start:isbn_start].decode(),
+                    data[isbn_start:].decode())
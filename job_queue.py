@@ -0,0 +1,224 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+from book import Book
+from open_library import AsyncOpenLibraryClient, OpenLibraryUnavailable
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+# A job whose lookup found Open Library unavailable is retried after
+# RETRY_DELAY seconds, doubling each time, and fails after MAX_ATTEMPTS.
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    isbn TEXT NOT NULL,
+    status TEXT NOT NULL,
+    title TEXT,
+    author TEXT,
+    book_isbn TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (available_at) WHERE status = 'pending';
+"""
+
+
+class Job(NamedTuple):
+    id: int
+    isbn: str
+    status: str
+    book: Optional[Book] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+class JobQueue:
+    """Durable queue of ISBNs waiting to be looked up and added, kept in SQLite.
+
+    Finished jobs stay in the table so their outcome can be read back.
+    Jobs that were running when the process stopped are pending again the
+    next time the queue is opened.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._connection.execute("UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING))
+
+    def close(self):
+        self._connection.close()
+
+    def submit(self, isbn: str) -> Job:
+        now = self.clock()
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO jobs (isbn, status, available_at, updated_at) VALUES (?, ?, ?, ?)",
+                (isbn, PENDING, now, now)
+            )
+        return Job(cursor.lastrowid, isbn, PENDING)
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, isbn, status, title, author, book_isbn, error, attempts FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, isbn, status, title, author, book_isbn, error, attempts = row
+        book = Book(title, author, book_isbn) if book_isbn is not None else None
+        return Job(job_id, isbn, status, book, error, attempts)
+
+    def claim(self) -> Optional[Job]:
+        """Mark the oldest job that is due as running and return it, or None if there is none."""
+        now = self.clock()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, isbn, attempts FROM jobs WHERE status = ? AND available_at <= ? ORDER BY id LIMIT 1",
+                (PENDING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, isbn, attempts = row
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, attempts + 1, now, job_id)
+            )
+        return Job(job_id, isbn, RUNNING, attempts=attempts + 1)
+
+    def complete(self, job_id: int, book: Book):
+        self._finish(job_id, DONE, book=book)
+
+    def fail(self, job_id: int, error: str):
+        self._finish(job_id, FAILED, error=error)
+
+    def retry(self, job_id: int, error: str, delay: float):
+        """Put a running job back in the queue, due after ``delay`` seconds."""
+        self._finish(job_id, PENDING, error=error, delay=delay)
+
+    def counts(self) -> dict[str, int]:
+        """Number of jobs in each status."""
+        with self._lock:
+            rows = self._connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0, **dict(rows)}
+
+    def _finish(self, job_id: int, status: str, book: Optional[Book] = None, error: Optional[str] = None,
+                delay: float = 0.0):
+        now = self.clock()
+        title, author, isbn = (book.title, book.author, book.isbn) if book else (None, None, None)
+        with self._lock:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, title = ?, author = ?, book_isbn = ?, error = ?,"
+                " available_at = ?, updated_at = ? WHERE id = ?",
+                (status, title, author, isbn, error, now + delay, now, job_id)
+            )
+
+
+class EnrichmentWorkers:
+    """Worker pool that looks up queued ISBNs on Open Library and adds the books to a library.
+
+    ``workers`` coroutines run on an event loop in a background thread of
+    their own, with a client made by ``make_client`` on that loop, so jobs
+    progress independently of the requests that queued them. A book is
+    persisted before its job is marked done; workers that finish while a
+    ``persist`` is running share the next one.
+    """
+
+    def __init__(self, library, queue: JobQueue, make_client: Callable[[], AsyncOpenLibraryClient],
+                 workers: int = 4, poll_interval: float = 1.0):
+        self.library = library
+        self.queue = queue
+        self.make_client = make_client
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._persist_lock: Optional[asyncio.Lock] = None
+        self._started = threading.Event()
+        self._stopping = False
+        self._added = 0
+        self._persisted = 0
+
+    def start(self):
+        """Start the workers unless they are running; jobs left pending are picked up."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._started.clear()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._run(),), daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def notify(self):
+        """Wake idle workers after a job was submitted."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Let running jobs finish and stop the workers."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._persist_lock = asyncio.Lock()
+        self._started.set()
+        try:
+            async with self.make_client() as client:
+                await asyncio.gather(*(self._work(client) for _ in range(self.workers)))
+        finally:
+            self._loop = self._wake = None
+
+    async def _work(self, client: AsyncOpenLibraryClient):
+        while not self._stopping:
+            # Cleared before looking, so a job submitted in between still wakes us.
+            self._wake.clear()
+            job = self.queue.claim()
+            if job is not None:
+                await self._process(job, client)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, job: Job, client: AsyncOpenLibraryClient):
+        try:
+            await self.library.add_book_async(job.isbn, client)
+        except OpenLibraryUnavailable as e:
+            if job.attempts < MAX_ATTEMPTS:
+                self.queue.retry(job.id, str(e), RETRY_DELAY * 2 ** (job.attempts - 1))
+            else:
+                self.queue.fail(job.id, str(e))
+            return
+        except Exception as e:
+            self.queue.fail(job.id, str(e))
+            return
+        await self._persist()
+        self.queue.complete(job.id, self.library.get_book(job.isbn))
+
+    async def _persist(self):
+        self._added += 1
+        wanted = self._added
+        async with self._persist_lock:
+            if self._persisted >= wanted:
+                return
+            wanted = self._added
+            await asyncio.to_thread(self.library.persist)
+            self._persisted = wanted
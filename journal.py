@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+from book import Book
+from book_stream import write_books_atomically
+
+
+class Journal:
+    """Append-only change log next to a library.json snapshot.
+
+    Attached to a Catalog as an index, it records every add/remove/clear as
+    one JSON line in ``<snapshot>.journal``. ``compact`` rotates the journal
+    and writes a fresh snapshot in a background thread; ``replay`` applies
+    journalled changes (including a rotated journal left behind by a crash
+    mid-compaction) on top of the loaded snapshot.
+
+    The journal also remembers how far into the file it has read or
+    written, so processes sharing it can ``tail`` each other's changes
+    instead of reloading the snapshot.
+    """
+
+    def __init__(self, snapshot_path: str, compact_every: int = 10_000, fsync: bool = False):
+        self.snapshot_path = snapshot_path
+        self.journal_path = f"{snapshot_path}.journal"
+        self.compacting_path = f"{snapshot_path}.journal.compacting"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.entries = 0
+        self.offset = 0
+        self.recording = True
+        self._lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._open()
+
+    def replay(self) -> Iterator[tuple[str, dict]]:
+        self.entries = self.offset = 0
+        for path in (self.compacting_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            offset = 0
+            with open(path, 'rb') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        record = None
+                    if record is None or not line.endswith(b"\n"):
+                        # A torn final line from a crash mid-append; cut it
+                        # off so the next append starts on a line of its own.
+                        if path == self.journal_path:
+                            os.truncate(path, offset)
+                        break
+                    offset += len(line)
+                    op = record.pop("op")
+                    if path == self.journal_path:
+                        self.entries += 1
+                        self.offset = offset
+                    yield op, record
+
+    def tail(self) -> Iterator[tuple[str, dict]]:
+        """Yield the entries other processes appended since this journal last read or wrote."""
+        with open(self.journal_path, 'rb') as file:
+            file.seek(self.offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                self.offset += len(line)
+                self.entries += 1
+                op = record.pop("op")
+                yield op, record
+
+    def rotated(self) -> bool:
+        """Whether the journal file was replaced (by a compaction) since this journal opened it."""
+        try:
+            return os.stat(self.journal_path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def changed(self) -> bool:
+        try:
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return True
+        return stat.st_ino != self._inode or stat.st_size != self.offset
+
+    def reopen(self):
+        with self._lock:
+            self._file.close()
+            self._open()
+
+    @contextmanager
+    def paused(self):
+        """Apply changes to the catalog without journalling them again."""
+        self.recording = False
+        try:
+            yield
+        finally:
+            self.recording = True
+
+    def add(self, book: Book):
+        if self.recording:
+            self._append({"op": "add", **book.to_dict()})
+
+    def remove(self, book: Book):
+        if self.recording:
+            self._append({"op": "remove", "isbn": book.isbn})
+
+    def clear(self):
+        if self.recording:
+            self._append({"op": "clear"})
+
+    def needs_compaction(self) -> bool:
+        return self.entries >= self.compact_every and not self.compacting
+
+    @property
+    def compacting(self) -> bool:
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def compact(self, books: Iterable[Book], background: bool = True):
+        """Snapshot ``books`` and drop the journal entries the snapshot now covers."""
+        if self.compacting:
+            self._compaction.join()
+        with self._lock:
+            books = list(books)
+            self._file.close()
+            if os.path.exists(self.compacting_path):
+                # Left over from an interrupted compaction; its entries are
+                # already reflected in ``books``.
+                os.unlink(self.compacting_path)
+            os.replace(self.journal_path, self.compacting_path)
+            self._open()
+
+        if background:
+            self._compaction = threading.Thread(target=self._write_snapshot, args=(books,), daemon=True)
+            self._compaction.start()
+        else:
+            self._write_snapshot(books)
+
+    def close(self):
+        if self._compaction is not None:
+            self._compaction.join()
+        with self._lock:
+            self._file.close()
+
+    def _write_snapshot(self, books: list[Book]):
+        write_books_atomically(self.snapshot_path, books)
+        os.unlink(self.compacting_path)
+
+    def _open(self):
+        self._file = open(self.journal_path, 'ab')
+        stat = os.fstat(self._file.fileno())
+        self._inode = stat.st_ino
+        self.offset = stat.st_size
+        self.entries = 0
+
+    def _append(self, record: dict):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.offset = self._file.tell()
+            self.entries += 1
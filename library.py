@@ -1,71 +1,451 @@
-import json
-from typing import Literal
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Literal, Optional, Union
 from book import Book
-from open_library import OpenLibraryClient
+from book_store import BookStore
+from book_stream import iter_books, write_books_atomically
+from catalog import Catalog
+from isbn import normalize_isbn, to_isbn13
+from isbn_mirror import IsbnMirror
+from journal import Journal
+from locking import FileLock, RWLock
+from metrics import NOT_TIMED, Metrics, StageTimer, untraced
+from open_library import DEFAULT_RATE, AsyncOpenLibraryClient, OpenLibraryClient, OpenLibraryUnavailable
+from rate_limit import AdaptiveConcurrency, TokenBucket
+from search_index import FuzzyMatch, RankedMatch
+from snapshot import SnapshotCatalog
+from sqlite_catalog import SqliteCatalog
+
+STORAGE_MODES = ("json", "journal", "sqlite", "snapshot")
+# File each storage mode keeps its catalogue in unless given another path.
+DEFAULT_LIBRARY_PATHS = {"json": "library.json", "journal": "library.json", "sqlite": "library.db",
+                         "snapshot": "library.snapshot"}
 
 class Library():
-    def __init__(self, books:list[Book]=[], file_path:str="library.json"):
-        self.books = books
-        self.load_books(file_path)
-        self.open_library_client = OpenLibraryClient()
+    def __init__(self, books:list[Book]=[], file_path:str="library.json",
+                 storage:Literal["json", "journal", "sqlite", "snapshot"]="json", columnar:bool=False,
+                 shared:bool=False, mirror:Optional[IsbnMirror]=None, offline:bool=False,
+                 metrics:Optional[Metrics]=None, tracer:Optional[Callable[[str, float], None]]=None):
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage}")
+        self.file_path = file_path
+        self.storage = storage
+        self.columnar = columnar
+        self.journal = None
+        # With metrics, searches and saves are timed; a tracer is called as
+        # tracer(stage, seconds) for each stage of add_book. Without them
+        # nothing is measured.
+        self.metrics = metrics
+        self.tracer = tracer
+        # Reads and writes from different threads are serialized by a
+        # readers-writer lock. With shared=True several processes (e.g.
+        # uvicorn workers) may use the same files: each write takes an
+        # exclusive file lock, catches up with the other processes' changes
+        # and is persisted before the lock is released, and reads first pick
+        # up whatever changed on disk. SQLite coordinates processes itself.
+        self.shared = shared and storage != "sqlite"
+        self._lock = RWLock()
+        self._file_lock = FileLock(f"{file_path}.lock") if self.shared else None
+        self._snapshot_state = None
+        with self._lock.write(), self._locked_file(exclusive=False):
+            if storage == "sqlite":
+                self._books = SqliteCatalog(file_path)
+                self._books.extend(book for book in books if not self._books.has_isbn(book.isbn))
+            elif storage == "snapshot":
+                # The snapshot file is mapped, not parsed; books are decoded as they are read.
+                self._books = SnapshotCatalog(file_path)
+                self._books.extend(book for book in books if not self._books.has_isbn(book.isbn))
+                self._snapshot_state = self._stat_snapshot()
+            else:
+                self.books = books
+                self._snapshot_state = self._stat_snapshot()
+                self.load_books(file_path)
+            if storage == "journal":
+                self.journal = Journal(file_path)
+                self._replay_journal(self.journal.replay())
+                self._books.add_index(self.journal)
+        # The Open Library client is created on first use, so a library that
+        # is only read or imported into never opens an HTTP client.
+        self._client_options = {"mirror": mirror, "offline": offline, "metrics": metrics}
+        self._open_library_client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def open_library_client(self) -> OpenLibraryClient:
+        if self._open_library_client is None:
+            with self._client_lock:
+                if self._open_library_client is None:
+                    self._open_library_client = OpenLibraryClient(
+                        rate_limiter=TokenBucket(DEFAULT_RATE), concurrency=AdaptiveConcurrency(),
+                        **self._client_options)
+        return self._open_library_client
+
+    @open_library_client.setter
+    def open_library_client(self, client: OpenLibraryClient):
+        self._open_library_client = client
+
+    @property
+    def books(self) -> Union[Catalog, BookStore, SqliteCatalog, SnapshotCatalog]:
+        return self._books
+
+    @books.setter
+    def books(self, books:list[Book]):
+        with self._lock.write():
+            if self.storage in ("sqlite", "snapshot"):
+                self._books.clear()
+                self._books.extend(books)
+                return
+            indexes = []
+            if self.journal:
+                self.journal.clear()
+                indexes.append(self.journal)
+            catalog_class = BookStore if self.columnar else Catalog
+            self._books = catalog_class(books, indexes=indexes)
+
+    def get_book(self, isbn:str) -> Optional[Book]:
+        with self._reading():
+            return self._books.get(isbn)
 
     def add_book(self, isbn:str):
-        for existing_book in self.books:
-            if existing_book.isbn == isbn:
-                raise ValueError(f"ISBN must be unique. Already exists: {existing_book}")
-        
+        stage = self._stage_timer()
+        normalize_isbn(isbn)  # invalid ISBNs are rejected before any lookup
+        self._check_unique(isbn)
+        stage("validate")
         book = self.open_library_client.get_book_by_isbn(isbn)
+        stage("lookup")
+        self._add_fetched_book(isbn, book)
+        stage("insert")
+
+    async def add_book_async(self, isbn:str, client:AsyncOpenLibraryClient):
+        stage = self._stage_timer()
+        normalize_isbn(isbn)
+        # The locked sections may wait on other threads or, when shared, on
+        # other processes and a reload or rewrite of the file, so they run
+        # in a worker thread instead of holding up the event loop.
+        await asyncio.to_thread(self._check_unique, isbn)
+        stage("validate")
+        book = await client.get_book_by_isbn(isbn)
+        stage("lookup")
+        await asyncio.to_thread(self._add_fetched_book, isbn, book)
+        stage("insert")
+
+    def _stage_timer(self):
+        return untraced if self.tracer is None else StageTimer(self.tracer)
+
+    def add_books(self, isbns:Iterable[str]) -> dict[str, list]:
+        new_isbns, duplicates, invalid = self._split_new_isbns(isbns)
+        found = self.open_library_client.get_books_by_isbns(new_isbns) if new_isbns else {}
+        return self._add_fetched_books(new_isbns, found, duplicates, invalid)
+
+    async def add_books_async(self, isbns:Iterable[str], client:AsyncOpenLibraryClient) -> dict[str, list]:
+        new_isbns, duplicates, invalid = await asyncio.to_thread(self._split_new_isbns, list(isbns))
+        found = await client.get_books_by_isbns(new_isbns) if new_isbns else {}
+        return await asyncio.to_thread(self._add_fetched_books, new_isbns, found, duplicates, invalid)
+
+    def _split_new_isbns(self, isbns:Iterable[str]) -> tuple[list[str], list[str], list[str]]:
+        new_isbns, duplicates, invalid, seen = [], [], [], set()
+        with self._reading():
+            for isbn in isbns:
+                key = to_isbn13(isbn)
+                if key is None:
+                    invalid.append(isbn)
+                elif key in seen or self._books.has_isbn(isbn):
+                    duplicates.append(isbn)
+                else:
+                    seen.add(key)
+                    new_isbns.append(isbn)
+        return new_isbns, duplicates, invalid
+
+    def _add_fetched_books(self, isbns:list[str], found:dict[str, Optional[Book]], duplicates:list[str],
+                           invalid:list[str]) -> dict[str, list]:
+        result = {"added": [], "duplicates": duplicates, "not_found": [], "unavailable": [], "invalid": invalid}
+        with self._writing():
+            for isbn in isbns:
+                book = found.get(isbn)
+                if isbn not in found:
+                    result["unavailable"].append(isbn)
+                elif not book:
+                    result["not_found"].append(isbn)
+                elif self._books.has_isbn(book.isbn):
+                    result["duplicates"].append(isbn)
+                else:
+                    self._books.append(book)
+                    result["added"].append(book)
+        return result
+
+    def _check_unique(self, isbn:str):
+        existing_book = self.get_book(isbn)
+        if existing_book:
+            raise ValueError(f"ISBN must be unique. Already exists: {existing_book}")
+
+    def _add_fetched_book(self, isbn:str, book:Optional[Book]):
         if not book:
             raise ValueError(f"Book with ISBN {isbn} not found")
-        self.books.append(book)
+        # Another thread or process may have added it while it was fetched;
+        # the catalog rejects the duplicate.
+        with self._writing():
+            self._books.append(book)
     
     def search_books_online(self, query:str):
-        books = self.open_library_client.search_books(query)
+        try:
+            books = self.open_library_client.search_books(query)
+        except OpenLibraryUnavailable as e:
+            print(e)
+            return
         for book in books:
             print(book)
 
     def remove_book(self, isbn:str):
-        for ix,book in enumerate(self.books):
-            if book.isbn == isbn:
-                self.books.pop(ix)
-                print(f"Removed {book.title} from the library")
-                break
+        with self._writing():
+            book = self._books.pop_isbn(isbn)
+        if book:
+            print(f"Removed {book.title} from the library")
         else:
             print(f"Book with ISBN {isbn} not found")
         
     def list_books(self):
-        for book in self.books:
-            print(book)
-        
+        with self._reading():
+            for book in self._books:
+                print(book)
 
-    def find_book(self, query: str, search_by: Literal["title", "author", "isbn"] = "title"):
-        query_lower = query.lower()
-        matching_books = []
-        
-        for book in self.books:
-            if search_by == "title" and query_lower in book.title.lower():
-                matching_books.append(book)
-            elif search_by == "author" and query_lower in book.author.lower():
-                matching_books.append(book)
-            elif search_by == "isbn" and query_lower == book.isbn.lower():
-                matching_books.append(book)
+    def get_books_page(self, cursor:Optional[int]=None, limit:int=100) -> tuple[list[Book], Optional[int]]:
+        """Return a page of books in insertion order and the cursor for the next page (None on the last one)."""
+        if limit < 1:
+            raise ValueError("Page limit must be at least 1")
+        with self._reading():
+            return self._books.page(cursor, limit)
+
+    def __iter__(self) -> Iterator[Book]:
+        """Iterate over every book a page at a time, so writers are only held up for one page."""
+        cursor = None
+        while True:
+            books, cursor = self.get_books_page(cursor, 1000)
+            yield from books
+            if cursor is None:
+                return
         
-        return matching_books
+
+    def find_book(self, query: str, search_by: Literal["title", "author", "isbn"] = "title",
+                  mode: Literal["index", "substring", "ranked"] = "index",
+                  limit: Optional[int] = None, offset: int = 0):
+        """Books matching ``query``; ``limit``/``offset`` page through them.
+
+        ``index`` and ``substring`` matches come in insertion order;
+        ``ranked`` ones most relevant first (see ``ranked_search``).
+        """
+        if mode not in ("index", "substring", "ranked"):
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        if search_by == "isbn":
+            book = self.get_book(query)
+            return [book][offset:][:limit] if book else []
+        if search_by not in ("title", "author"):
+            return []
+
+        with self._timed("search_seconds", mode), self._reading():
+            if mode == "ranked":
+                return [match.book for match in self._books.rank(search_by, query, limit, offset)]
+            return self._books.search(search_by, query, mode, limit, offset)
+
+    def ranked_search(self, query: str, search_by: Literal["title", "author"] = "title",
+                      limit: Optional[int] = 20, offset: int = 0) -> list[RankedMatch]:
+        """Books holding every word of ``query`` (in any order) by BM25 relevance, best first.
+
+        Only the ``offset + limit`` best matches are ever put in order, so
+        a query matching half the catalogue costs about as much to page as
+        a rare one.
+        """
+        if search_by not in ("title", "author"):
+            raise ValueError(f"Cannot search by {search_by}")
+        with self._timed("search_seconds", "ranked"), self._reading():
+            return self._books.rank(search_by, query, limit, offset)
+
+    def fuzzy_search(self, query: str, search_by: Literal["title", "author"] = "title",
+                     limit: int = 20) -> list[FuzzyMatch]:
+        """Best ``limit`` books matching every word of ``query`` with a few typos allowed, best first."""
+        if search_by not in ("title", "author"):
+            raise ValueError(f"Cannot fuzzy search by {search_by}")
+        with self._timed("search_seconds", "fuzzy"), self._reading():
+            return self._books.fuzzy_search(search_by, query, limit)
     
-    def load_books(self, file_path: str):
+    def load_books(self, file_path: str, batch_size: int = 10_000):
+        with self._lock.write():
+            self._load_books(file_path, batch_size)
+
+    def _load_books(self, file_path: str, batch_size: int = 10_000):
         try:
-            with open(file_path, 'r') as file:
-                books_data = json.load(file)
-                for book_data in books_data:
-                    book = Book(**book_data)
-                    if any(existing_book.isbn == book.isbn for existing_book in self.books):
-                        continue
-                    self.books.append(book)
+            with open(file_path, 'r', encoding='utf-8') as file:
+                self._extend_new(iter_books(file), batch_size)
         except Exception as e:
             print(f"An error occurred: {e}")
+
+    def import_books(self, books: Iterable[Book], batch_size: int = 10_000, persist: bool = True) -> int:
+        """Add books from a local source (no lookups), skipping known ISBNs.
+
+        Returns how many were added. The whole import is one write, so a
+        shared library is persisted once at the end rather than per batch.
+        Callers importing in several calls pass ``persist=False`` and call
+        ``persist`` once they are done.
+        """
+        with self._writing():
+            added = self._extend_new(books, batch_size)
+        if persist:
+            self.persist()
+        return added
+
+    def _extend_new(self, books: Iterable[Book], batch_size: int) -> int:
+        added = 0
+        batch, batch_keys = [], set()
+        for book in books:
+            if self.storage != "sqlite":
+                key = Catalog.key(book.isbn)
+                if key in batch_keys or self._books.has_isbn(book.isbn):
+                    continue
+                batch_keys.add(key)
+            batch.append(book)
+            if len(batch) >= batch_size:
+                added += self._extend_batch(batch)
+                batch, batch_keys = [], set()
+        return added + self._extend_batch(batch)
+
+    def _extend_batch(self, batch: list[Book]) -> int:
+        if self.storage == "sqlite":
+            return self._books.extend(batch, skip_existing=True)
+        self._books.extend(batch)
+        return len(batch)
     
     def save_books(self, file_path: str = "library.json"):
-        books_data = [book.__dict__ for book in self.books]
-        with open(file_path, 'w') as file:
-            json.dump(books_data, file, ensure_ascii=False, indent=4)
+        if self.storage == "snapshot" and file_path == self.file_path:
+            # The catalogue switches over to the new file, so reads wait.
+            with self._lock.write(), self._timed_save(file_path):
+                self._books.save()
+            return
+        with self._lock.read(), self._timed_save(file_path):
+            if self.journal and file_path == self.file_path:
+                self.journal.compact(self._books, background=False)
+            else:
+                write_books_atomically(file_path, self._books)
+
+    def persist(self):
+        """Make in-memory changes durable in the library's own file.
+
+        In journal mode every mutation is already on disk, so this only
+        kicks off a background compaction once the journal has grown large;
+        in sqlite mode every mutation is already committed. json and
+        snapshot libraries rewrite their file. A shared library
+        persists each write before releasing the file lock, so there is
+        nothing left to do.
+        """
+        if self.shared:
+            return
+        if self.journal:
+            if self.journal.needs_compaction():
+                self.journal.compact(self.books)
+        elif self.storage in ("json", "snapshot"):
+            self.save_books(self.file_path)
+
+    def _timed(self, histogram:str, *labels):
+        if self.metrics is None:
+            return NOT_TIMED
+        return getattr(self.metrics, histogram).time(*labels)
+
+    @contextmanager
+    def _timed_save(self, file_path:str):
+        if self.metrics is None:
+            yield
+            return
+        with self.metrics.save_seconds.time(self.storage):
+            yield
+        self.metrics.save_bytes.observe(os.path.getsize(file_path), self.storage)
+
+    @contextmanager
+    def _reading(self):
+        if self.shared and self._changed_on_disk():
+            with self._lock.write(), self._file_lock.shared():
+                self._sync()
+        with self._lock.read():
+            yield
+
+    @contextmanager
+    def _writing(self):
+        with self._lock.write():
+            if not self.shared:
+                yield
+                return
+            with self._file_lock.exclusive():
+                self._sync()
+                yield
+                self._persist_shared()
+
+    @contextmanager
+    def _locked_file(self, exclusive:bool):
+        if not self.shared:
+            yield
+        elif exclusive:
+            with self._file_lock.exclusive():
+                yield
+        else:
+            with self._file_lock.shared():
+                yield
+
+    def _stat_snapshot(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _changed_on_disk(self) -> bool:
+        if self.journal:
+            return self.journal.changed()
+        return self._stat_snapshot() != self._snapshot_state
+
+    def _sync(self):
+        """Catch up with changes other processes made; call with the file lock held."""
+        if self.journal and not self.journal.rotated():
+            # Only the entries appended since we last looked need applying.
+            with self.journal.paused():
+                self._replay_journal(self.journal.tail())
+        elif self.journal or self._stat_snapshot() != self._snapshot_state:
+            self._reload()
+
+    def _reload(self):
+        self._snapshot_state = self._stat_snapshot()
+        if self.storage == "snapshot":
+            self._books.reopen()
+            return
+        if not self.journal:
+            self._books.clear()
+            self._load_books(self.file_path)
+            return
+        # Another process compacted the journal into a new snapshot.
+        with self.journal.paused():
+            self._books.clear()
+            self._load_books(self.file_path)
+            self.journal.reopen()
+            self._replay_journal(self.journal.replay())
+
+    def _persist_shared(self):
+        if self.journal:
+            if self.journal.needs_compaction():
+                self.journal.compact(self._books, background=False)
+        else:
+            with self._timed_save(self.file_path):
+                if self.storage == "snapshot":
+                    self._books.save()
+                else:
+                    write_books_atomically(self.file_path, self._books)
+            self._snapshot_state = self._stat_snapshot()
+
+    def _replay_journal(self, records:Iterable[tuple[str, dict]]):
+        for op, record in records:
+            if op == "add":
+                if not self._books.has_isbn(record["isbn"]):
+                    self._books.append(Book(**record))
+            elif op == "remove":
+                self._books.pop_isbn(record["isbn"])
+            elif op == "clear":
+                self._books.clear()
     
@@ -1,9 +1,11 @@
+from typing import Optional
 from library import Library
 from book import Book
+from open_library import OpenLibraryUnavailable
 
 class LibraryCLI:
-    def __init__(self):
-        self.library = Library()
+    def __init__(self, library: Optional[Library] = None):
+        self.library = library if library is not None else Library()
         
     def display_menu(self):
         print("\n=== LIBRARY MANAGEMENT SYSTEM ===")
@@ -34,7 +36,7 @@ class LibraryCLI:
         try:
             self.library.add_book(isbn)
             print(f"✅ Successfully added {isbn}")
-        except ValueError as e:
+        except (ValueError, OpenLibraryUnavailable) as e:
             print(f"❌ Error: {e}")
 
     def search_books_menu(self):
@@ -89,8 +91,15 @@ class LibraryCLI:
             print(f"\n📚 Found {len(results)} book(s):")
             for book in results:
                 print(f"  • {book}")
-        else:
-            print("❌ No books found!")
+            return
+
+        print("❌ No books found!")
+        if search_by != "isbn":
+            suggestions = self.library.fuzzy_search(query, search_by, limit=5)
+            if suggestions:
+                print("🔎 Did you mean:")
+                for match in suggestions:
+                    print(f"  • {match.book}")
 
     def load_books_menu(self):
         print("\n--- Load Books from File ---")
@@ -0,0 +1,105 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class RWLock:
+    """Readers-writer lock: any number of readers or a single writer.
+
+    Waiting writers hold off new readers, so a steady stream of reads cannot
+    starve them. The thread holding the write lock may take ``read`` and
+    ``write`` again; readers must not nest ``read`` or upgrade to ``write``.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        if self._writer == threading.get_ident():
+            yield
+            return
+        with self._condition:
+            while self._writer is not None or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                self._writers_waiting += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._writers_waiting -= 1
+                self._writer = me
+            self._writer_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+class FileLock:
+    """Advisory lock shared by every process that opens the same ``path``.
+
+    Uses flock on POSIX. Windows only offers exclusive locks, so ``shared``
+    is exclusive there. The lock is per process: callers serialize their own
+    threads (Library does so with its RWLock) before taking it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a+b')
+
+    @contextmanager
+    def shared(self):
+        with self._locked(exclusive=False):
+            yield
+
+    @contextmanager
+    def exclusive(self):
+        with self._locked(exclusive=True):
+            yield
+
+    def close(self):
+        self._file.close()
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        fd = self._file.fileno()
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
@@ -1,18 +1,133 @@
+import argparse
+import os
+import sys
+import time
+from book_transfer import FORMATS, export_books, format_for, import_books
+from library import DEFAULT_LIBRARY_PATHS, STORAGE_MODES, Library
 from library_cli import LibraryCLI
 
-def main():
-    cli = LibraryCLI()
-    
+def build_parser():
+    parser = argparse.ArgumentParser(prog="librarian", description="Library Management System")
+    parser.add_argument("--mirror", help="Local ISBN mirror checked before Open Library")
+    parser.add_argument("--offline", action="store_true", help="Never contact Open Library")
+    commands = parser.add_subparsers(dest="command")
+
+    import_dump = commands.add_parser("import-dump", help="Load an Open Library editions dump without API calls")
+    import_dump.add_argument("editions", help="Editions dump (ol_dump_editions_*.txt.gz)")
+    import_dump.add_argument("--authors", help="Authors dump used to resolve author keys to names")
+    import_dump.add_argument("--library", help="Library file (default: library.json, library.db for sqlite, "
+                                                "library.snapshot for snapshot)")
+    import_dump.add_argument("--storage", choices=STORAGE_MODES, default="json")
+    import_dump.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+
+    build_mirror = commands.add_parser("build-mirror", help="Build a local ISBN mirror from an editions dump")
+    build_mirror.add_argument("editions", help="Editions dump (ol_dump_editions_*.txt.gz)")
+    build_mirror.add_argument("--authors", help="Authors dump used to resolve author keys to names")
+    build_mirror.add_argument("--output", default="isbn_mirror.bin", help="Mirror file (default: isbn_mirror.bin)")
+    build_mirror.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+
+    import_file = commands.add_parser("import", help="Add books from a CSV or NDJSON file without API calls")
+    import_file.add_argument("file", help="CSV (title,author,isbn header) or NDJSON file; - reads stdin")
+    import_file.add_argument("--format", choices=FORMATS, help="File format (default: from the file extension)")
+    import_file.add_argument("--library", help="Library file (default: library.json, library.db for sqlite, "
+                                                "library.snapshot for snapshot)")
+    import_file.add_argument("--storage", choices=STORAGE_MODES, default="json")
+
+    export_file = commands.add_parser("export", help="Write every book to a CSV or NDJSON file")
+    export_file.add_argument("file", help="Output file; - writes to stdout")
+    export_file.add_argument("--format", choices=FORMATS, help="File format (default: from the file extension)")
+    export_file.add_argument("--library", help="Library file (default: library.json, library.db for sqlite, "
+                                                "library.snapshot for snapshot)")
+    export_file.add_argument("--storage", choices=STORAGE_MODES, default="json")
+    return parser
+
+def library_path(args):
+    return args.library or DEFAULT_LIBRARY_PATHS[args.storage]
+
+def transfer_format(args):
+    format = args.format or format_for(args.file)
+    if format is None:
+        raise SystemExit(f"❌ Cannot tell the format of {args.file}; pass --format csv or --format ndjson")
+    return format
+
+def import_command(args):
+    format = transfer_format(args)
+    library = Library(file_path=library_path(args), storage=args.storage)
+    start = time.perf_counter()
+    if args.file == "-":
+        counts = import_books(library, sys.stdin.buffer, format)
+    else:
+        with open(args.file, 'rb') as file:
+            counts = import_books(library, file, format)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Imported {counts['added']} of {counts['records']} records ({counts['duplicates']} already present, "
+          f"{counts['invalid']} invalid) in {elapsed:.1f}s")
+    for error in counts["errors"]:
+        print(f"⚠️  {error}")
+
+def export_command(args):
+    format = transfer_format(args)
+    library = Library(file_path=library_path(args), storage=args.storage)
+    if args.file == "-":
+        export_books(sys.stdout, library, format)
+        return
+    start = time.perf_counter()
+    with open(args.file, 'w', encoding='utf-8', newline='') as file:
+        export_books(file, library, format)
+    print(f"✅ Exported {len(library.books)} books to {args.file} in {time.perf_counter() - start:.1f}s")
+
+# Commands import what only they need (the dump parser brings in
+# multiprocessing), so starting the interactive CLI stays quick.
+def import_dump_command(args):
+    from dump_import import import_dump
+    library = Library(file_path=library_path(args), storage=args.storage)
+    start = time.perf_counter()
+    counts = import_dump(library, args.editions, args.authors, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Imported {counts['added']} of {counts['editions']} editions "
+          f"({counts['skipped']} already present, {counts['authors']} authors) in {elapsed:.1f}s")
+    print(f"💾 Library stored in {library.file_path}")
+
+def build_mirror_command(args):
+    from dump_import import iter_dump_books, load_authors
+    from isbn_mirror import write_mirror
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    authors = load_authors(args.authors, workers) if args.authors else {}
+    count = write_mirror(args.output, iter_dump_books(args.editions, authors, workers))
+    print(f"✅ Wrote {count} books to {args.output} in {time.perf_counter() - start:.1f}s")
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "import-dump":
+        import_dump_command(args)
+        return
+    if args.command == "build-mirror":
+        build_mirror_command(args)
+        return
+    if args.command == "import":
+        import_command(args)
+        return
+    if args.command == "export":
+        export_command(args)
+        return
+
+    library = None
+    if args.mirror or args.offline:
+        from isbn_mirror import IsbnMirror
+        library = Library(mirror=IsbnMirror(args.mirror) if args.mirror else None, offline=args.offline)
+    cli = LibraryCLI(library)
+
     print("🎉 Welcome to the Library Management System!")
-    
+
     while True:
         cli.display_menu()
         choice = input("Enter your choice (1-7): ").strip()
-        
+
         if not cli.handle_choice(choice):
             break
-            
+
         input("\nPress Enter for main menu...")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
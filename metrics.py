@@ -0,0 +1,211 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Iterator, Union
+from single_flight import CoalescingStats
+
+# Content type of the Prometheus text exposition format rendered below.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds in seconds, from a cached lookup to a slow Open Library round-trip.
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds in bytes, 1 KiB to 1 GiB by powers of 4.
+BYTE_BUCKETS = tuple(float(1024 * 4 ** i) for i in range(11))
+# Returned by instrumented code that has no metrics to report to.
+NOT_TIMED = nullcontext()
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative histogram of observed values per label combination."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # One count per bucket plus +Inf, then the sum of the values.
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def time(self, *labels) -> "Timer":
+        """Context manager observing how long its block took."""
+        return Timer(self, labels)
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series is not None else 0
+
+    def sum(self, *labels) -> float:
+        series = self._series.get(labels)
+        return series[-1] if series is not None else 0.0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((labels, list(counts)) for labels, counts in self._series.items())
+        names = self.labels + ("le",)
+        for labels, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(counts[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Collected:
+    """Values read from elsewhere each time the metrics are rendered.
+
+    ``collect`` returns a number, or a dict from label value tuples to
+    numbers. Counts that only grow are rendered as ``type="counter"``.
+    """
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Union[float, dict]],
+                 labels: tuple = (), type: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.labels = tuple(labels)
+        self.type = type
+
+    def samples(self) -> Iterator[str]:
+        values = self.collect()
+        if values is None:
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collect(self, name: str, help: str, collect: Callable[[], Union[float, dict]],
+                labels: tuple = (), type: str = "gauge") -> Collected:
+        return self.register(Collected(name, help, collect, labels, type))
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            try:
+                lines.extend(metric.samples())
+            except Exception as e:
+                # One failing source must not hide the other metrics.
+                lines.append(f"# {metric.name} unavailable: {_escape(str(e))}")
+        return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """The instruments the API, the library and the Open Library clients report to.
+
+    Anything that takes ``metrics=None`` skips measuring altogether when
+    given none, so code without metrics only pays for an ``is None`` check.
+    The API adds its own collected values (catalogue size, cache and job
+    counts) to ``registry``.
+    """
+
+    def __init__(self):
+        self.registry = Registry()
+        self.request_seconds = self.registry.histogram(
+            "librarian_http_request_duration_seconds", "API request latency by route and status code",
+            ("method", "route", "status"))
+        self.upstream_seconds = self.registry.histogram(
+            "librarian_openlibrary_request_duration_seconds", "Open Library round-trips by endpoint and outcome",
+            ("endpoint", "outcome"))
+        self.save_seconds = self.registry.histogram(
+            "librarian_save_duration_seconds", "Time to write the library file", ("storage",))
+        self.save_bytes = self.registry.histogram(
+            "librarian_save_bytes", "Size of the library file written", ("storage",), BYTE_BUCKETS)
+        self.search_seconds = self.registry.histogram(
+            "librarian_search_duration_seconds", "Catalogue searches by kind", ("kind",))
+        self.add_book_seconds = self.registry.histogram(
+            "librarian_add_book_stage_duration_seconds", "Time spent in each stage of adding a book", ("stage",))
+        # Shared by the single flights of every client given these metrics.
+        self.coalescing = CoalescingStats()
+        self.registry.collect(
+            "librarian_openlibrary_lookups_total", "Open Library lookups, and how many ran upstream",
+            lambda: {("requested",): self.coalescing.calls, ("executed",): self.coalescing.executions},
+            ("result",), type="counter")
+
+    def trace_add_book(self, stage: str, seconds: float):
+        """Tracer for ``Library(tracer=...)`` recording add_book stages."""
+        self.add_book_seconds.observe(seconds, stage)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class StageTimer:
+    """Times consecutive stages of one operation, passing each to ``tracer``.
+
+    Calling it with a stage name reports the time since the previous call
+    (or since it was created) as ``tracer(stage, seconds)``.
+    """
+
+    __slots__ = ("tracer", "last")
+
+    def __init__(self, tracer: Callable[[str, float], None]):
+        self.tracer = tracer
+        self.last = time.perf_counter()
+
+    def __call__(self, stage: str):
+        now = time.perf_counter()
+        self.tracer(stage, now - self.last)
+        self.last = now
+
+
+def untraced(stage: str):
+    """Stand-in for a StageTimer when no tracer is set."""
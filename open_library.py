@@ -1,80 +1,201 @@
-import httpx
-from typing import Optional, Dict, Any, List
+from __future__ import annotations
+import asyncio
+import time
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterable, List
 from book import Book
+from cache import MISSING
+from isbn import to_isbn13
+from isbn_mirror import IsbnMirror
+from metrics import Metrics
+from rate_limit import AdaptiveConcurrency, TokenBucket
+from retry import RETRY_STATUSES, RetryPolicy, parse_retry_after
+from single_flight import AsyncSingleFlight, SingleFlight
 
+if TYPE_CHECKING:
+    import httpx
 
-class OpenLibraryClient:
+
+def _httpx():
+    """The httpx module, imported on first use.
+
+    httpx (and httpcore under it) is left out of importing this module, which
+    keeps it off the startup path of the CLI and the API; every run-time use
+    of httpx below goes through here.
+    """
+    import httpx
+    return httpx
+
+# Requests per second Library and the API allow themselves against
+# openlibrary.org; a client is unlimited unless given a rate limiter.
+DEFAULT_RATE = 5.0
+
+
+class OpenLibraryUnavailable(Exception):
+    """Open Library could not be reached even after retrying.
+
+    Unlike a ``None`` result this says nothing about whether the book exists.
+    """
+
+
+class BaseOpenLibraryClient:
     BASE_URL = "https://openlibrary.org"
     SEARCH_URL = f"{BASE_URL}/search.json"
     BOOKS_URL = f"{BASE_URL}/api/books"
-    
-    def __init__(self, timeout: int = 10):
+    # Bibkeys per /api/books request; keeps the query string well under URL limits.
+    BATCH_SIZE = 100
+    # Enough connections for the API's concurrent lookups; idle ones are kept
+    # alive long enough to be reused across requests.
+    DEFAULT_LIMITS = {"max_connections": 100, "max_keepalive_connections": 20, "keepalive_expiry": 30}
+
+    def __init__(self, timeout: int = 10, base_url: str = BASE_URL, cache=None,
+                 retry: Optional[RetryPolicy] = None, limits: Optional[httpx.Limits] = None,
+                 http2: bool = False, rate_limiter: Optional[TokenBucket] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None, mirror: Optional[IsbnMirror] = None,
+                 offline: bool = False, metrics: Optional[Metrics] = None):
         self.timeout = timeout
-        self.client = httpx.Client(timeout=timeout)
-    
-    def close(self):
-        self.client.close()
-    
-    def __enter__(self):
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
-    
-    def search_books(self, query: str, limit: int = 10) -> List[Book]:
-        params = {
+        self.base_url = base_url.rstrip("/")
+        self.search_url = f"{self.base_url}/search.json"
+        self.books_url = f"{self.base_url}/api/books"
+        self.cache = cache
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        # ISBN lookups try the local mirror after the cache and write what
+        # they fetch back to it; offline=True never touches the network.
+        self.mirror = mirror
+        self.offline = offline
+        # With metrics, every round-trip's latency is recorded by endpoint and
+        # outcome (status code or "error").
+        self.metrics = metrics
+        # http2=True needs the optional h2 package (pip install "httpx[http2]").
+        self.client_options = {"timeout": timeout, "limits": limits or _httpx().Limits(**self.DEFAULT_LIMITS), "http2": http2}
+
+    def _retryable(self, response: httpx.Response, latency: float) -> bool:
+        if self.metrics is not None:
+            self._observe(response.request, str(response.status_code), latency)
+        overloaded = response.status_code in (429, 503)
+        if self.concurrency is not None:
+            self.concurrency.on_response(latency, overloaded)
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if overloaded and retry_after and self.rate_limiter is not None:
+            # Hold back every request from this client, not just the retry.
+            self.rate_limiter.pause(min(retry_after, self.retry.max_retry_after))
+        if response.status_code not in RETRY_STATUSES:
+            response.raise_for_status()
+            return False
+        return True
+
+    def _transport_failed(self, error: httpx.TransportError, latency: float) -> str:
+        if self.metrics is not None:
+            self._observe(error.request, "error", latency)
+        if self.concurrency is not None:
+            self.concurrency.on_response(latency, isinstance(error, _httpx().TimeoutException))
+        return str(error) or type(error).__name__
+
+    def _observe(self, request: httpx.Request, outcome: str, latency: float):
+        endpoint = "books" if request.url.path.endswith("/api/books") else "search"
+        self.metrics.upstream_seconds.observe(latency, endpoint, outcome)
+
+    def _retry_delay(self, retry: int, error: str, response: Optional[httpx.Response]) -> float:
+        delay = self.retry.backoff(retry)
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if delay is None or (retry_after or 0) > self.retry.max_retry_after:
+            raise OpenLibraryUnavailable(f"Open Library is unavailable: {error}")
+        return max(delay, retry_after or 0)
+
+    def _cached_book(self, isbn: str):
+        record = self.cache.get(f"isbn:{isbn}") if self.cache is not None else MISSING
+        if record is MISSING:
+            book = self.mirror.get(isbn) if self.mirror is not None else None
+            return MISSING if book is None else book
+        if record is None:
+            return record
+        return Book(**record)
+
+    def _cache_book(self, isbn: str, book: Optional[Book]):
+        if self.cache is not None:
+            self.cache.set(f"isbn:{isbn}", book.to_dict() if book else None)
+        if book is not None and self.mirror is not None:
+            self.mirror.add(book)
+
+    def _check_online(self):
+        if self.offline:
+            raise OpenLibraryUnavailable("Offline mode: Open Library is not contacted")
+
+    def _cached_books(self, isbns: Iterable[str]) -> tuple[Dict[str, Optional[Book]], List[str]]:
+        books, missing = {}, []
+        for isbn in dict.fromkeys(isbns):
+            cached = self._cached_book(isbn)
+            if cached is MISSING:
+                books[isbn] = None
+                missing.append(isbn)
+            else:
+                books[isbn] = cached
+        return books, missing
+
+    def _canonical_isbns(self, isbns: Iterable[str]) -> Dict[str, Optional[str]]:
+        # Lookups are keyed and sent as ISBN-13, so every spelling of an ISBN
+        # shares one cache entry and one request; invalid ones are never sent.
+        return {isbn: to_isbn13(isbn) for isbn in isbns}
+
+    def _by_requested(self, canonical: Dict[str, Optional[str]],
+                      books: Dict[str, Optional[Book]]) -> Dict[str, Optional[Book]]:
+        return {isbn: books.get(isbn13) for isbn, isbn13 in canonical.items() if isbn13 is None or isbn13 in books}
+
+    def _cached_search(self, query: str, limit: int):
+        if self.cache is None:
+            return MISSING
+        records = self.cache.get(f"search:{limit}:{query}")
+        if records is MISSING:
+            return records
+        return [Book(**record) for record in records]
+
+    def _cache_search(self, query: str, limit: int, books: List[Book]):
+        if self.cache is not None:
+            self.cache.set(f"search:{limit}:{query}", [book.to_dict() for book in books])
+
+    def _search_params(self, query: str, limit: int) -> Dict[str, Any]:
+        return {
             "q": query,
             "limit": limit,
             "fields": "title,author_name,isbn"
         }
-        
-        try:
-            response = self.client.get(self.SEARCH_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
 
-            books = []
-            docs = data.get("docs", [])
-            
-            for doc in docs:
-                book = self._parse_search_result(doc)
-                if book:
-                    books.append(book)
-            
-            return books
-            
-        except httpx.RequestError as e:
-            print(f"Error searching books: {e}")
-            return []
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            return []
-    
-    def get_book_by_isbn(self, isbn: str) -> Optional[Book]:
-        params = {
-            "bibkeys": f"ISBN:{isbn}",
+    def _isbn_params(self, isbn: str) -> Dict[str, Any]:
+        return self._isbns_params([isbn])
+
+    def _isbns_params(self, isbns: List[str]) -> Dict[str, Any]:
+        return {
+            "bibkeys": ",".join(f"ISBN:{isbn}" for isbn in isbns),
             "jscmd": "data",
             "format": "json"
         }
+
+    def _batches(self, isbns: Iterable[str]) -> List[List[str]]:
+        unique_isbns = list(dict.fromkeys(isbns))
+        return [unique_isbns[i:i + self.BATCH_SIZE] for i in range(0, len(unique_isbns), self.BATCH_SIZE)]
+
+    def _parse_search_response(self, data: Dict[str, Any]) -> List[Book]:
+        books = []
+        docs = data.get("docs", [])
         
-        try:
-            response = self.client.get(self.BOOKS_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            isbn_key = f"ISBN:{isbn}"
-            if isbn_key in data:
-                return self._parse_book_data(data[isbn_key], isbn)
-            
-            return None
-            
-        except httpx.RequestError as e:
-            print(f"Error fetching book by ISBN: {e}")
-            return None
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            return None
-    
+        for doc in docs:
+            book = self._parse_search_result(doc)
+            if book:
+                books.append(book)
+        
+        return books
+
+    def _parse_isbn_response(self, data: Dict[str, Any], isbn: str) -> Optional[Book]:
+        isbn_key = f"ISBN:{isbn}"
+        if isbn_key in data:
+            return self._parse_book_data(data[isbn_key], isbn)
+        
+        return None
+
+    def _parse_isbns_response(self, data: Dict[str, Any], isbns: List[str]) -> Dict[str, Optional[Book]]:
+        return {isbn: self._parse_isbn_response(data, isbn) for isbn in isbns}
+
     def _parse_search_result(self, doc: Dict[str, Any]) -> Optional[Book]:
         try:
             title = doc.get("title", "Unknown Title")
@@ -100,6 +221,236 @@ class OpenLibraryClient:
         author = authors[0] if authors else "Unknown Author"
         
         return Book(title, author, isbn)
+
+
+class OpenLibraryClient(BaseOpenLibraryClient):
+    def __init__(self, timeout: int = 10, base_url: str = BaseOpenLibraryClient.BASE_URL, cache=None,
+                 retry: Optional[RetryPolicy] = None, limits: Optional[httpx.Limits] = None,
+                 http2: bool = False, rate_limiter: Optional[TokenBucket] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None, mirror: Optional[IsbnMirror] = None,
+                 offline: bool = False, metrics: Optional[Metrics] = None):
+        super().__init__(timeout, base_url, cache, retry, limits, http2, rate_limiter, concurrency, mirror, offline,
+                         metrics)
+        self.client = _httpx().Client(**self.client_options)
+        # Concurrent identical lookups share one upstream request.
+        self.single_flight = SingleFlight()
+        if metrics is not None:
+            self.single_flight.stats = metrics.coalescing
+    
+    def close(self):
+        self.client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        self._check_online()
+        self.retry.record_request()
+        retry = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self.concurrency is not None:
+                self.concurrency.acquire()
+            start = time.monotonic()
+            try:
+                response = self.client.get(url, params=params)
+            except _httpx().TransportError as e:
+                response, error = None, self._transport_failed(e, time.monotonic() - start)
+            finally:
+                if self.concurrency is not None:
+                    self.concurrency.release()
+            if response is not None:
+                if not self._retryable(response, time.monotonic() - start):
+                    return response
+                error = f"HTTP {response.status_code}"
+            time.sleep(self._retry_delay(retry, error, response))
+            retry += 1
+    
+    def search_books(self, query: str, limit: int = 10) -> List[Book]:
+        cached = self._cached_search(query, limit)
+        if cached is not MISSING:
+            return cached
+        return list(self.single_flight.do(f"search:{limit}:{query}", lambda: self._fetch_search(query, limit)))
+
+    def _fetch_search(self, query: str, limit: int) -> List[Book]:
+        try:
+            response = self._get(self.search_url, self._search_params(query, limit))
+            books = self._parse_search_response(response.json())
+            self._cache_search(query, limit, books)
+            return books
+            
+        except OpenLibraryUnavailable:
+            raise
+        except _httpx().RequestError as e:
+            print(f"Error searching books: {e}")
+            return []
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            return []
+    
+    def get_book_by_isbn(self, isbn: str) -> Optional[Book]:
+        isbn = to_isbn13(isbn)
+        if isbn is None:
+            return None
+        cached = self._cached_book(isbn)
+        if cached is not MISSING:
+            return cached
+        return self.single_flight.do(f"isbn:{isbn}", lambda: self._fetch_book(isbn))
+
+    def _fetch_book(self, isbn: str) -> Optional[Book]:
+        try:
+            response = self._get(self.books_url, self._isbn_params(isbn))
+            book = self._parse_isbn_response(response.json(), isbn)
+            self._cache_book(isbn, book)
+            return book
+            
+        except OpenLibraryUnavailable:
+            raise
+        except _httpx().RequestError as e:
+            print(f"Error fetching book by ISBN: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            return None
+
+    def get_books_by_isbns(self, isbns: Iterable[str]) -> Dict[str, Optional[Book]]:
+        """Look up many ISBNs; ISBNs that Open Library was unavailable for are left out."""
+        canonical = self._canonical_isbns(isbns)
+        books, missing = self._cached_books(isbn for isbn in canonical.values() if isbn)
+        for batch in self._batches(missing):
+            try:
+                response = self._get(self.books_url, self._isbns_params(batch))
+                fetched = self._parse_isbns_response(response.json(), batch)
+                for isbn, book in fetched.items():
+                    self._cache_book(isbn, book)
+                books.update(fetched)
+                
+            except OpenLibraryUnavailable as e:
+                print(f"Error fetching books by ISBN: {e}")
+                for isbn in batch:
+                    del books[isbn]
+            except Exception as e:
+                print(f"Unexpected error: {e}")
+        return self._by_requested(canonical, books)
+
+
+class AsyncOpenLibraryClient(BaseOpenLibraryClient):
+    def __init__(self, timeout: int = 10, base_url: str = BaseOpenLibraryClient.BASE_URL, cache=None,
+                 retry: Optional[RetryPolicy] = None, limits: Optional[httpx.Limits] = None,
+                 http2: bool = False, rate_limiter: Optional[TokenBucket] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None, mirror: Optional[IsbnMirror] = None,
+                 offline: bool = False, metrics: Optional[Metrics] = None):
+        super().__init__(timeout, base_url, cache, retry, limits, http2, rate_limiter, concurrency, mirror, offline,
+                         metrics)
+        self.client = _httpx().AsyncClient(**self.client_options)
+        # Concurrent identical lookups share one upstream request.
+        self.single_flight = AsyncSingleFlight()
+        if metrics is not None:
+            self.single_flight.stats = metrics.coalescing
+    
+    async def close(self):
+        await self.client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        self._check_online()
+        self.retry.record_request()
+        retry = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            if self.concurrency is not None:
+                await self.concurrency.acquire_async()
+            start = time.monotonic()
+            try:
+                response = await self.client.get(url, params=params)
+            except _httpx().TransportError as e:
+                response, error = None, self._transport_failed(e, time.monotonic() - start)
+            finally:
+                if self.concurrency is not None:
+                    await self.concurrency.release_async()
+            if response is not None:
+                if not self._retryable(response, time.monotonic() - start):
+                    return response
+                error = f"HTTP {response.status_code}"
+            await asyncio.sleep(self._retry_delay(retry, error, response))
+            retry += 1
+    
+    async def search_books(self, query: str, limit: int = 10) -> List[Book]:
+        cached = self._cached_search(query, limit)
+        if cached is not MISSING:
+            return cached
+        return list(await self.single_flight.do(f"search:{limit}:{query}", lambda: self._fetch_search(query, limit)))
+
+    async def _fetch_search(self, query: str, limit: int) -> List[Book]:
+        try:
+            response = await self._get(self.search_url, self._search_params(query, limit))
+            books = self._parse_search_response(response.json())
+            self._cache_search(query, limit, books)
+            return books
+            
+        except OpenLibraryUnavailable:
+            raise
+        except _httpx().RequestError as e:
+            print(f"Error searching books: {e}")
+            return []
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            return []
+    
+    async def get_book_by_isbn(self, isbn: str) -> Optional[Book]:
+        isbn = to_isbn13(isbn)
+        if isbn is None:
+            return None
+        cached = self._cached_book(isbn)
+        if cached is not MISSING:
+            return cached
+        return await self.single_flight.do(f"isbn:{isbn}", lambda: self._fetch_book(isbn))
+
+    async def _fetch_book(self, isbn: str) -> Optional[Book]:
+        try:
+            response = await self._get(self.books_url, self._isbn_params(isbn))
+            book = self._parse_isbn_response(response.json(), isbn)
+            self._cache_book(isbn, book)
+            return book
+            
+        except OpenLibraryUnavailable:
+            raise
+        except _httpx().RequestError as e:
+            print(f"Error fetching book by ISBN: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            return None
+
+    async def get_books_by_isbns(self, isbns: Iterable[str]) -> Dict[str, Optional[Book]]:
+        """Look up many ISBNs; ISBNs that Open Library was unavailable for are left out."""
+        canonical = self._canonical_isbns(isbns)
+        books, missing = self._cached_books(isbn for isbn in canonical.values() if isbn)
+        for batch in self._batches(missing):
+            try:
+                response = await self._get(self.books_url, self._isbns_params(batch))
+                fetched = self._parse_isbns_response(response.json(), batch)
+                for isbn, book in fetched.items():
+                    self._cache_book(isbn, book)
+                books.update(fetched)
+                
+            except OpenLibraryUnavailable as e:
+                print(f"Error fetching books by ISBN: {e}")
+                for isbn in batch:
+                    del books[isbn]
+            except Exception as e:
+                print(f"Unexpected error: {e}")
+        return self._by_requested(canonical, books)
     
 
 def main():
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by every request a client makes.
+
+    ``reserve`` takes a token and returns how long the caller must wait
+    before using it, so waiting happens outside the lock and the same bucket
+    serves threads and coroutines alike. ``pause`` (for a ``Retry-After``
+    answer) holds back every request until the given delay has passed.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.burst
+        self.waited = 0.0
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._paused_until)
+            if start > self._updated:
+                self.tokens = min(self.burst, self.tokens + (start - self._updated) * self.rate)
+                self._updated = start
+            self.tokens -= 1
+            wait = max(0.0, self._updated - now) + max(0.0, -self.tokens) / self.rate
+            self.waited += wait
+            return wait
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit that adapts AIMD-style to how Open Library copes.
+
+    Every request that comes back within ``latency_target`` raises the limit
+    by ``1/limit`` (about one per round of requests); a 429/503 or a slow
+    response halves it, at most once per ``latency_target`` so one burst of
+    failures counts as a single signal.
+
+    One limiter may be shared by threads and an event loop: ``in_flight``
+    is only changed under the threading condition, and every release wakes
+    the waiters of both kinds.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64,
+                 latency_target: float = 2.0, clock: Callable[[], float] = time.monotonic):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.clock = clock
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+        self._async_condition: Optional[asyncio.Condition] = None
+        self._async_loop = None
+
+    def on_response(self, latency: float, overloaded: bool = False):
+        with self._condition:
+            if overloaded or latency > self.latency_target:
+                now = self.clock()
+                if now - self._last_decrease >= self.latency_target:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    self.decreases += 1
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def _has_room(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _try_acquire(self) -> bool:
+        with self._condition:
+            if not self._has_room():
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def acquire(self):
+        with self._condition:
+            self._condition.wait_for(self._has_room)
+            self.in_flight += 1
+
+    def release(self):
+        self._release()
+        loop, condition = self._async_loop, self._async_condition
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(lambda: loop.create_task(self._notify_async(condition)))
+            except RuntimeError:
+                pass  # The loop has closed; nothing waits on it any more.
+
+    async def acquire_async(self):
+        # asyncio primitives belong to one loop; the API may outlive several.
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_condition, self._async_loop = asyncio.Condition(), loop
+        async with self._async_condition:
+            await self._async_condition.wait_for(self._try_acquire)
+
+    async def release_async(self):
+        self._release()
+        await self._notify_async(self._async_condition)
+
+    @staticmethod
+    async def _notify_async(condition: asyncio.Condition):
+        async with condition:
+            condition.notify_all()
@@ -0,0 +1,68 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+# Responses worth retrying: rate limiting and server-side trouble.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, limited by a retry budget.
+
+    A request may be retried up to ``attempts - 1`` times, sleeping a random
+    time between 0 and ``base_delay * 2**retry`` (capped at ``max_delay``)
+    before each retry. On top of that every retry spends a token from a
+    budget that each request refills by ``budget_ratio``, so while Open
+    Library is down retries add at most ``budget_ratio`` extra load instead
+    of multiplying it. ``budget_reserve`` tokens cover short bursts.
+
+    A ``Retry-After`` from the server overrides the backoff when it is
+    longer; one above ``max_retry_after`` seconds is not waited for.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0,
+                 budget_ratio: float = 0.1, budget_reserve: float = 10, max_retry_after: float = 60,
+                 jitter: Callable[[], float] = random.random):
+        self.attempts = attempts
+        self.max_retry_after = max_retry_after
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_reserve = budget_reserve
+        self.jitter = jitter
+        self.tokens = budget_reserve
+        self.retries = 0
+        self.budget_exhausted = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.tokens = min(self.budget_reserve, self.tokens + self.budget_ratio)
+
+    def backoff(self, retry: int) -> Optional[float]:
+        """Seconds to wait before retry number ``retry`` (0-based), or None to give up."""
+        if retry + 1 >= self.attempts:
+            return None
+        with self._lock:
+            if self.tokens < 1:
+                self.budget_exhausted += 1
+                return None
+            self.tokens -= 1
+            self.retries += 1
+        return self.jitter() * min(self.max_delay, self.base_delay * 2 ** retry)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
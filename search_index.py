@@ -0,0 +1,492 @@
+import heapq
+import re
+import sys
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain, islice, product
+from math import log
+from operator import itemgetter
+from typing import Callable, Iterable, NamedTuple, Optional
+from book import Book
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Dotted and dotless I in either case become a plain i, so Turkish and
+# non-Turkish spellings of a word ("İstanbul", "Istanbul", "ıstanbul") meet.
+TURKISH_I = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+# Combining diacritical marks left over after NFKD decomposition.
+ACCENTS = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+# Most alternative spellings tried per query word when ranking fuzzy matches.
+FUZZY_LEVELS = 4
+# BM25 term frequency saturation and field length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A word the query word is only a prefix of counts as half an occurrence.
+PREFIX_TF = 0.5
+
+
+def fold(text: str) -> str:
+    """Search key for ``text``: case-folded, without accents and with Turkish I/ı/İ/i merged.
+
+    Catalogs store the key of every title and author when a book is
+    added; queries are folded the same way and compared against those keys.
+    """
+    if text.isascii():
+        return text.lower()
+    return ACCENTS.sub("", unicodedata.normalize("NFKD", text.translate(TURKISH_I).casefold()))
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(fold(text))
+
+
+class FuzzyMatch(NamedTuple):
+    book: Book
+    score: float
+    distance: int
+
+
+class RankedMatch(NamedTuple):
+    book: Book
+    score: float
+
+
+def bm25(idf: float, tf: float, length: int, average_length: float) -> float:
+    """BM25 weight of a word occurring ``tf`` times in a field of ``length`` words."""
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+    return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+
+def max_typos(token: str) -> int:
+    """Edits tolerated in a query word: none for short words and numbers, then one, then two."""
+    if len(token) <= 2 or token.isdigit():
+        return 0
+    return 1 if len(token) <= 5 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance counting a swap of adjacent letters as one edit, capped at ``limit + 1``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def trigrams(term: str) -> set[str]:
+    # Two spaces of padding give short words enough trigrams that one typo
+    # still leaves two of them intact.
+    padded = f"  {term}  "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TermMatcher:
+    """Trigram index over a vocabulary for finding the words within a few typos of a query word.
+
+    An edit changes at most three trigrams, so only words sharing enough
+    trigrams with the query word are compared by edit distance. Numbers
+    are left out; they only ever match exactly.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self._grams: dict[str, set[str]] = {}
+        for term in terms:
+            self.add(term)
+
+    def add(self, term: str):
+        if term.isdigit():
+            return
+        for gram in trigrams(term):
+            terms = self._grams.get(gram)
+            if terms is None:
+                self._grams[gram] = {term}
+            else:
+                terms.add(term)
+
+    def find(self, token: str, max_distance: int) -> list[tuple[str, int]]:
+        """(term, edit distance) for every known term within ``max_distance`` edits of ``token``."""
+        grams = trigrams(token)
+        counts = Counter()
+        for gram in grams:
+            terms = self._grams.get(gram)
+            if terms:
+                counts.update(terms)
+        needed = len(grams) - 3 * max_distance
+        found = []
+        for term, shared in counts.items():
+            if shared >= needed and abs(len(term) - len(token)) <= max_distance:
+                distance = edit_distance(token, term, max_distance)
+                if distance <= max_distance:
+                    found.append((term, distance))
+        return found
+
+
+def rank_fuzzy(query: str, find_terms: Callable[[str, int], list[tuple[str, int]]],
+               matching_docs: Callable[[list[list[str]], int], list[int]], limit: int) -> list[tuple[int, float, int]]:
+    """The ``limit`` best fuzzy matches for ``query`` as (doc id, score, edit distance).
+
+    Every query word must match a word of the document within its typo
+    allowance (``max_typos``). A word's score is ``1 - distance / length``
+    and a document scores the mean over the query words, so exact matches
+    come first. ``find_terms(token, typos)`` lists the indexed words near
+    a query word and ``matching_docs(groups, n)`` up to ``n`` ids, in
+    order, of documents holding a word from every group. Matches are
+    collected score level by score level, so the work done depends on
+    ``limit`` rather than on how many documents match; ties are in
+    insertion order unless a level holds more than ``limit`` matches.
+    """
+    levels = []
+    for token in dict.fromkeys(tokenize(query)):
+        by_score = {}
+        for term, distance in find_terms(token, max_typos(token)):
+            score = 1 - distance / max(len(token), len(term))
+            by_score.setdefault((score, -distance), []).append(term)
+        if not by_score:
+            return []
+        levels.append(sorted(by_score.items(), reverse=True)[:FUZZY_LEVELS])
+    if not levels:
+        return []
+
+    combinations = sorted(product(*levels),
+                          key=lambda combination: sum(score for (score, _), _ in combination), reverse=True)
+    matches, seen = [], set()
+    for combination in combinations:
+        score = sum(score for (score, _), _ in combination) / len(combination)
+        distance = -sum(negative for (_, negative), _ in combination)
+        # Documents already matched at a better level are skipped, so ask
+        # for enough ids to make up for them.
+        for doc_id in matching_docs([terms for _, terms in combination], limit - len(matches) + len(seen)):
+            if doc_id not in seen:
+                seen.add(doc_id)
+                matches.append((doc_id, score, distance))
+                if len(matches) == limit:
+                    return matches
+    return matches
+
+
+class FieldIndex:
+    """Inverted index for one book field: token -> ids of the books containing it.
+
+    Prefix queries walk a sorted vocabulary with bisect, so every token
+    doubles as an index for all of its prefixes without storing them.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set[int]] = {}
+        self._terms: list[str] = []
+        self._new_terms: list[str] = []
+        self._empty_terms = 0
+        # Built on the first fuzzy search only.
+        self._matcher: Optional[TermMatcher] = None
+        # For ranking: ids by field length in words, and for each term the
+        # ids of documents holding it more than once, by count.
+        self._by_length: dict[int, set[int]] = {}
+        self._repeats: dict[str, dict[int, set[int]]] = {}
+        self._total_length = 0
+
+    def add(self, doc_id: int, key: str):
+        """Index the words of ``key``, a field's ``fold``ed text."""
+        words = TOKEN_PATTERN.findall(key)
+        terms = set(words)
+        self._add_length(doc_id, words, terms)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+                self._new_terms.append(term)
+                if self._matcher is not None:
+                    self._matcher.add(term)
+            elif not postings:
+                self._empty_terms -= 1
+            postings.add(doc_id)
+
+    def remove(self, doc_id: int, key: str):
+        words = TOKEN_PATTERN.findall(key)
+        terms = set(words)
+        self._remove_length(doc_id, words, terms)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                # Empty terms stay in the vocabulary until there are enough
+                # of them to be worth a rebuild of the sorted term list.
+                self._empty_terms += 1
+        if self._empty_terms > len(self._postings) // 2:
+            self._postings = {term: ids for term, ids in self._postings.items() if ids}
+            self._terms = []
+            self._new_terms = list(self._postings)
+            self._empty_terms = 0
+            self._matcher = None
+
+    def clear(self):
+        self._postings.clear()
+        self._terms.clear()
+        self._new_terms.clear()
+        self._empty_terms = 0
+        self._matcher = None
+        self._by_length.clear()
+        self._repeats.clear()
+        self._total_length = 0
+
+    def lookup(self, prefix: str) -> set[int]:
+        """Ids of books with a token starting with ``prefix``; do not mutate the result."""
+        terms = self._vocabulary()
+        postings = []
+        ix = bisect_left(terms, prefix)
+        while ix < len(terms) and terms[ix].startswith(prefix):
+            postings.append(self._postings[terms[ix]])
+            ix += 1
+        if len(postings) == 1:
+            return postings[0]
+        return set().union(*postings)
+
+    def match(self, tokens: Iterable[str]) -> set[int]:
+        """Ids of books with a token starting with each of ``tokens``, rarest first."""
+        candidates = None
+        for ids in sorted((self.lookup(token) for token in set(tokens)), key=len):
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return candidates if candidates is not None else set()
+
+    def fuzzy_terms(self, token: str, max_distance: int) -> list[tuple[str, int]]:
+        """(term, edit distance) for the indexed terms within ``max_distance`` edits of ``token``."""
+        if max_distance == 0:
+            return [(token, 0)] if self._postings.get(token) else []
+        if self._matcher is None:
+            self._matcher = TermMatcher(term for term, ids in self._postings.items() if ids)
+        return [(term, distance) for term, distance in self._matcher.find(token, max_distance)
+                if self._postings.get(term)]
+
+    def matching_docs(self, groups: list[list[str]], count: int) -> list[int]:
+        """Up to ``count`` ids, in order, of documents holding a term from every group of ``groups``.
+
+        Walks the rarest group and stops once ``count`` are found, so the
+        cost follows ``count`` rather than the number of matches.
+        """
+        groups = sorted(([self._postings[term] for term in terms] for terms in groups),
+                        key=lambda sets: sum(map(len, sets)))
+        rest = groups[1:]
+        found = set()
+        for doc_id in chain.from_iterable(groups[0]):
+            if doc_id not in found and all(any(doc_id in ids for ids in sets) for sets in rest):
+                found.add(doc_id)
+                if len(found) == count:
+                    break
+        return sorted(found)
+
+    def fuzzy(self, query: str, limit: int) -> list[tuple[int, float, int]]:
+        """``rank_fuzzy`` over this field."""
+        return rank_fuzzy(query, self.fuzzy_terms, self.matching_docs, limit)
+
+    def rank(self, query: str, count: Optional[int] = None) -> list[tuple[int, float]]:
+        """The ``count`` best (doc id, BM25 score) for documents matching every word of ``query``.
+
+        Documents match as in ``match``, with the words in any order; a
+        word the query word only starts counts ``PREFIX_TF`` times. Best
+        first, ties in insertion order. Documents holding each query word
+        equally often differ only in field length, so the matches are
+        split into such groups with set operations and walked length by
+        length from the best score down; only the ``count`` lowest ids of
+        each group and length reached are ever ordered.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        matched = [self.lookup(token) for token in tokens]
+        candidates = None
+        for ids in sorted(matched, key=len):
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+        if candidates is None:
+            return []
+        count = len(candidates) if count is None else count
+        if count <= 0:
+            return []
+
+        # Matches grouped by how often they hold each query word. Removing
+        # the documents that went to another group waits until a group is
+        # cut down to one field length, so big sets are never copied whole.
+        groups = {(): (candidates, ())}
+        for token, ids in zip(tokens, matched):
+            exact = self._postings.get(token) or set()
+            split = {}
+            for counts, (docs, elsewhere) in groups.items():
+                # A word that no other indexed word starts with is held by every match.
+                whole = docs if ids is exact else docs & exact
+                if len(whole) < len(docs):
+                    split[counts + (PREFIX_TF,)] = (docs - whole if whole else docs, elsewhere)
+                repeated = []
+                for tf, holders in self._repeats.get(token, {}).items():
+                    holders = whole & holders
+                    holders.difference_update(*elsewhere)
+                    if holders:
+                        split[counts + (tf,)] = (holders, elsewhere)
+                        repeated.append(holders)
+                if len(whole) > sum(map(len, repeated)):
+                    split[counts + (1,)] = (whole, elsewhere + tuple(repeated))
+            groups = split
+
+        documents = sum(map(len, self._by_length.values()))
+        average_length = self._total_length / documents
+        idfs = [log(1 + (documents - len(ids) + 0.5) / (len(ids) + 0.5)) for ids in matched]
+        cells = sorted(((sum(bm25(idf, tf, length, average_length) for idf, tf in zip(idfs, counts)), length, group)
+                        for counts, group in groups.items() for length in self._by_length),
+                       key=itemgetter(0), reverse=True)
+        best, found, cutoff = [], 0, None
+        for score, length, (docs, elsewhere) in cells:
+            if cutoff is not None and score < cutoff:
+                break
+            ids = docs & self._by_length[length]
+            ids.difference_update(*elsewhere)
+            if ids:
+                best.extend((score, doc_id) for doc_id in heapq.nsmallest(count, ids))
+                found += len(ids)
+                if cutoff is None and found >= count:
+                    cutoff = score
+        return [(doc_id, score) for score, doc_id in heapq.nsmallest(count, best, key=lambda hit: (-hit[0], hit[1]))]
+
+    def _add_length(self, doc_id: int, words: list[str], terms: set[str]):
+        ids = self._by_length.get(len(words))
+        if ids is None:
+            self._by_length[len(words)] = {doc_id}
+        else:
+            ids.add(doc_id)
+        self._total_length += len(words)
+        if len(terms) < len(words):
+            for term, tf in Counter(words).items():
+                if tf > 1:
+                    self._repeats.setdefault(term, {}).setdefault(tf, set()).add(doc_id)
+
+    def _remove_length(self, doc_id: int, words: list[str], terms: set[str]):
+        ids = self._by_length.get(len(words))
+        if ids is None or doc_id not in ids:
+            return
+        ids.discard(doc_id)
+        if not ids:
+            del self._by_length[len(words)]
+        self._total_length -= len(words)
+        if len(terms) < len(words):
+            for term, tf in Counter(words).items():
+                if tf > 1:
+                    by_tf = self._repeats[term]
+                    by_tf[tf].discard(doc_id)
+                    if not by_tf[tf]:
+                        del by_tf[tf]
+                        if not by_tf:
+                            del self._repeats[term]
+
+    def _vocabulary(self) -> list[str]:
+        if self._new_terms:
+            if len(self._new_terms) > 64:
+                self._terms.extend(self._new_terms)
+                self._terms.sort()
+            else:
+                for term in self._new_terms:
+                    insort(self._terms, term)
+            self._new_terms.clear()
+        return self._terms
+
+
+class SearchIndex:
+    """Title/author token index kept up to date by the Catalog it is attached to.
+
+    Also holds the search key (``fold``) of each book's title and author,
+    computed once when the book is added, which every search compares
+    against instead of lowercasing the books per query.
+    """
+
+    FIELDS = ("title", "author")
+
+    def __init__(self, books: Iterable[Book] = ()):
+        self._fields = {field: FieldIndex() for field in self.FIELDS}
+        self._keys: dict[str, dict[int, str]] = {field: {} for field in self.FIELDS}
+        self._books: dict[int, Book] = {}
+        self._doc_ids: dict[int, int] = {}
+        self._next_id = 0
+        for book in books:
+            self.add(book)
+
+    def add(self, book: Book):
+        doc_id = self._next_id
+        self._next_id += 1
+        self._books[doc_id] = book
+        self._doc_ids[id(book)] = doc_id
+        for field, index in self._fields.items():
+            key = fold(getattr(book, field))
+            if field == "author":
+                # Authors repeat across many books; share one key string each.
+                key = sys.intern(key)
+            self._keys[field][doc_id] = key
+            index.add(doc_id, key)
+
+    def remove(self, book: Book):
+        doc_id = self._doc_ids.pop(id(book), None)
+        if doc_id is None:
+            return
+        del self._books[doc_id]
+        for field, index in self._fields.items():
+            index.remove(doc_id, self._keys[field].pop(doc_id))
+
+    def clear(self):
+        self._books.clear()
+        for keys in self._keys.values():
+            keys.clear()
+        self._doc_ids.clear()
+        self._next_id = 0
+        for index in self._fields.values():
+            index.clear()
+
+    def search(self, field: str, query: str, limit: Optional[int] = None, offset: int = 0) -> Optional[list[Book]]:
+        """Return books whose field contains ``query`` starting at a word boundary.
+
+        Returns None when the query has no indexable tokens, in which case the
+        caller should fall back to a substring scan.
+        """
+        index = self._fields.get(field)
+        tokens = tokenize(query)
+        if index is None or not tokens:
+            return None
+
+        candidates = index.match(tokens)
+        if not candidates:
+            return []
+
+        query_key, keys = fold(query), self._keys[field]
+        matches = (doc_id for doc_id in sorted(candidates) if query_key in keys[doc_id])
+        return [self._books[doc_id] for doc_id in islice(matches, offset, None if limit is None else offset + limit)]
+
+    def scan(self, field: str, query: str, limit: Optional[int] = None, offset: int = 0) -> list[Book]:
+        """Books whose field contains ``query`` anywhere, in insertion order."""
+        keys = self._keys.get(field)
+        if keys is None:
+            return []
+        query_key = fold(query)
+        matches = (doc_id for doc_id, key in keys.items() if query_key in key)
+        return [self._books[doc_id] for doc_id in islice(matches, offset, None if limit is None else offset + limit)]
+
+    def rank(self, field: str, query: str, limit: Optional[int] = None, offset: int = 0) -> list[RankedMatch]:
+        """Books whose field holds every word of ``query``, most relevant first (``FieldIndex.rank``)."""
+        index = self._fields.get(field)
+        if index is None:
+            raise ValueError(f"Cannot search by {field}")
+        ranked = index.rank(query, None if limit is None else offset + limit)
+        return [RankedMatch(self._books[doc_id], score) for doc_id, score in ranked[offset:]]
+
+    def fuzzy_search(self, field: str, query: str, limit: int) -> list[FuzzyMatch]:
+        """Best ``limit`` books whose field matches every word of ``query`` allowing for typos."""
+        index = self._fields.get(field)
+        if index is None:
+            raise ValueError(f"Cannot search by {field}")
+        return [FuzzyMatch(self._books[doc_id], score, distance)
+                for doc_id, score, distance in index.fuzzy(query, limit)]
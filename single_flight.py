@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable
+
+
+class CoalescingStats:
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+
+    @property
+    def coalesced(self) -> int:
+        return self.calls - self.executions
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "executions": self.executions, "coalesced": self.coalesced}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution (threads).
+
+    The first caller for a key runs ``fn``; callers arriving while it is
+    running wait for it and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self.stats = CoalescingStats()
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.stats.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats.executions += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Collapse concurrent calls with the same key into one execution (asyncio).
+
+    The shared call runs as its own task, so a caller being cancelled does
+    not cancel the lookup for everyone else waiting on it.
+    """
+
+    def __init__(self):
+        self.stats = CoalescingStats()
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.stats.executions += 1
+        return await asyncio.shield(task)
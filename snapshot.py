@@ -0,0 +1,388 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections.abc import MutableSequence
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from book import Book
+from book_stream import iter_books
+from catalog import Catalog
+from search_index import FuzzyMatch, RankedMatch, SearchIndex
+
+MAGIC = b"LIBSNAP1"
+# Magic, record count, sequence number of the next book added, then the offsets
+# of the insertion-order index, of the sequence numbers and of the ISBN index.
+HEADER = struct.Struct("<8sQQQQQ")
+# Key, ISBN, title and author lengths in front of each record's UTF-8 strings.
+RECORD = struct.Struct("<HHII")
+
+
+def write_snapshot(path: str, books: Iterable[Book]) -> int:
+    """Write ``books`` as a snapshot file at ``path`` and return how many were stored.
+
+    Records are written in insertion order as they come, followed by their
+    offsets in that order, their sequence numbers (1, 2, ...) and their row
+    numbers sorted by ISBN key; only the offsets, sequence numbers and keys
+    are held in memory. The first book per ISBN wins. The file is replaced
+    atomically.
+    """
+    return _write_entries(path, enumerate(books, 1), 1)
+
+
+def _write_entries(path: str, entries: Iterable[tuple[int, Book]], next_seq: int) -> int:
+    """Write ``(seq, book)`` pairs, in increasing ``seq`` order, as a snapshot file at ``path``."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, 0, 0, 0, 0, 0))
+            offsets, seqs, keys, seen, offset = array('Q'), array('Q'), [], set(), HEADER.size
+            for seq, book in entries:
+                key = Catalog.key(book.isbn).encode()
+                if key in seen:
+                    continue
+                seen.add(key)
+                isbn, title, author = book.isbn.encode(), book.title.encode(), book.author.encode()
+                record = RECORD.pack(len(key), len(isbn), len(title), len(author)) + key + isbn + title + author
+                offsets.append(offset)
+                seqs.append(seq)
+                keys.append(key)
+                next_seq = max(next_seq, seq + 1)
+                file.write(record)
+                offset += len(record)
+            del seen
+            by_key = array('I', sorted(range(len(keys)), key=keys.__getitem__))
+            del keys
+            order_offset = offset
+            seq_offset = order_offset + len(offsets) * offsets.itemsize
+            file.write(offsets.tobytes())
+            file.write(seqs.tobytes())
+            file.write(by_key.tobytes())
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, len(offsets), next_seq, order_offset, seq_offset,
+                                   seq_offset + len(seqs) * seqs.itemsize))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return len(offsets)
+
+
+class SnapshotCatalog(MutableSequence):
+    """Catalog served straight from a memory-mapped binary snapshot file.
+
+    Opening one maps the file and reads its header, nothing more: a book
+    is decoded from its record only when it is read, and ISBN lookups are
+    a binary search over the index of row numbers sorted by ISBN key.
+    Changes are kept in memory on top of the file (added books after the
+    snapshot's rows, removed rows in a set) until ``save`` writes the whole
+    catalogue again and maps the new file. The title/author SearchIndex is
+    built on the first search, decoding every book once.
+
+    Offers the same interface as ``catalog.Catalog``. The file stores each
+    book's sequence number and the next one to hand out, so paging cursors
+    stay valid across saves that drop removed rows.
+    """
+
+    def __init__(self, path: str, indexes: Iterable = ()):
+        self.path = path
+        self._indexes = list(indexes)
+        self._file = None
+        self._map = None
+        self._offsets = ()
+        self._row_seqs = ()
+        self._by_key = ()
+        self._count = 0
+        self._next_seq = 1
+        self._open()
+        self._reset()
+
+    key = staticmethod(Catalog.key)
+
+    def _reset(self):
+        self._removed: set[int] = set()
+        self._added: dict[str, Book] = {}
+        self._order: list[Book] = []
+        self._seqs = array('Q')
+        self.search_index: Optional[SearchIndex] = None
+        # Row -> Book for every row once the search index holds them, so
+        # removals hand the index the same objects it was given.
+        self._rows: Optional[dict[int, Book]] = None
+
+    def reopen(self):
+        """Drop in-memory changes and serve the file at ``path`` as it is now."""
+        self._close_map()
+        self._open()
+        self._reset()
+
+    def close(self):
+        self._close_map()
+
+    def save(self):
+        """Write every book to the file at ``path`` and serve that file from then on.
+
+        The in-memory changes end up in the file, so they are dropped, and the
+        old file's mapping is released. A search index already built is kept,
+        as the books it holds are the ones now in the file, in the same order.
+        """
+        search_index = self.search_index
+        books = list(self) if search_index is not None else None
+        _write_entries(self.path, self._entries(), self._next_seq)
+        self.reopen()
+        if search_index is not None:
+            self.search_index = search_index
+            self._rows = dict(enumerate(books))
+
+    def __len__(self) -> int:
+        return self._count - len(self._removed) + len(self._added)
+
+    def __iter__(self) -> Iterator[Book]:
+        for row in range(self._count):
+            if row not in self._removed:
+                yield self._book(row)
+        yield from list(self._added.values())
+
+    def __contains__(self, book) -> bool:
+        if not isinstance(book, Book):
+            return False
+        existing_book = self.get(book.isbn)
+        return existing_book is not None and existing_book.to_dict() == book.to_dict()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("Catalog index out of range")
+        if not self._removed and index < self._count:
+            return self._book(index)
+        return next(islice(self, index, None))
+
+    def __setitem__(self, index, value):
+        books = list(self)
+        books[index] = value
+        self._rebuild(books)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            books = list(self)
+            del books[index]
+            self._rebuild(books)
+        else:
+            self.pop_isbn(self[index].isbn)
+
+    def __repr__(self) -> str:
+        return f"SnapshotCatalog({self.path!r})"
+
+    def insert(self, index: int, book: Book):
+        if index >= len(self):
+            self.append(book)
+            return
+        books = list(self)
+        books.insert(index, book)
+        self._rebuild(books)
+
+    def append(self, book: Book):
+        key = self.key(book.isbn)
+        existing_book = self._added.get(key) or self._get_row(self._find(key))
+        if existing_book is not None:
+            raise ValueError(f"ISBN must be unique. Already exists: {existing_book}")
+        self._added[key] = book
+        self._order.append(book)
+        self._seqs.append(self._next_seq)
+        self._next_seq += 1
+        if self.search_index is not None:
+            self.search_index.add(book)
+        for index in self._indexes:
+            index.add(book)
+
+    def remove(self, book: Book):
+        if book not in self:
+            raise ValueError(f"{book} is not in the catalog")
+        self.pop_isbn(book.isbn)
+
+    def clear(self):
+        # The file stays as it is until the catalogue is saved again.
+        self._close_map()
+        self._reset()
+        for index in self._indexes:
+            index.clear()
+
+    def add_index(self, index):
+        self._indexes.append(index)
+
+    def get(self, isbn: str) -> Optional[Book]:
+        key = self.key(isbn)
+        book = self._added.get(key)
+        return book if book is not None else self._get_row(self._find(key))
+
+    def has_isbn(self, isbn: str) -> bool:
+        key = self.key(isbn)
+        return key in self._added or self._find(key) is not None
+
+    def pop_isbn(self, isbn: str) -> Optional[Book]:
+        key = self.key(isbn)
+        book = self._added.pop(key, None)
+        if book is None:
+            row = self._find(key)
+            book = self._get_row(row)
+            if book is None:
+                return None
+            self._removed.add(row)
+        if self.search_index is not None:
+            self.search_index.remove(book)
+        for index in self._indexes:
+            index.remove(book)
+        return book
+
+    def page(self, after: Optional[int] = None, limit: int = 100) -> tuple[list[Book], Optional[int]]:
+        """Return up to ``limit`` books following cursor ``after`` and the cursor of the next page."""
+        after = after or 0
+        books, last_seq = [], after
+        row_seqs = self._row_seqs
+        for row in range(bisect_right(row_seqs, after), self._count):
+            if row in self._removed:
+                continue
+            if len(books) == limit:
+                return books, last_seq
+            books.append(self._book(row))
+            last_seq = row_seqs[row]
+        for position in range(bisect_right(self._seqs, after), len(self._order)):
+            book = self._order[position]
+            if self._added.get(self.key(book.isbn)) is not book:
+                continue
+            if len(books) == limit:
+                return books, last_seq
+            books.append(book)
+            last_seq = self._seqs[position]
+        return books, None
+
+    def search(self, field: str, query: str, mode: str = "index",
+               limit: Optional[int] = None, offset: int = 0) -> list[Book]:
+        index = self._search_index()
+        if mode == "index":
+            matching_books = index.search(field, query, limit, offset)
+            if matching_books is not None:
+                return matching_books
+
+        return index.scan(field, query, limit, offset)
+
+    def rank(self, field: str, query: str, limit: Optional[int] = None, offset: int = 0) -> list[RankedMatch]:
+        return self._search_index().rank(field, query, limit, offset)
+
+    def fuzzy_search(self, field: str, query: str, limit: int = 20) -> list[FuzzyMatch]:
+        return self._search_index().fuzzy_search(field, query, limit)
+
+    def _entries(self) -> Iterator[tuple[int, Book]]:
+        """Every book with its sequence number, in order."""
+        for row in range(self._count):
+            if row not in self._removed:
+                yield self._row_seqs[row], self._book(row)
+        for book, seq in zip(list(self._order), self._seqs):
+            if self._added.get(self.key(book.isbn)) is book:
+                yield seq, book
+
+    def _search_index(self) -> SearchIndex:
+        if self.search_index is None:
+            rows = {row: self._book(row) for row in range(self._count) if row not in self._removed}
+            self.search_index = SearchIndex(rows.values())
+            for book in self._added.values():
+                self.search_index.add(book)
+            self._rows = rows
+        return self.search_index
+
+    def _open(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            self._count = 0
+            return
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._next_seq, order_offset, seq_offset, key_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._close_map()
+            raise ValueError(f"{self.path} is not a library snapshot file")
+        # Zero-copy views of the indexes; their pages are read on demand.
+        # The casts are native-endian, which matches the little-endian file
+        # on every platform this runs on.
+        view = memoryview(self._map)
+        self._offsets = view[order_offset:order_offset + self._count * 8].cast("Q")
+        self._row_seqs = view[seq_offset:seq_offset + self._count * 8].cast("Q")
+        self._by_key = view[key_offset:key_offset + self._count * 4].cast("I")
+        view.release()
+
+    def _close_map(self):
+        for view in (self._offsets, self._row_seqs, self._by_key):
+            if isinstance(view, memoryview):
+                view.release()
+        self._offsets = self._row_seqs = self._by_key = ()
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = self._file = None
+        self._count = 0
+
+    def _find(self, key: str) -> Optional[int]:
+        """Row holding ISBN ``key``, or None if the file has none or it was removed."""
+        data, offsets, by_key = self._map, self._offsets, self._by_key
+        key = key.encode()
+        start_of_key = RECORD.size
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            row = by_key[middle]
+            offset = offsets[row]
+            start = offset + start_of_key
+            found = data[start:start + data[offset] + (data[offset + 1] << 8)]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return None if row in self._removed else row
+        return None
+
+    def _get_row(self, row: Optional[int]) -> Optional[Book]:
+        return None if row is None else self._book(row)
+
+    def _book(self, row: int) -> Book:
+        if self._rows is not None:
+            return self._rows[row]
+        offset = self._offsets[row]
+        key_length, isbn_length, title_length, author_length = RECORD.unpack_from(self._map, offset)
+        isbn_start = offset + RECORD.size + key_length
+        title_start = isbn_start + isbn_length
+        author_start = title_start + title_length
+        data = self._map
+        return Book(data[title_start:author_start].decode(), data[author_start:author_start + author_length].decode(),
+                    data[isbn_start:title_start].decode())
+
+    def _rebuild(self, books: list[Book]):
+        self.clear()
+        self.extend(books)
+
+
+def convert_json(json_path: str, snapshot_path: str) -> int:
+    """Write the books of a library.json file to a snapshot file, skipping repeated ISBNs."""
+    with open(json_path, 'r', encoding='utf-8') as file:
+        return write_snapshot(snapshot_path, iter_books(file))
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python snapshot.py <library.json> <library.snapshot>")
+        sys.exit(1)
+    converted = convert_json(sys.argv[1], sys.argv[2])
+    print(f"✅ Wrote {converted} books from {sys.argv[1]} to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
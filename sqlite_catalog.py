@@ -0,0 +1,347 @@
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableSequence
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from book import Book
+from book_stream import iter_books
+from catalog import Catalog
+from search_index import FieldIndex, FuzzyMatch, RankedMatch, TermMatcher, fold, rank_fuzzy, tokenize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    isbn_key TEXT PRIMARY KEY,
+    isbn TEXT NOT NULL,
+    title TEXT NOT NULL,
+    author TEXT NOT NULL,
+    title_norm TEXT NOT NULL,
+    author_norm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS books_title_norm ON books (title_norm);
+CREATE INDEX IF NOT EXISTS books_author_norm ON books (author_norm);
+"""
+
+# The full-text index covers the search keys, not the raw fields.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+    title_norm, author_norm, content='books', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 0'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS books_vocab USING fts5vocab(books_fts, 'col');
+CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+    INSERT INTO books_fts (rowid, title_norm, author_norm) VALUES (new.rowid, new.title_norm, new.author_norm);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title_norm, author_norm)
+    VALUES ('delete', old.rowid, old.title_norm, old.author_norm);
+END;
+CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE ON books BEGIN
+    INSERT INTO books_fts (books_fts, rowid, title_norm, author_norm)
+    VALUES ('delete', old.rowid, old.title_norm, old.author_norm);
+    INSERT INTO books_fts (rowid, title_norm, author_norm) VALUES (new.rowid, new.title_norm, new.author_norm);
+END;
+"""
+
+FIELDS = ("title", "author")
+
+
+class SqliteCatalog(MutableSequence):
+    """Catalog stored in a SQLite database instead of in memory.
+
+    Offers the same interface as ``catalog.Catalog`` so Library can use
+    either one, but every lookup, mutation and search is a SQL query:
+    ISBN lookups hit the primary key, index-mode searches use FTS5 and
+    substring searches scan the search-key (``*_norm``) columns inside
+    SQLite.
+    Insertion order is the table's rowid order.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        # Fuzzy search vocabularies, read from the FTS index on first use and
+        # reread once another connection has changed the database.
+        self._matchers: Optional[dict[str, TermMatcher]] = None
+        self._data_version = None
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        try:
+            self._connection.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; index-mode searches fall back to scans.
+            self.fts = False
+
+    key = staticmethod(Catalog.key)
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._query_one("SELECT COUNT(*) FROM books")[0]
+
+    def __iter__(self) -> Iterator[Book]:
+        cursor = self._connection.execute("SELECT title, author, isbn FROM books ORDER BY rowid")
+        for row in cursor:
+            yield Book(*row)
+
+    def __contains__(self, book) -> bool:
+        if not isinstance(book, Book):
+            return False
+        existing_book = self.get(book.isbn)
+        return existing_book is not None and existing_book.to_dict() == book.to_dict()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("Catalog index out of range")
+        row = self._query_one("SELECT title, author, isbn FROM books ORDER BY rowid LIMIT 1 OFFSET ?", (index,))
+        return Book(*row)
+
+    def __setitem__(self, index, value):
+        books = list(self)
+        books[index] = value
+        self._rebuild(books)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            books = list(self)
+            del books[index]
+            self._rebuild(books)
+        else:
+            self.pop_isbn(self[index].isbn)
+
+    def __repr__(self) -> str:
+        return f"SqliteCatalog({self.db_path!r})"
+
+    def insert(self, index: int, book: Book):
+        if index >= len(self):
+            self.append(book)
+            return
+        books = list(self)
+        books.insert(index, book)
+        self._rebuild(books)
+
+    def append(self, book: Book):
+        with self._lock:
+            try:
+                self._connection.execute(
+                    "INSERT INTO books (isbn_key, isbn, title, author, title_norm, author_norm)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", self._row(book)
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"ISBN must be unique. Already exists: {self.get(book.isbn)}") from None
+            self._learn_terms(book)
+
+    def extend(self, books: Iterable[Book], skip_existing: bool = False) -> int:
+        """Insert books in one transaction and return how many were added.
+
+        Duplicate ISBNs abort the whole batch unless ``skip_existing`` is set,
+        in which case they are silently ignored.
+        """
+        verb = "INSERT OR IGNORE" if skip_existing else "INSERT"
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                cursor = self._connection.executemany(
+                    f"{verb} INTO books (isbn_key, isbn, title, author, title_norm, author_norm)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", (self._row(self._learn_terms(book)) for book in books)
+                )
+            except sqlite3.IntegrityError as e:
+                self._connection.execute("ROLLBACK")
+                raise ValueError(f"ISBN must be unique: {e}") from None
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return max(cursor.rowcount, 0)
+
+    def remove(self, book: Book):
+        if book not in self:
+            raise ValueError(f"{book} is not in the catalog")
+        self.pop_isbn(book.isbn)
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM books")
+
+    def get(self, isbn: str) -> Optional[Book]:
+        row = self._query_one("SELECT title, author, isbn FROM books WHERE isbn_key = ?", (self.key(isbn),))
+        return Book(*row) if row else None
+
+    def has_isbn(self, isbn: str) -> bool:
+        return self._query_one("SELECT 1 FROM books WHERE isbn_key = ?", (self.key(isbn),)) is not None
+
+    def pop_isbn(self, isbn: str) -> Optional[Book]:
+        with self._lock:
+            book = self.get(isbn)
+            if book is not None:
+                self._connection.execute("DELETE FROM books WHERE isbn_key = ?", (self.key(isbn),))
+            return book
+
+    def page(self, after: Optional[int] = None, limit: int = 100) -> tuple[list[Book], Optional[int]]:
+        """Return up to ``limit`` books following cursor ``after`` (a rowid) and the cursor of the next page."""
+        rows = self._query_all(
+            "SELECT rowid, title, author, isbn FROM books WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (after or 0, limit + 1)
+        )
+        books = [Book(*row[1:]) for row in rows[:limit]]
+        return books, rows[limit - 1][0] if len(rows) > limit else None
+
+    def search(self, field: str, query: str, mode: str = "index",
+               limit: Optional[int] = None, offset: int = 0) -> list[Book]:
+        if field not in FIELDS:
+            raise ValueError(f"Cannot search by {field}")
+        query_key = fold(query)
+        tokens = tokenize(query)
+        page = (-1 if limit is None else limit, offset)
+
+        if mode == "index" and self.fts and tokens:
+            rows = self._query_all(
+                f"SELECT b.title, b.author, b.isbn FROM books_fts"
+                f" JOIN books b ON b.rowid = books_fts.rowid"
+                f" WHERE books_fts MATCH ? AND instr(b.{field}_norm, ?) > 0"
+                f" ORDER BY b.rowid LIMIT ? OFFSET ?", (self._match(field, tokens), query_key, *page)
+            )
+            return [Book(*row) for row in rows]
+
+        rows = self._query_all(
+            f"SELECT title, author, isbn FROM books WHERE instr({field}_norm, ?) > 0 ORDER BY rowid LIMIT ? OFFSET ?",
+            (query_key, *page)
+        )
+        return [Book(*row) for row in rows]
+
+    def rank(self, field: str, query: str, limit: Optional[int] = None, offset: int = 0) -> list[RankedMatch]:
+        """Books whose field holds every word of ``query``, best first by FTS5's ``bm25()``.
+
+        SQLite keeps only the ``offset + limit`` best rows while sorting.
+        """
+        if field not in FIELDS:
+            raise ValueError(f"Cannot search by {field}")
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        if not self.fts:
+            ranked = self._scan_index(field).rank(query, None if limit is None else offset + limit)[offset:]
+            books = self._books_by_rowid([rowid for rowid, _ in ranked])
+            return [RankedMatch(books[rowid], score) for rowid, score in ranked]
+        # bm25() is lower for better matches.
+        rows = self._query_all(
+            "SELECT b.title, b.author, b.isbn, -bm25(books_fts) FROM books_fts"
+            " JOIN books b ON b.rowid = books_fts.rowid"
+            " WHERE books_fts MATCH ? ORDER BY bm25(books_fts), books_fts.rowid LIMIT ? OFFSET ?",
+            (self._match(field, tokens), -1 if limit is None else limit, offset)
+        )
+        return [RankedMatch(Book(*row[:3]), row[3]) for row in rows]
+
+    def fuzzy_search(self, field: str, query: str, limit: int = 20) -> list[FuzzyMatch]:
+        if field not in FIELDS:
+            raise ValueError(f"Cannot search by {field}")
+        if not self.fts:
+            return self._fuzzy_scan(field, query, limit)
+        matcher = self._term_matchers()[field]
+
+        def find_terms(token, max_distance):
+            return [(token, 0)] if max_distance == 0 else matcher.find(token, max_distance)
+
+        def matching_docs(groups, count):
+            match = " AND ".join(f"{field}_norm : ({' OR '.join(self._quote(term) for term in terms)})"
+                                 for terms in groups)
+            rows = self._query_all("SELECT rowid FROM books_fts WHERE books_fts MATCH ? ORDER BY rowid LIMIT ?",
+                                   (match, count))
+            return [rowid for (rowid,) in rows]
+
+        ranked = rank_fuzzy(query, find_terms, matching_docs, limit)
+        books = self._books_by_rowid([rowid for rowid, _, _ in ranked])
+        return [FuzzyMatch(books[rowid], score, distance) for rowid, score, distance in ranked]
+
+    def _term_matchers(self) -> dict[str, TermMatcher]:
+        with self._lock:
+            (version,) = self._connection.execute("PRAGMA data_version").fetchone()
+            if self._matchers is None or version != self._data_version:
+                self._matchers = {field: TermMatcher() for field in FIELDS}
+                for term, column in self._connection.execute("SELECT term, col FROM books_vocab WHERE doc > 0"):
+                    self._matchers[column.removesuffix("_norm")].add(term)
+                self._data_version = version
+            return self._matchers
+
+    def _learn_terms(self, book: Book) -> Book:
+        # Keeps the fuzzy vocabularies current with this connection's own
+        # inserts; ``data_version`` only reports other connections' changes.
+        if self._matchers is not None:
+            for field, matcher in self._matchers.items():
+                for term in tokenize(getattr(book, field)):
+                    matcher.add(term)
+        return book
+
+    def _fuzzy_scan(self, field: str, query: str, limit: int) -> list[FuzzyMatch]:
+        ranked = self._scan_index(field).fuzzy(query, limit)
+        books = self._books_by_rowid([rowid for rowid, _, _ in ranked])
+        return [FuzzyMatch(books[rowid], score, distance) for rowid, score, distance in ranked]
+
+    def _scan_index(self, field: str) -> FieldIndex:
+        # Without FTS5 there is no index to query, so index a scan.
+        index = FieldIndex()
+        for rowid, key in self._query_all(f"SELECT rowid, {field}_norm FROM books"):
+            index.add(rowid, key)
+        return index
+
+    def _books_by_rowid(self, rowids: list[int]) -> dict[int, Book]:
+        rows = self._query_all(
+            f"SELECT rowid, title, author, isbn FROM books WHERE rowid IN ({','.join('?' * len(rowids))})", tuple(rowids))
+        return {row[0]: Book(*row[1:]) for row in rows}
+
+    def _match(self, field: str, tokens: list[str]) -> str:
+        # Every token as a prefix of a word in the field's search key.
+        return " AND ".join(f'{field}_norm : {self._quote(token)}*' for token in dict.fromkeys(tokens))
+
+    @staticmethod
+    def _quote(term: str) -> str:
+        return '"' + term.replace('"', '""') + '"'
+
+    def _row(self, book: Book) -> tuple:
+        return (self.key(book.isbn), book.isbn, book.title, book.author, fold(book.title), fold(book.author))
+
+    def _rebuild(self, books: list[Book]):
+        with self._lock:
+            self.clear()
+            self.extend(books)
+
+    def _query_one(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchone()
+
+    def _query_all(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+
+def migrate_json(json_path: str, db_path: str, batch_size: int = 10_000) -> int:
+    """Copy every book from a library.json file into a SQLite catalog, skipping known ISBNs."""
+    catalog = SqliteCatalog(db_path)
+    migrated = 0
+    with open(json_path, 'r', encoding='utf-8') as file:
+        books = iter_books(file)
+        while batch := list(islice(books, batch_size)):
+            migrated += catalog.extend(batch, skip_existing=True)
+    catalog.close()
+    return migrated
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python sqlite_catalog.py <library.json> <library.db>")
+        sys.exit(1)
+    migrated = migrate_json(sys.argv[1], sys.argv[2])
+    print(f"✅ Migrated {migrated} books from {sys.argv[1]} to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections when load tests open many
+    # at once, and each dropped SYN costs a one second retransmit.
+    request_queue_size = 256
+
+
+class StubOpenLibrary:
+    """Local stand-in for openlibrary.org used by load tests and benchmarks.
+
+    Every book title is derived from its ISBN, so any ``ISBN:<x>`` bibkey
+    resolves. ``delay`` adds latency to each response; ``requests`` counts
+    what actually reached the server and ``max_in_flight`` records the peak
+    number of requests being served at once.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path: str, params: dict) -> tuple[int, dict, dict]:
+        if path == "/search.json":
+            query = params.get("q", [""])[0]
+            limit = int(params.get("limit", ["10"])[0])
+            docs = [
+                {"title": f"{query} {i}", "author_name": ["Stub Author"], "isbn": [f"978000000{i:04d}"]}
+                for i in range(limit)
+            ]
+            return 200, {}, {"docs": docs}
+        if path == "/api/books":
+            data = {}
+            for bibkey in params.get("bibkeys", [""])[0].split(","):
+                if bibkey.startswith("ISBN:"):
+                    isbn = bibkey[len("ISBN:"):]
+                    data[bibkey] = {"title": f"Title {isbn}", "authors": [{"name": "Stub Author"}]}
+            return 200, {}, data
+        return 404, {}, {}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this the
+            # client's delayed ACK adds ~40ms to every keep-alive response.
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    url = urlparse(self.path)
+                    status, headers, payload = stub.respond(url.path, parse_qs(url.query))
+                    body = json.dumps(payload).encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
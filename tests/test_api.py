@@ -3,6 +3,7 @@ from fastapi.testclient import TestClient
 import json
 import os
 import tempfile
+import time
 from api import app
 from library import Library
 
@@ -11,6 +12,15 @@ def client():
     """Test client for FastAPI app"""
     return TestClient(app)
 
+def wait_for_job(client, job_id, timeout=30.0):
+    """Poll GET /jobs/{id} until the job is done, has failed or waits to be retried"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed") or "error" in job or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
 @pytest.fixture
 def temp_library_file():
     """Create a temporary library file for testing"""
@@ -24,6 +34,29 @@ def temp_library_file():
     if os.path.exists(temp_file):
         os.unlink(temp_file)
 
+@pytest.fixture
+def jobs(tmp_path):
+    """Library, job queue and workers in a temporary directory, looking books up on a stub"""
+    from contextlib import redirect_stdout
+    from io import StringIO
+    from unittest.mock import patch
+    from job_queue import EnrichmentWorkers, JobQueue
+    from open_library import AsyncOpenLibraryClient
+    from tests.stub_server import StubOpenLibrary
+    
+    with redirect_stdout(StringIO()):
+        library = Library([], file_path=str(tmp_path / "library.json"))
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    with StubOpenLibrary(delay=0.05) as stub:
+        workers = EnrichmentWorkers(library, queue, lambda: AsyncOpenLibraryClient(base_url=stub.url),
+                                    poll_interval=0.05)
+        try:
+            with patch("api.library", library), patch("api.job_queue", queue), patch("api.enrichment", workers):
+                yield library
+        finally:
+            workers.stop()
+    queue.close()
+
 class TestAPIEndpoints:
     
     def test_get_books_empty(self, client):
@@ -44,16 +77,16 @@ class TestAPIEndpoints:
             assert "author" in book
             assert "isbn" in book
     
-    def test_add_book_valid_isbn(self, client):
+    def test_add_book_valid_isbn(self, client, jobs):
         """Test POST /books with valid ISBN"""
         test_isbn = "9782848300443"
         response = client.post("/books", json={"isbn": test_isbn})
         
-        if response.status_code == 200:
-            book = response.json()
-            assert book["isbn"] == test_isbn
-            assert "title" in book
-            assert "author" in book
+        if response.status_code == 202:
+            job = response.json()
+            assert job["isbn"] == test_isbn
+            assert job["status"] == "pending"
+            assert response.headers["location"] == f"/jobs/{job['id']}"
         elif response.status_code == 400:
             # Book might already exist or ISBN might be invalid
             assert "error" in response.json()["detail"].lower() or "already exists" in response.json()["detail"].lower()
@@ -64,24 +97,26 @@ class TestAPIEndpoints:
         assert response.status_code == 400
         assert "detail" in response.json()
     
-    def test_add_book_duplicate_isbn(self, client):
+    def test_add_book_duplicate_isbn(self, client, jobs):
         """Test POST /books with duplicate ISBN"""
         test_isbn = "9782848300443"
         
         # Try to add the same book twice
-        client.post("/books", json={"isbn": test_isbn})
+        first = client.post("/books", json={"isbn": test_isbn})
+        if first.status_code == 202:
+            wait_for_job(client, first.json()["id"])
         response = client.post("/books", json={"isbn": test_isbn})
         
         assert response.status_code == 400
         assert "already exists" in response.json()["detail"].lower()
     
-    def test_delete_book_existing(self, client):
+    def test_delete_book_existing(self, client, jobs):
         """Test DELETE /books/{isbn} with existing book"""
         test_isbn = "9782848300443"
         
         # First add a book
         add_response = client.post("/books", json={"isbn": test_isbn})
-        if add_response.status_code == 200:
+        if add_response.status_code == 202 and wait_for_job(client, add_response.json()["id"])["status"] == "done":
             # Then delete it
             delete_response = client.delete(f"/books/{test_isbn}")
             assert delete_response.status_code == 200
@@ -99,18 +134,51 @@ class TestAPIEndpoints:
         assert response.status_code == 200
         assert isinstance(response.json(), list)
     
+    def test_fuzzy_search_books(self, client):
+        """Test GET /books/search?fuzzy=true ranks close matches with their scores"""
+        response = client.get("/books/search?query=Dikens&search_by=author&fuzzy=true")
+        assert response.status_code == 200
+        results = response.json()
+        assert results[0]["author"] == "Charles Dickens"
+        assert results[0]["distance"] == 1
+        assert 0 < results[0]["score"] < 1
+        
+        plain = client.get("/books/search?query=Dickens&search_by=author&mode=index").json()
+        assert "score" not in plain[0] and "distance" not in plain[0]
+    
+    def test_ranked_search_books(self, client):
+        """Test GET /books/search ranks by relevance and pages with limit/offset"""
+        response = client.get("/books/search?query=Dickens&search_by=author&limit=1")
+        assert response.status_code == 200
+        results = response.json()
+        assert len(results) == 1
+        assert results[0]["author"] == "Charles Dickens"
+        assert results[0]["score"] > 0
+        assert "distance" not in results[0]
+        
+        assert client.get("/books/search?query=Dickens&search_by=author&offset=1000").json() == []
+        assert client.get("/books/search?query=test&limit=0").status_code == 422
+    
     def test_search_books_online(self, client):
-        """Test GET /books/search/online"""
-        response = client.get("/books/search/online?query=python")
+        """Test GET /books/search/online answers from Open Library (a local stub here)"""
+        from api import get_open_library_client
+        from open_library import AsyncOpenLibraryClient
+        from tests.stub_server import StubOpenLibrary
+        
+        with StubOpenLibrary() as stub:
+            async def stub_client():
+                async with AsyncOpenLibraryClient(base_url=stub.url) as stub_client:
+                    yield stub_client
+            
+            app.dependency_overrides[get_open_library_client] = stub_client
+            try:
+                response = client.get("/books/search/online?query=python")
+            finally:
+                app.dependency_overrides.clear()
         assert response.status_code == 200
         results = response.json()
-        assert isinstance(results, list)
-        # If results exist, check structure
-        if results:
-            for book in results[:3]:  # Check first 3 results
-                assert "title" in book
-                assert "author" in book
-                assert "isbn" in book
+        assert len(results) == 10
+        assert results[0] == {"title": "python 0", "author": "Stub Author", "isbn": "9780000000000"}
 
 class TestAPIValidation:
     
@@ -141,7 +209,7 @@ class TestAPIValidation:
 
 class TestAPIIntegration:
     
-    def test_full_book_lifecycle(self, client):
+    def test_full_book_lifecycle(self, client, jobs):
         """Test complete add -> get -> delete cycle"""
         test_isbn = "9782848300443"
         
@@ -152,8 +220,10 @@ class TestAPIIntegration:
             client.delete(f"/books/{test_isbn}")
             add_response = client.post("/books", json={"isbn": test_isbn})
         
-        assert add_response.status_code == 200
-        added_book = add_response.json()
+        assert add_response.status_code == 202
+        job = wait_for_job(client, add_response.json()["id"])
+        assert job["status"] == "done"
+        assert job["book"]["isbn"] == test_isbn
         
         # 2. Verify book is in library
         get_response = client.get("/books")
@@ -176,3 +246,257 @@ class TestAPIIntegration:
         final_search = client.get(f"/books/search?query={test_isbn}&search_by=isbn")
         assert final_search.status_code == 200
         assert len(final_search.json()) == 0
+
+class TestAPIBulk:
+    
+    def test_bulk_add_saves_once(self, client):
+        """Test POST /books/bulk adds every resolved ISBN with a single save"""
+        import asyncio
+        from unittest.mock import patch
+        from api import get_library, get_open_library_client
+        from isbn import with_check_digit
+        from open_library import AsyncOpenLibraryClient
+        from tests.stub_server import StubOpenLibrary
+        
+        library = get_library()
+        isbns = [with_check_digit(f"97899{i:07d}") for i in range(150)]
+        def persist_off_the_loop():
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+        
+        with StubOpenLibrary() as stub, patch.object(library, "persist", side_effect=persist_off_the_loop) as mock_persist:
+            async def stub_client():
+                async with AsyncOpenLibraryClient(base_url=stub.url) as stub_client:
+                    yield stub_client
+            
+            app.dependency_overrides[get_open_library_client] = stub_client
+            try:
+                response = client.post("/books/bulk", json={"isbns": isbns + [isbns[0]]})
+            finally:
+                app.dependency_overrides.clear()
+            requests_made = stub.requests
+        
+        try:
+            assert response.status_code == 200
+            result = response.json()
+            assert len(result["added"]) == 150
+            assert result["duplicates"] == [isbns[0]]
+            assert result["not_found"] == []
+            assert result["unavailable"] == []
+            assert requests_made == 2
+            mock_persist.assert_called_once()
+        finally:
+            for isbn in isbns:
+                library.books.pop_isbn(isbn)
+
+
+
+class TestAPIShared:
+
+    def test_file_lock_is_taken_off_the_event_loop(self, client, tmp_path):
+        """Test handlers of a shared library take the file lock and sync in worker threads"""
+        import asyncio
+        from contextlib import redirect_stdout
+        from io import StringIO
+        from unittest.mock import patch
+        from api import get_open_library_client
+        from book import Book
+        from open_library import AsyncOpenLibraryClient
+        from tests.stub_server import StubOpenLibrary
+
+        with redirect_stdout(StringIO()):
+            library = Library([Book("Dune", "Frank Herbert", "9780441013593")],
+                              file_path=str(tmp_path / "library.json"), shared=True)
+        on_loop = []
+        def recorded(method):
+            def record(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(method.__name__)
+                except RuntimeError:
+                    pass
+                return method(*args, **kwargs)
+            return record
+
+        with StubOpenLibrary() as stub, patch("api.library", library), \
+                patch.object(library, "_changed_on_disk", recorded(library._changed_on_disk)), \
+                patch.object(library, "_sync", recorded(library._sync)):
+            async def stub_client():
+                async with AsyncOpenLibraryClient(base_url=stub.url) as stub_client:
+                    yield stub_client
+
+            app.dependency_overrides[get_open_library_client] = stub_client
+            try:
+                assert client.post("/books/bulk", json={"isbns": ["0-306-40615-2"]}).json()["added"]
+            finally:
+                app.dependency_overrides.clear()
+            assert len(client.get("/books").json()) == 2
+            assert client.get("/books", headers={"Accept": "application/x-ndjson"}).text.count("\n") == 2
+            assert client.get("/books/search?query=dune").json()[0]["isbn"] == "9780441013593"
+            assert client.delete("/books/9780441013593").status_code == 200
+            assert client.post("/books", json={"isbn": "0-306-40615-2"}).status_code == 400
+
+        assert on_loop == []
+        assert [book.isbn for book in Library(file_path=library.file_path)] == ["9780306406157"]
+
+
+class TestAPIJobs:
+    
+    def test_add_book_returns_a_job(self, client, jobs):
+        """Test POST /books answers 202 at once and the job reports the added book"""
+        response = client.post("/books", json={"isbn": "0-306-40615-2"})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "pending"
+        assert "book" not in job
+        
+        job = wait_for_job(client, job["id"])
+        assert job["status"] == "done"
+        assert job["book"] == {"title": "Title 9780306406157", "author": "Stub Author", "isbn": "9780306406157"}
+        assert jobs.get_book("9780306406157") is not None
+        assert os.path.exists(jobs.file_path)
+    
+    def test_add_book_rejects_known_and_invalid_isbns(self, client, jobs):
+        """Test duplicates and invalid ISBNs are refused without queueing a job"""
+        from book import Book
+        
+        jobs.books.append(Book("Number Theory", "Someone", "9780306406157"))
+        assert client.post("/books", json={"isbn": "9780306406157"}).status_code == 400
+        assert client.post("/books", json={"isbn": "1234567890"}).status_code == 400
+        response = client.get("/jobs/1")
+        assert response.status_code == 404
+        assert "not found" in response.json()["detail"].lower()
+
+
+class TestAPIPagination:
+    
+    @pytest.fixture
+    def paged_library(self, tmp_path):
+        from unittest.mock import patch
+        from book import Book
+        
+        books = [Book(f"Title {i}", "Ağaç Yazar", f"97800000{i:05d}") for i in range(250)]
+        library = Library(books, file_path=str(tmp_path / "library.json"))
+        with patch("api.library", library):
+            yield library
+    
+    def test_get_books_pages_with_link_header(self, client, paged_library):
+        """Test GET /books returns a page plus a Link to the next one until the end"""
+        seen = []
+        url = "/books?limit=100"
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen.extend(book["isbn"] for book in response.json())
+            link = response.headers.get("link")
+            url = link[1:link.index(">")] if link else None
+        
+        assert seen == [book.isbn for book in paged_library.books]
+    
+    def test_get_books_default_limit(self, client, paged_library):
+        """Test GET /books without a limit returns the default page size"""
+        response = client.get("/books")
+        assert len(response.json()) == 100
+        assert 'rel="next"' in response.headers["link"]
+    
+    def test_get_books_rejects_bad_limit(self, client, paged_library):
+        """Test limits outside 1..1000 are rejected"""
+        assert client.get("/books?limit=0").status_code == 422
+        assert client.get("/books?limit=1001").status_code == 422
+    
+    def test_get_books_ndjson_stream(self, client, paged_library):
+        """Test Accept: application/x-ndjson streams every book, one per line"""
+        response = client.get("/books", headers={"Accept": "application/x-ndjson"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert len(records) == 250
+        assert records[0] == {"title": "Title 0", "author": "Ağaç Yazar", "isbn": "9780000000000"}
+    
+    def test_get_books_ndjson_from_cursor(self, client, paged_library):
+        """Test the NDJSON stream honours cursor and limit"""
+        _, cursor = paged_library.get_books_page(limit=10)
+        response = client.get(f"/books?cursor={cursor}&limit=5", headers={"Accept": "application/x-ndjson"})
+        
+        isbns = [json.loads(line)["isbn"] for line in response.text.splitlines()]
+        assert isbns == [book.isbn for book in paged_library.books[10:15]]
+
+
+
+class TestAPITransfer:
+    
+    @pytest.fixture
+    def transfer_library(self, tmp_path):
+        """A library in a temporary directory served by the API"""
+        from contextlib import redirect_stdout
+        from io import StringIO
+        from unittest.mock import patch
+        from book import Book
+        
+        with redirect_stdout(StringIO()):
+            library = Library([Book("Tutunamayanlar", "Oğuz Atay", "9789754701159")],
+                              file_path=str(tmp_path / "library.json"))
+        with patch("api.library", library):
+            yield library
+    
+    def test_import_books_streams_csv_and_ndjson(self, client, transfer_library):
+        """Test POST /books/import adds valid records and reports duplicates and invalid ones"""
+        csv_body = "title,author,isbn\nNumber Theory,Someone,0-306-40615-2\nAgain,Oğuz Atay,9789754701159\n"
+        response = client.post("/books/import", content=csv_body.encode("utf-8"),
+                               headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200
+        assert response.json() == {"records": 2, "added": 1, "duplicates": 1, "invalid": 0, "errors": []}
+        
+        def ndjson_body():
+            yield b'{"title": "A Tale of Two Cities", "author": "Dickens", "is'
+            yield b'bn": "0140620230"}\n{"title": "Bad", "author": "X", "isbn": "123"}\n'
+        response = client.post("/books/import?format=ndjson", content=ndjson_body())
+        assert response.json()["added"] == 1
+        assert response.json()["errors"] == ["record 2: Invalid ISBN: '123'"]
+        
+        assert transfer_library.get_book("9780140620238").author == "Dickens"
+        assert len(Library(file_path=transfer_library.file_path).books) == 3
+    
+    def test_import_work_runs_off_the_event_loop(self, client, transfer_library):
+        """Test POST /books/import adds batches and saves in worker threads, not on the event loop"""
+        import asyncio
+        from unittest.mock import patch
+        
+        calls = []
+        def recorded(name, method):
+            def record(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    calls.append((name, "event loop"))
+                except RuntimeError:
+                    calls.append((name, "thread"))
+                return method(*args, **kwargs)
+            return record
+        
+        with patch.object(transfer_library, "import_books", recorded("import_books", transfer_library.import_books)), \
+                patch.object(transfer_library, "persist", recorded("persist", transfer_library.persist)):
+            response = client.post("/books/import?format=ndjson",
+                                   content=b'{"title": "A", "author": "B", "isbn": "0140620230"}\n')
+        assert response.status_code == 200
+        assert calls == [("import_books", "thread"), ("persist", "thread")]
+    
+    def test_import_books_rejects_unknown_formats(self, client, transfer_library):
+        """Test uploads that are neither CSV nor NDJSON, or lack CSV columns, are refused"""
+        assert client.post("/books/import", json=[]).status_code == 415
+        response = client.post("/books/import?format=csv", content=b"title,isbn\nA,0140620230\n")
+        assert response.status_code == 400
+        assert "author" in response.json()["detail"]
+    
+    def test_export_books(self, client, transfer_library):
+        """Test GET /books/export streams every book as NDJSON or CSV"""
+        response = client.get("/books/export")
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert [json.loads(line) for line in response.text.splitlines()] == [
+            {"title": "Tutunamayanlar", "author": "Oğuz Atay", "isbn": "9789754701159"}]
+        
+        response = client.get("/books/export?format=csv")
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="books.csv"' in response.headers["content-disposition"]
+        assert response.text == "title,author,isbn\nTutunamayanlar,Oğuz Atay,9789754701159\n"
+        assert client.get("/books/export?format=xml").status_code == 400
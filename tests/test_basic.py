@@ -36,13 +36,13 @@ class TestBasicFunctionality:
     @patch.object(Library, 'load_books')
     def test_library_add_book(self, mock_load, mock_client_class):
         """Test adding a book to library"""
-        mock_book = Book("Test Book", "Test Author", "1234567890")
+        mock_book = Book("Test Book", "Test Author", "0306406152")
         
         mock_client_instance = mock_client_class.return_value
         mock_client_instance.get_book_by_isbn.return_value = mock_book
         
         library = Library([])
-        library.add_book("1234567890")
+        library.add_book("0306406152")
         
         assert len(library.books) == 1
         assert library.books[0].title == mock_book.title
@@ -53,15 +53,15 @@ class TestBasicFunctionality:
     @patch.object(Library, 'load_books')
     def test_library_unique_isbn_validation(self, mock_load, mock_client):
         """Test ISBN uniqueness validation"""
-        mock_book1 = Book("Book One", "Author One", "1234567890")
-        mock_book2 = Book("Book Two", "Author Two", "1234567890")
+        mock_book1 = Book("Book One", "Author One", "0306406152")
+        mock_book2 = Book("Book Two", "Author Two", "0306406152")
         mock_client.return_value.get_book_by_isbn.side_effect = [mock_book1, mock_book2]
         
         library = Library([])
-        library.add_book("1234567890")
+        library.add_book("0306406152")
         
         with pytest.raises(ValueError, match="ISBN must be unique"):
-            library.add_book("1234567890")
+            library.add_book("0306406152")
     
     @patch('library.OpenLibraryClient')
     @patch.object(Library, 'load_books')
@@ -43,3 +43,17 @@ class TestBook:
         
         # Books are different objects even with same content
         assert book1 is not book2
+    
+    def test_book_is_slotted(self):
+        """Test books carry no per-instance __dict__"""
+        book = Book("Test Title", "Test Author", "1234567890")
+        
+        assert not hasattr(book, "__dict__")
+        with pytest.raises(AttributeError):
+            book.publisher = "Nobody"
+    
+    def test_book_to_dict(self):
+        """Test converting a book to a plain dict"""
+        book = Book("Test Title", "Test Author", "1234567890")
+        
+        assert book.to_dict() == {"title": "Test Title", "author": "Test Author", "isbn": "1234567890"}
@@ -0,0 +1,119 @@
+import pytest
+from unittest.mock import patch
+from book import Book
+from book_store import BookStore, StringColumn
+from catalog import Catalog
+from library import Library
+
+
+def isbns(books):
+    return [book.isbn for book in books]
+
+
+class TestBookStore:
+    """Test cases for the columnar BookStore"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.books = [
+            Book("İki Şehrin Hikayesi", "Charles Dickens", "12312314143"),
+            Book("Oliver Twist", "Charles Dickens", "2222222222"),
+            Book("Tutunamayanlar", "Oğuz Atay", "333333333X"),
+        ]
+    
+    def test_string_column_round_trip(self):
+        """Test packed strings decode back unchanged"""
+        column = StringColumn()
+        for value in ["", "Çakıl'ın Hayatı", "plain"]:
+            column.append(value)
+        
+        assert [column[i] for i in range(len(column))] == ["", "Çakıl'ın Hayatı", "plain"]
+    
+    def test_hands_out_book_views(self):
+        """Test reads build equal but fresh Book objects"""
+        store = BookStore(self.books)
+        
+        book = store.get("333333333x")
+        assert book.to_dict() == self.books[2].to_dict()
+        assert book is not self.books[2]
+        assert self.books[2] in store
+        assert store[1].title == "Oliver Twist"
+        assert store[-1].author == "Oğuz Atay"
+    
+    def test_matches_catalog_behaviour(self):
+        """Test lookups, removals and searches agree with the in-memory Catalog"""
+        store, catalog = BookStore(self.books), Catalog(self.books)
+        
+        for collection in (store, catalog):
+            with pytest.raises(ValueError, match="ISBN must be unique"):
+                collection.append(Book("Dup", "Dup", "2222222222"))
+            collection.pop_isbn("12312314143")
+        
+        assert isbns(store) == isbns(catalog)
+        for field, query, mode in [("author", "charles", "index"), ("title", "twi", "index"),
+                                   ("title", "wist", "substring"), ("author", "atay", "index"),
+                                   ("author", "OĞUZ", "index"), ("author", "guz at", "substring")]:
+            assert isbns(store.search(field, query, mode)) == isbns(catalog.search(field, query, mode))
+    
+    def test_fuzzy_search_matches_catalog(self):
+        """Test typo-tolerant search ranks the same books as the in-memory Catalog"""
+        store, catalog = BookStore(self.books), Catalog(self.books)
+        
+        for field, query in [("author", "charls dikens"), ("title", "olivr"), ("author", "atai")]:
+            expected = [(match.book.isbn, match.score, match.distance) for match in catalog.fuzzy_search(field, query)]
+            assert [(match.book.isbn, match.score, match.distance) for match in store.fuzzy_search(field, query)] == expected
+            assert expected
+    
+    def test_ranked_search_matches_catalog(self):
+        """Test BM25 ranking and paging agree with the in-memory Catalog"""
+        books = self.books + [Book("Charles Dickens: Bir Hayat", "Charles Dickens Dickens", "4444444444")]
+        store, catalog = BookStore(books), Catalog(books)
+        
+        for field, query, limit, offset in [("author", "dickens", None, 0), ("author", "charles dick", 2, 1),
+                                            ("title", "twist", 5, 0), ("author", "oguz", None, 0)]:
+            expected = [(match.book.isbn, match.score) for match in catalog.rank(field, query, limit, offset)]
+            assert [(match.book.isbn, match.score) for match in store.rank(field, query, limit, offset)] == expected
+            assert expected
+        assert isbns(store.search("author", "charles", limit=1, offset=1)) == ["2222222222"]
+    
+    def test_compaction_after_many_removals(self):
+        """Test tombstoned rows are compacted without losing order or indexes"""
+        books = [Book(f"Title {i}", f"Author {i % 3}", str(i)) for i in range(3000)]
+        store = BookStore(books)
+        
+        for i in range(0, 3000, 3):
+            store.pop_isbn(str(i))
+        for i in range(1, 3000, 3):
+            store.pop_isbn(str(i))
+        
+        assert len(store) == 1000
+        assert isbns(store)[:3] == ["2", "5", "8"]
+        assert store[1].isbn == "5"
+        assert isbns(store.search("title", "title 2999")) == ["2999"]
+    
+    @patch('library.OpenLibraryClient')
+    @patch.object(Library, 'load_books')
+    def test_columnar_library(self, mock_load, mock_client_class):
+        """Test a Library can be backed by a BookStore"""
+        library = Library(self.books, columnar=True)
+        
+        assert isinstance(library.books, BookStore)
+        assert library.find_book("dickens", "author")[1].title == "Oliver Twist"
+        
+        with patch('builtins.print'):
+            library.remove_book("2222222222")
+        assert len(library.books) == 2
+    
+    def test_page_cursor_survives_compaction(self):
+        """Test cursors keep pointing at the same place after rows are compacted"""
+        store = BookStore(Book(f"Title {i}", "Author", str(i)) for i in range(3000))
+        
+        page, cursor = store.page(limit=5)
+        for i in range(2000):
+            store.pop_isbn(str(i))
+        
+        page, cursor = store.page(cursor, limit=2)
+        assert isbns(page) == ["2000", "2001"]
+        page, cursor = store.page(cursor, limit=998)
+        assert page[-1].isbn == "2999"
+        assert cursor is None
@@ -0,0 +1,74 @@
+import io
+import json
+import tracemalloc
+import pytest
+from book import Book
+from book_stream import iter_book_records, iter_books, write_books
+
+
+def generate_books(n):
+    for i in range(n):
+        yield Book(f"Title {i} — İki Şehrin Hikayesi", f"Author {i % 97}", f"978{i:010d}")
+
+
+def write_file(path, n):
+    with open(path, 'w', encoding='utf-8') as file:
+        write_books(file, generate_books(n))
+
+
+def peak_while_streaming(path):
+    tracemalloc.start()
+    count = 0
+    with open(path, 'r', encoding='utf-8') as file:
+        for book in iter_books(file):
+            count += 1
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, peak
+
+
+class TestBookStream:
+    """Test cases for the streaming JSON reader and writer"""
+    
+    @pytest.mark.parametrize("chunk_size", [1, 3, 17, 65536])
+    def test_reads_any_chunk_boundary(self, sample_json_data, chunk_size):
+        """Test records split across chunk boundaries are decoded correctly"""
+        for text in (json.dumps(sample_json_data), json.dumps(sample_json_data, indent=4)):
+            records = list(iter_book_records(io.StringIO(text), chunk_size))
+            assert records == sample_json_data
+    
+    def test_empty_array(self):
+        """Test an empty array yields nothing"""
+        assert list(iter_books(io.StringIO(" [\n] "))) == []
+    
+    @pytest.mark.parametrize("text", ['{"title": "x"}', '[{"a": 1} {"b": 2}]', '[{"a": 1},', '[{"a": '])
+    def test_malformed_input(self, text):
+        """Test malformed arrays raise instead of yielding partial data silently"""
+        with pytest.raises(ValueError):
+            list(iter_book_records(io.StringIO(text), 4))
+    
+    def test_writer_matches_json_dump(self, sample_books):
+        """Test the streaming writer produces the same bytes as json.dump"""
+        out = io.StringIO()
+        write_books(out, iter(sample_books))
+        
+        expected = json.dumps([book.to_dict() for book in sample_books], ensure_ascii=False, indent=4)
+        assert out.getvalue() == expected
+        
+        out = io.StringIO()
+        write_books(out, [])
+        assert out.getvalue() == "[]"
+    
+    def test_peak_memory_is_flat(self, tmp_path):
+        """Test peak memory while streaming does not grow with file size"""
+        small, large = tmp_path / "small.json", tmp_path / "large.json"
+        write_file(small, 5_000)
+        write_file(large, 50_000)
+        
+        small_count, small_peak = peak_while_streaming(small)
+        large_count, large_peak = peak_while_streaming(large)
+        
+        assert (small_count, large_count) == (5_000, 50_000)
+        assert large.stat().st_size > 9 * small.stat().st_size
+        assert large_peak < 1.5 * small_peak
+        assert large_peak < large.stat().st_size / 10
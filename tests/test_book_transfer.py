@@ -0,0 +1,147 @@
+import io
+import json
+import tracemalloc
+import pytest
+from contextlib import redirect_stdout
+from io import StringIO
+from book import Book
+from book_transfer import BookImporter, format_for, import_books, iter_export
+from isbn import with_check_digit
+from library import Library
+from main import main
+
+
+def make_books(n):
+    return [Book(f"Title {i}, \"İkinci\" Cilt", f"Author {i % 97}", with_check_digit(f"978{i:09d}")) for i in range(n)]
+
+
+def exported(books, format):
+    return "".join(iter_export(books, format)).encode("utf-8")
+
+
+@pytest.fixture
+def library(tmp_path):
+    """An empty library saving to a temporary file"""
+    with redirect_stdout(StringIO()):
+        return Library([], file_path=str(tmp_path / "library.json"))
+
+
+class TestBookTransfer:
+    """Test cases for the streaming CSV/NDJSON import and export"""
+
+    @pytest.mark.parametrize("format", ["csv", "ndjson"])
+    @pytest.mark.parametrize("chunk_size", [1, 7, 65536])
+    def test_round_trip_any_chunk_boundary(self, library, format, chunk_size):
+        """Test exported books import back unchanged however the bytes are split"""
+        books = make_books(50) + [Book("Çok\nsatırlı \"başlık\"", "Yazar", "9780306406157")]
+        counts = import_books(library, io.BytesIO(exported(books, format)), format, chunk_size)
+
+        assert counts == {"records": 51, "added": 51, "duplicates": 0, "invalid": 0, "errors": []}
+        assert [book.to_dict() for book in library.books] == [book.to_dict() for book in books]
+        assert exported(library, format) == exported(books, format)
+
+    def test_ndjson_export_matches_json_dumps(self):
+        """Test each NDJSON line is what json.dumps writes for the book"""
+        books = make_books(3)
+        lines = exported(books, "ndjson").decode("utf-8").splitlines()
+        assert lines == [json.dumps(book.to_dict(), ensure_ascii=False) for book in books]
+
+    def test_invalid_and_duplicate_records_are_counted(self, library):
+        """Test bad records are skipped with a reason and known ISBNs are not added twice"""
+        library.books.append(Book("Known", "Someone", "9780306406157"))
+        text = ("﻿ISBN,Title,Author,Year\n"
+                "0-306-40615-2,Again,Someone,1999\n"
+                "1234567890,Bad,Checksum,2000\n"
+                "0140620230,New,Writer,2001\n"
+                "978-0-14-062023-8,Repeat,Writer,2001\n"
+                "9781402894626,Short row\n")
+        importer = BookImporter(library, "csv", batch_size=2)
+        importer.feed(text.encode("utf-8"))
+        counts = importer.close()
+
+        assert counts["records"] == 5
+        assert (counts["added"], counts["duplicates"], counts["invalid"]) == (1, 2, 2)
+        assert counts["errors"] == ["record 2: Invalid ISBN: '1234567890'",
+                                    "record 5: needs string fields title, author, isbn"]
+        assert library.get_book("0140620230").to_dict() == {"title": "New", "author": "Writer",
+                                                            "isbn": "9780140620238"}
+        with redirect_stdout(StringIO()):
+            assert len(Library(file_path=library.file_path).books) == 2
+
+    def test_malformed_ndjson_lines_are_invalid(self, library):
+        """Test lines that are not JSON objects with string fields are rejected one by one"""
+        text = '{"title": "A", "author": "B", "isbn": "9780306406157"}\n{broken\n[1, 2]\n\n{"title": "C"}\n'
+        counts = import_books(library, io.BytesIO(text.encode("utf-8")), "ndjson")
+
+        assert (counts["records"], counts["added"], counts["invalid"]) == (4, 1, 3)
+        assert counts["errors"][0].startswith("record 2: invalid JSON")
+
+    def test_csv_without_required_columns(self, library):
+        """Test a CSV header lacking a required column is refused"""
+        with pytest.raises(ValueError, match="missing isbn"):
+            import_books(library, io.BytesIO(b"title,author\nA,B\n"), "csv")
+
+    def test_unbalanced_quote_is_refused(self, library):
+        """Test a CSV quote left open stops the import once the pending record grows too long"""
+        importer = BookImporter(library, "csv", max_record_size=1000)
+        importer.feed(b'title,author,isbn\n"Open,C,0140620230\n')
+        fed = 0
+        with pytest.raises(ValueError, match="longer than 1000 characters"):
+            for i in range(1000):
+                importer.feed(f"Title {i},Author,{with_check_digit(f'978{i:09d}')}\n".encode())
+                fed += 1
+        assert fed < 50
+
+    def test_import_memory_does_not_grow_with_the_upload(self, tmp_path):
+        """Test only a batch of records is held while a large upload is parsed"""
+        def peak(n):
+            with redirect_stdout(StringIO()):
+                library = Library([], file_path=str(tmp_path / f"library-{n}.json"))
+            data = exported(make_books(n), "ndjson")
+            # Discard the books as they are added so only the importer is measured.
+            library.import_books = lambda books, batch_size, persist: len(list(books))
+            library.persist = lambda: None
+            importer = BookImporter(library, "ndjson", batch_size=500)
+            tracemalloc.start()
+            for start in range(0, len(data), 4096):
+                importer.feed(data[start:start + 4096])
+            importer.close()
+            result = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result
+
+        small = peak(5_000)
+        assert peak(20_000) < small * 1.5
+
+    def test_format_for(self):
+        """Test formats are recognised from media types and file names"""
+        assert format_for("text/csv; charset=utf-8") == "csv"
+        assert format_for("application/x-ndjson") == "ndjson"
+        assert format_for("export.JSONL") == "ndjson"
+        assert format_for("books.json") is None
+        assert format_for(None) is None
+
+    def test_import_and_export_commands(self, tmp_path):
+        """Test the import and export entry points move books between files and the library"""
+        source, target = tmp_path / "books.csv", tmp_path / "books.ndjson"
+        source.write_bytes(exported(make_books(20), "csv"))
+        file_path = str(tmp_path / "library.json")
+
+        output = StringIO()
+        with redirect_stdout(output):
+            main(["import", str(source), "--library", file_path])
+            main(["export", str(target), "--library", file_path])
+        assert "Imported 20 of 20 records" in output.getvalue()
+        assert target.read_bytes() == exported(make_books(20), "ndjson")
+
+    @pytest.mark.parametrize("storage", ["sqlite", "snapshot"])
+    def test_commands_default_library_per_storage(self, tmp_path, monkeypatch, storage):
+        """Test import and export without --library use the storage mode's own file"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "books.csv").write_bytes(exported(make_books(5), "csv"))
+
+        with redirect_stdout(StringIO()):
+            main(["import", "books.csv", "--storage", storage])
+            main(["export", "books.ndjson", "--storage", storage])
+        assert not (tmp_path / "library.json").exists()
+        assert (tmp_path / "books.ndjson").read_bytes() == exported(make_books(5), "ndjson")
@@ -0,0 +1,124 @@
+import pytest
+from cache import MISSING, MemoryCache, SqliteCache
+from open_library import OpenLibraryClient, OpenLibraryUnavailable
+from retry import RetryPolicy
+from tests.stub_server import StubOpenLibrary
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    """Factory building each cache backend with a controllable clock"""
+    def factory(**kwargs):
+        if request.param == "memory":
+            return MemoryCache(**kwargs)
+        return SqliteCache(str(tmp_path / "cache.db"), **kwargs)
+    return factory
+
+
+class TestCacheBackends:
+    """Behaviour shared by the memory and sqlite caches"""
+    
+    def test_hit_and_miss(self, make_cache):
+        """Test stored values are returned and counted as hits"""
+        cache = make_cache()
+        
+        assert cache.get("isbn:1") is MISSING
+        cache.set("isbn:1", {"title": "T", "author": "A", "isbn": "1"})
+        
+        assert cache.get("isbn:1") == {"title": "T", "author": "A", "isbn": "1"}
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+    
+    def test_lru_eviction(self, make_cache):
+        """Test the least recently used entry is evicted past max_size"""
+        clock = FakeClock()
+        cache = make_cache(max_size=2, clock=clock)
+        
+        cache.set("a", 1)
+        clock.now += 1
+        cache.set("b", 2)
+        clock.now += 1
+        cache.get("a")
+        clock.now += 1
+        cache.set("c", 3)
+        
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats.evictions == 1
+        assert len(cache) == 2
+    
+    def test_ttl_and_negative_ttl(self, make_cache):
+        """Test not-found entries expire on their own, shorter TTL"""
+        clock = FakeClock()
+        cache = make_cache(ttl=100, negative_ttl=10, clock=clock)
+        
+        cache.set("found", [1])
+        cache.set("missing", None)
+        assert cache.get("missing") is None
+        assert cache.stats.negative_hits == 1
+        
+        clock.now += 11
+        assert cache.get("missing") is MISSING
+        assert cache.get("found") == [1]
+        
+        clock.now += 100
+        assert cache.get("found") is MISSING
+        assert cache.stats.expirations == 2
+
+
+class TestSqliteCache:
+    
+    def test_survives_restart(self, tmp_path):
+        """Test entries written by one SqliteCache are read by the next"""
+        path = str(tmp_path / "cache.db")
+        cache = SqliteCache(path)
+        cache.set("isbn:1", {"title": "T", "author": "A", "isbn": "1"})
+        cache.close()
+        
+        reopened = SqliteCache(path)
+        assert len(reopened) == 1
+        assert reopened.get("isbn:1")["title"] == "T"
+        reopened.close()
+
+
+class TestCachedClient:
+    
+    def test_repeated_lookups_use_cache(self):
+        """Test the client answers repeated lookups without the network"""
+        cache = MemoryCache()
+        with StubOpenLibrary() as stub, OpenLibraryClient(base_url=stub.url, cache=cache) as client:
+            first = client.get_book_by_isbn("9780140620238")
+            second = client.get_book_by_isbn("9780140620238")
+            client.search_books("dickens", limit=2)
+            client.search_books("dickens", limit=2)
+            books = client.get_books_by_isbns(["9780140620238", "9780000000002"])
+            requests_made = stub.requests
+        
+        assert requests_made == 3
+        assert first is not second
+        assert second.title == first.title
+        assert books["9780000000002"].title == "Title 9780000000002"
+        assert cache.stats.hits == 3
+    
+    def test_not_found_is_negative_cached(self):
+        """Test misses are cached but transient errors are not"""
+        cache = MemoryCache()
+        with StubOpenLibrary() as stub, OpenLibraryClient(base_url=stub.url, cache=cache) as client:
+            stub.respond = lambda path, params: (200, {}, {})
+            assert client.get_book_by_isbn("1111111111") is None
+            assert client.get_book_by_isbn("1111111111") is None
+            assert stub.requests == 1
+        
+        with OpenLibraryClient(base_url="http://127.0.0.1:9", cache=cache, retry=RetryPolicy(base_delay=0)) as client:
+            with pytest.raises(OpenLibraryUnavailable):
+                client.get_book_by_isbn("2222222222")
+        assert cache.get("isbn:2222222222") is MISSING
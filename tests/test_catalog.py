@@ -0,0 +1,101 @@
+import pytest
+from book import Book
+from catalog import Catalog
+
+
+class TestCatalog:
+    """Test cases for the ISBN-indexed Catalog"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.book1 = Book("Book One", "Author One", "1111111111")
+        self.book2 = Book("Book Two", "Author Two", "2222222222")
+        self.book3 = Book("Book Three", "Author Three", "333333333X")
+    
+    def test_keeps_insertion_order(self):
+        """Test that iteration and indexing follow insertion order"""
+        catalog = Catalog([self.book1, self.book2, self.book3])
+        
+        assert list(catalog) == [self.book1, self.book2, self.book3]
+        assert catalog[0] is self.book1
+        assert catalog[-1] is self.book3
+        assert catalog[1:] == [self.book2, self.book3]
+        assert len(catalog) == 3
+    
+    def test_lookup_by_isbn(self):
+        """Test O(1) lookup is case-insensitive on the ISBN"""
+        catalog = Catalog([self.book1, self.book3])
+        
+        assert catalog.get("1111111111") is self.book1
+        assert catalog.get("333333333x") is self.book3
+        assert catalog.get("9999999999") is None
+        assert catalog.has_isbn("1111111111")
+    
+    def test_append_duplicate_isbn(self):
+        """Test appending a second book with the same ISBN raises error"""
+        catalog = Catalog([self.book1])
+        
+        with pytest.raises(ValueError, match="ISBN must be unique"):
+            catalog.append(Book("Other", "Other", "1111111111"))
+        assert len(catalog) == 1
+    
+    def test_membership_is_identity_based(self):
+        """Test that a different book sharing an ISBN is not a member"""
+        catalog = Catalog([self.book1])
+        
+        assert self.book1 in catalog
+        assert Book("Book One", "Author One", "1111111111") not in catalog
+    
+    def test_pop_isbn(self):
+        """Test removing by ISBN keeps the remaining order"""
+        catalog = Catalog([self.book1, self.book2, self.book3])
+        
+        assert catalog.pop_isbn("2222222222") is self.book2
+        assert catalog.pop_isbn("2222222222") is None
+        assert list(catalog) == [self.book1, self.book3]
+    
+    def test_list_mutations(self):
+        """Test list-style mutations keep the index in sync"""
+        catalog = Catalog([self.book1, self.book2])
+        
+        catalog.insert(0, self.book3)
+        assert list(catalog) == [self.book3, self.book1, self.book2]
+        
+        catalog.remove(self.book1)
+        assert not catalog.has_isbn("1111111111")
+        
+        del catalog[0]
+        assert list(catalog) == [self.book2]
+        
+        catalog.clear()
+        assert len(catalog) == 0
+        assert catalog.get("2222222222") is None
+    
+    def test_pages_follow_insertion_order(self):
+        """Test paging walks the catalog in order and ends with a None cursor"""
+        catalog = Catalog([self.book1, self.book2, self.book3])
+        
+        page, cursor = catalog.page(limit=2)
+        assert page == [self.book1, self.book2]
+        page, cursor = catalog.page(cursor, limit=2)
+        assert page == [self.book3]
+        assert cursor is None
+    
+    def test_page_cursor_survives_removals(self):
+        """Test a cursor stays valid when books before, at and after it change"""
+        books = [Book(f"Title {i}", "Author", str(i)) for i in range(3000)]
+        catalog = Catalog(books)
+        
+        page, cursor = catalog.page(limit=10)
+        catalog.pop_isbn("9")
+        catalog.pop_isbn("0")
+        catalog.pop_isbn("10")
+        for i in range(11, 2500):
+            catalog.pop_isbn(str(i))
+        catalog.append(Book("Late", "Author", "late"))
+        
+        page, cursor = catalog.page(cursor, limit=3)
+        assert [book.isbn for book in page] == ["2500", "2501", "2502"]
+        rest, cursor = catalog.page(cursor, limit=1000)
+        assert rest[-1].isbn == "late"
+        assert cursor is None
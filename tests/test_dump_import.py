@@ -0,0 +1,147 @@
+import gzip
+import json
+from contextlib import redirect_stdout
+from io import StringIO
+import pytest
+from book import Book
+from isbn import with_check_digit
+from dump_import import import_dump, iter_chunks, iter_dump_books, load_authors
+from library import Library
+from main import main
+
+
+def write_dump(path, records):
+    """Write records the way Open Library dumps them: gzip TSV with a JSON column"""
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        for record in records:
+            file.write(f"{record['type']['key']}\t{record['key']}\t1\t2024-01-01T00:00:00\t"
+                       f"{json.dumps(record, ensure_ascii=False)}\n")
+    return str(path)
+
+
+def author(key, name):
+    return {"type": {"key": "/type/author"}, "key": key, "name": name}
+
+
+def edition(key, title, isbns=None, authors=(), **fields):
+    record = {"type": {"key": "/type/edition"}, "key": key, "title": title,
+              "authors": [{"key": author_key} for author_key in authors], **fields}
+    record.update(isbns or {})
+    return record
+
+
+@pytest.fixture
+def dump(tmp_path):
+    """A small generated editions/authors dump pair"""
+    authors = write_dump(tmp_path / "authors.txt.gz", [
+        author("/authors/OL1A", "Oğuz Atay"),
+        author("/authors/OL2A", "Charles Dickens"),
+        {"type": {"key": "/type/redirect"}, "key": "/authors/OL3A", "location": "/authors/OL2A"},
+    ])
+    editions = write_dump(tmp_path / "editions.txt.gz", [
+        edition("/books/OL1M", "Tutunamayanlar", {"isbn_13": ["978-975-470-115-9"]}, ["/authors/OL1A"]),
+        edition("/books/OL2M", "Oliver Twist", {"isbn_10": ["0141439742"]}, ["/authors/OL2A"], subtitle="Or the Parish Boy's Progress"),
+        edition("/books/OL3M", "No ISBN", {}, ["/authors/OL2A"]),
+        edition("/books/OL4M", "Anonymous", {"isbn_13": ["9780000000019"]}, ["/authors/OL9A"], by_statement="by a Lady"),
+        edition("/books/OL5M", "Orphan", {"isbn_13": ["9780000000026"]}),
+        edition("/books/OL6M", "Tutunamayanlar (reprint)", {"isbn_10": ["975-470-115-6"]}, ["/authors/OL1A"]),
+    ])
+    return editions, authors
+
+
+def generated_dump(tmp_path, n):
+    authors = write_dump(tmp_path / "many_authors.txt.gz",
+                         [author(f"/authors/OL{i}A", f"Author {i}") for i in range(50)])
+    editions = write_dump(tmp_path / "many_editions.txt.gz", [
+        edition(f"/books/OL{i}M", f"Book {i}", {"isbn_13": [with_check_digit(f"978{i:09d}")]}, [f"/authors/OL{i % 50}A"])
+        for i in range(n)
+    ])
+    return editions, authors
+
+
+class TestDumpParsing:
+    """Test cases for parsing Open Library dump files"""
+
+    def test_chunks_end_on_line_boundaries(self, dump):
+        """Test every chunk holds whole lines however small the chunk size"""
+        editions, _ = dump
+        with gzip.open(editions, 'rb') as file:
+            chunks = list(iter_chunks(file, chunk_bytes=100))
+        with gzip.open(editions, 'rb') as file:
+            assert b"".join(chunks) == file.read()
+        assert len(chunks) > 1
+        assert all(chunk.endswith(b"\n") for chunk in chunks)
+
+    def test_authors_are_resolved(self, dump):
+        """Test author keys map to names and editions without an ISBN are dropped"""
+        editions, authors_path = dump
+        authors = load_authors(authors_path, workers=1)
+        books = list(iter_dump_books(editions, authors, workers=1))
+
+        assert authors == {"/authors/OL1A": "Oğuz Atay", "/authors/OL2A": "Charles Dickens"}
+        assert [book.to_dict() for book in books] == [
+            {"title": "Tutunamayanlar", "author": "Oğuz Atay", "isbn": "9789754701159"},
+            {"title": "Oliver Twist: Or the Parish Boy's Progress", "author": "Charles Dickens", "isbn": "9780141439747"},
+            {"title": "Anonymous", "author": "by a Lady", "isbn": "9780000000019"},
+            {"title": "Orphan", "author": "Unknown Author", "isbn": "9780000000026"},
+            {"title": "Tutunamayanlar (reprint)", "author": "Oğuz Atay", "isbn": "9789754701159"},
+        ]
+
+    def test_process_pool_matches_serial_parse(self, tmp_path):
+        """Test parsing across processes yields the same books in dump order"""
+        editions, authors_path = generated_dump(tmp_path, 2000)
+        authors = load_authors(authors_path, workers=2, chunk_bytes=512)
+
+        serial = [book.to_dict() for book in iter_dump_books(editions, authors, workers=1)]
+        parallel = [book.to_dict() for book in iter_dump_books(editions, authors, workers=2, chunk_bytes=4096)]
+
+        assert len(authors) == 50
+        assert parallel == serial
+        assert len(serial) == 2000
+        assert serial[7] == {"title": "Book 7", "author": "Author 7", "isbn": with_check_digit("978000000007")}
+
+
+class TestImportDump:
+    """Test cases for bulk loading a dump into a library"""
+
+    @pytest.mark.parametrize("storage", ["json", "journal", "sqlite"])
+    def test_import_into_library(self, tmp_path, dump, storage):
+        """Test imported books are stored, skipping ISBNs already present"""
+        editions, authors = dump
+        file_path = str(tmp_path / ("library.db" if storage == "sqlite" else "library.json"))
+        with redirect_stdout(StringIO()):
+            library = Library(file_path=file_path, storage=storage)
+            assert library.import_books([Book("Oliver Twist", "Dickens", "0141439742")]) == 1
+            counts = import_dump(library, editions, authors, workers=1)
+            reloaded = Library(file_path=file_path, storage=storage)
+
+        assert counts == {"editions": 5, "added": 3, "skipped": 2, "authors": 2}
+        assert len(reloaded.books) == 4
+        assert reloaded.get_book("9789754701159").author == "Oğuz Atay"
+        assert reloaded.get_book("0141439742").author == "Dickens"
+
+    def test_import_dump_command(self, tmp_path):
+        """Test the import-dump entry point loads a dump with a process pool"""
+        editions, authors = generated_dump(tmp_path, 500)
+        file_path = str(tmp_path / "library.json")
+
+        output = StringIO()
+        with redirect_stdout(output):
+            main(["import-dump", editions, "--authors", authors, "--library", file_path, "--workers", "2"])
+            library = Library(file_path=file_path)
+
+        assert "Imported 500 of 500 editions" in output.getvalue()
+        assert len(library.books) == 500
+        assert library.get_book(with_check_digit("978000000123")).author == "Author 23"
+
+    def test_import_dump_command_default_library_per_storage(self, tmp_path, monkeypatch):
+        """Test import-dump without --library uses the storage mode's own file"""
+        editions, authors = generated_dump(tmp_path, 20)
+        monkeypatch.chdir(tmp_path)
+
+        with redirect_stdout(StringIO()):
+            main(["import-dump", editions, "--authors", authors, "--storage", "sqlite", "--workers", "1"])
+            library = Library(file_path="library.db", storage="sqlite")
+
+        assert not (tmp_path / "library.json").exists()
+        assert len(library.books) == 20
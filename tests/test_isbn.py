@@ -0,0 +1,91 @@
+from contextlib import redirect_stdout
+from io import StringIO
+import pytest
+from book import Book
+from catalog import Catalog
+from isbn import InvalidISBN, isbn_key, normalize_isbn, normalize_isbns, to_isbn13, with_check_digit
+from library import Library
+from open_library import OpenLibraryClient
+from tests.stub_server import StubOpenLibrary
+
+
+class TestIsbnNormalization:
+    """Test cases for ISBN validation and canonicalization"""
+
+    @pytest.mark.parametrize("value", [
+        "9780306406157", "978-0-306-40615-7", "978 0 306 40615 7", "978‑0–306–40615‒7",
+        "0306406152", "0-306-40615-2", " 0 306 40615 2\t",
+    ])
+    def test_spellings_share_one_isbn13(self, value):
+        """Test hyphenated, spaced and ISBN-10 spellings all map to the same ISBN-13"""
+        assert to_isbn13(value) == "9780306406157"
+
+    def test_isbn10_with_x_check_digit(self):
+        """Test an X check digit is accepted in either case"""
+        assert to_isbn13("080442957X") == "9780804429573"
+        assert to_isbn13("080442957x") == "9780804429573"
+
+    @pytest.mark.parametrize("value", [
+        "", "1234567890", "9780306406158", "0306406153", "978030640615", "97803064061577",
+        "9770306406157", "978030640615X", "X306406152", "abcdefghij",
+    ])
+    def test_invalid_values(self, value):
+        """Test bad checksums, lengths, prefixes and characters are rejected"""
+        assert to_isbn13(value) is None
+        with pytest.raises(InvalidISBN, match="Invalid ISBN"):
+            normalize_isbn(value)
+
+    def test_check_digit(self):
+        """Test the computed check digit makes a valid ISBN-13"""
+        assert with_check_digit("978030640615") == "9780306406157"
+        assert to_isbn13(with_check_digit("979123456789")) == with_check_digit("979123456789")
+
+    def test_keys(self):
+        """Test valid ISBNs key by ISBN-13 and anything else by its cleaned text"""
+        assert isbn_key("0-306-40615-2") == Catalog.key("9780306406157") == "9780306406157"
+        assert isbn_key("ABC-12") == "abc12"
+
+    def test_bulk_matches_single(self):
+        """Test normalize_isbns agrees with to_isbn13 item by item"""
+        values = ["9780306406157", "978-0-306-40615-7", "0306406152", "080442957X", "", "bad",
+                  "9780306406158", "a\0b", "979-12-345-6789-" + with_check_digit("979123456789")[-1]]
+        assert normalize_isbns(values) == [to_isbn13(value) for value in values]
+        assert normalize_isbns([]) == []
+
+
+class TestCanonicalKeying:
+    """Test cases for libraries and clients using canonical ISBNs"""
+
+    def test_library_treats_spellings_as_one_book(self):
+        """Test an ISBN-10 and its ISBN-13 are the same book in the catalog"""
+        library = Library([Book("Number Theory", "Someone", "0-306-40615-2")])
+        assert library.get_book("9780306406157").title == "Number Theory"
+        with pytest.raises(ValueError, match="ISBN must be unique"):
+            library.add_book("978-0-306-40615-7")
+
+    def test_invalid_isbns_never_reach_open_library(self, tmp_path):
+        """Test add_book raises and add_books reports invalid ISBNs without requests"""
+        with StubOpenLibrary() as stub, OpenLibraryClient(base_url=stub.url) as client:
+            with redirect_stdout(StringIO()):
+                library = Library(file_path=str(tmp_path / "library.json"))
+                library.open_library_client = client
+                with pytest.raises(InvalidISBN):
+                    library.add_book("1234567890")
+                result = library.add_books(["0306406152", "9780306406157", "1234567890"])
+            requests = stub.requests
+
+        assert requests == 1
+        assert [book.isbn for book in result["added"]] == ["9780306406157"]
+        assert result["duplicates"] == ["9780306406157"]
+        assert result["invalid"] == ["1234567890"]
+
+    def test_client_coalesces_spellings(self):
+        """Test the client looks up each canonical ISBN once and answers per spelling"""
+        with StubOpenLibrary() as stub, OpenLibraryClient(base_url=stub.url) as client:
+            books = client.get_books_by_isbns(["0140620230", "978-0-14-062023-8", "bogus"])
+            assert client.get_book_by_isbn("bogus") is None
+            requests = stub.requests
+
+        assert requests == 1
+        assert books["0140620230"].isbn == books["978-0-14-062023-8"].isbn == "9780140620238"
+        assert books["bogus"] is None
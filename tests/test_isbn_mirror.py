@@ -0,0 +1,190 @@
+import asyncio
+from contextlib import redirect_stdout
+from io import StringIO
+import pytest
+from book import Book
+from isbn import with_check_digit
+from isbn_mirror import IsbnMirror, write_mirror
+from library import Library
+from main import main
+from open_library import AsyncOpenLibraryClient, OpenLibraryClient, OpenLibraryUnavailable
+from tests.stub_server import StubOpenLibrary
+from tests.test_dump_import import generated_dump
+
+
+def isbn(i):
+    return with_check_digit(f"978{i:09d}")
+
+
+def make_books(n):
+    return [Book(f"Title {i}", f"Author {i % 7}", isbn(i)) for i in range(n)]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """A mirror file holding 1000 books"""
+    path = str(tmp_path / "isbn_mirror.bin")
+    write_mirror(path, reversed(make_books(1000)))
+    mirror = IsbnMirror(path)
+    yield mirror
+    mirror.close()
+
+
+@pytest.fixture
+def stub():
+    """Local Open Library stub server"""
+    with StubOpenLibrary() as server:
+        yield server
+
+
+class TestIsbnMirror:
+    """Test cases for the mmap-backed ISBN mirror"""
+
+    def test_lookup(self, mirror):
+        """Test every stored ISBN is found by binary search and others are not"""
+        assert len(mirror) == 1000
+        for i in (0, 1, 499, 999):
+            assert mirror.get(isbn(i)).to_dict() == {
+                "title": f"Title {i}", "author": f"Author {i % 7}", "isbn": isbn(i)}
+        assert mirror.get("9789999999991") is None
+        assert mirror.get("0") is None
+        assert (mirror.hits, mirror.misses) == (4, 2)
+
+    def test_unicode_and_duplicates(self, tmp_path):
+        """Test non-ASCII fields round-trip and the first book per ISBN wins"""
+        path = str(tmp_path / "mirror.bin")
+        count = write_mirror(path, [Book("Tutunamayanlar", "Oğuz Atay", "978975470115X"),
+                                    Book("Duplicate", "Nobody", "978975470115x")])
+        with redirect_stdout(StringIO()):
+            mirror = IsbnMirror(path)
+
+        assert count == 1
+        assert mirror.get("978975470115x").author == "Oğuz Atay"
+        assert mirror.get("978975470115X").isbn == "978975470115X"
+        mirror.close()
+
+    def test_empty_and_missing_file(self, tmp_path):
+        """Test a mirror can start from nothing and from an empty file"""
+        path = str(tmp_path / "mirror.bin")
+        mirror = IsbnMirror(path)
+        assert len(mirror) == 0
+        assert mirror.get(isbn(1)) is None
+        mirror.close()
+
+        write_mirror(path, [])
+        mirror = IsbnMirror(path)
+        assert len(mirror) == 0
+        mirror.close()
+
+    def test_write_back_survives_reopen_and_compaction(self, mirror, tmp_path):
+        """Test added books are logged, reloaded on open and folded in by compact"""
+        path = mirror.path
+        mirror.add(Book("New", "Someone", "9781111111113"))
+        mirror.add(Book("Ignored", "Someone", isbn(5)))
+        mirror.close()
+        with open(f"{path}.log", "a") as log:
+            log.write('{"title": "Torn')
+
+        reopened = IsbnMirror(path)
+        assert len(reopened) == 1001
+        assert reopened.get("9781111111113").title == "New"
+        assert reopened.get(isbn(5)).title == "Title 5"
+
+        reopened.compact()
+        assert reopened.get("9781111111113").title == "New"
+        assert [book.isbn for book in reopened] == sorted(book.isbn for book in reopened)
+        reopened.close()
+        reopened = IsbnMirror(path)
+        assert len(reopened) == 1001
+        reopened.close()
+        with open(f"{path}.log") as log:
+            assert log.read() == ""
+
+    def test_compacts_on_its_own(self, tmp_path):
+        """Test the log is folded in once it holds compact_every books"""
+        mirror = IsbnMirror(str(tmp_path / "mirror.bin"), compact_every=10)
+        for book in make_books(25):
+            mirror.add(book)
+
+        assert len(mirror) == 25
+        assert len(mirror._added) == 5
+        assert all(mirror.get(book.isbn).title == book.title for book in make_books(25))
+        mirror.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test opening something that is not a mirror fails loudly"""
+        path = tmp_path / "library.json"
+        path.write_text("[" + " " * 100 + "]")
+        with pytest.raises(ValueError, match="not an ISBN mirror"):
+            IsbnMirror(str(path))
+
+
+class TestMirrorClient:
+    """Test cases for Open Library clients backed by a mirror"""
+
+    def test_mirror_is_checked_before_the_network(self, mirror, stub):
+        """Test mirrored ISBNs are served locally and misses are written back"""
+        with OpenLibraryClient(base_url=stub.url, mirror=mirror) as client:
+            assert client.get_book_by_isbn(isbn(42)).title == "Title 42"
+            assert stub.requests == 0
+            assert client.get_book_by_isbn("9781111111113").title == "Title 9781111111113"
+            assert stub.requests == 1
+            assert client.get_book_by_isbn("9781111111113").title == "Title 9781111111113"
+            assert stub.requests == 1
+
+            books = client.get_books_by_isbns([isbn(1), "9781111111113", "9782222222224"])
+            assert stub.requests == 2
+            assert sorted(books) == [isbn(1), "9781111111113", "9782222222224"]
+
+        assert mirror.get("9782222222224").title == "Title 9782222222224"
+
+    def test_async_client_uses_mirror(self, mirror, stub):
+        """Test the async client reads from and writes back to the mirror"""
+        async def run():
+            async with AsyncOpenLibraryClient(base_url=stub.url, mirror=mirror) as client:
+                return await client.get_book_by_isbn(isbn(7)), await client.get_book_by_isbn("9783333333335")
+
+        mirrored, fetched = asyncio.run(run())
+        assert mirrored.title == "Title 7"
+        assert fetched.title == "Title 9783333333335"
+        assert stub.requests == 1
+        assert "9783333333335" in mirror
+
+    def test_offline_mode_never_calls_the_network(self, mirror, stub):
+        """Test offline clients answer from the mirror and report everything else unavailable"""
+        with OpenLibraryClient(base_url=stub.url, mirror=mirror, offline=True) as client:
+            assert client.get_book_by_isbn(isbn(42)).title == "Title 42"
+            with pytest.raises(OpenLibraryUnavailable, match="Offline"):
+                client.get_book_by_isbn("9781111111113")
+            with pytest.raises(OpenLibraryUnavailable, match="Offline"):
+                client.search_books("dickens")
+            with redirect_stdout(StringIO()):
+                books = client.get_books_by_isbns([isbn(1), "9781111111113"])
+
+        assert list(books) == [isbn(1)]
+        assert stub.requests == 0
+
+    def test_offline_library_adds_from_mirror(self, mirror, tmp_path):
+        """Test an air-gapped Library adds mirrored books and reports the rest unavailable"""
+        with redirect_stdout(StringIO()):
+            library = Library(file_path=str(tmp_path / "library.json"), mirror=mirror, offline=True)
+            library.add_book(isbn(3))
+            with pytest.raises(OpenLibraryUnavailable):
+                library.add_book("9781111111113")
+            result = library.add_books([isbn(4), "9781111111113"])
+
+        assert [book.isbn for book in library.books] == [isbn(3), isbn(4)]
+        assert result["unavailable"] == ["9781111111113"]
+
+    def test_build_mirror_command(self, tmp_path):
+        """Test build-mirror turns an editions dump into a mirror file"""
+        editions, authors = generated_dump(tmp_path, 300)
+        output = str(tmp_path / "isbn_mirror.bin")
+
+        with redirect_stdout(StringIO()) as printed:
+            main(["build-mirror", editions, "--authors", authors, "--output", output, "--workers", "1"])
+
+        mirror = IsbnMirror(output)
+        assert "Wrote 300 books" in printed.getvalue()
+        assert mirror.get(isbn(123)).to_dict() == {"title": "Book 123", "author": "Author 23", "isbn": isbn(123)}
+        mirror.close()
@@ -0,0 +1,142 @@
+import time
+import pytest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+from book import Book
+from job_queue import DONE, FAILED, PENDING, RUNNING, EnrichmentWorkers, JobQueue
+from library import Library
+from open_library import AsyncOpenLibraryClient
+from retry import RetryPolicy
+from tests.stub_server import StubOpenLibrary
+
+
+def wait_for(queue, job_id, timeout=10.0):
+    """Poll a job until it has left the pending/running states"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.status in (DONE, FAILED) or (job.status == PENDING and job.error):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {queue.get(job_id).status}")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """A job queue in a temporary database"""
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def library(tmp_path):
+    """An empty library saving to a temporary file"""
+    with redirect_stdout(StringIO()):
+        return Library([], file_path=str(tmp_path / "library.json"))
+
+
+class TestJobQueue:
+    """Test cases for the durable ingestion queue"""
+
+    def test_jobs_move_through_their_states(self, queue):
+        """Test jobs are claimed oldest first and keep their outcome"""
+        first, second = queue.submit("9780306406157"), queue.submit("0140620230")
+        assert queue.get(first.id).status == PENDING
+
+        claimed = queue.claim()
+        assert (claimed.id, claimed.status, claimed.attempts) == (first.id, RUNNING, 1)
+        queue.complete(first.id, Book("Number Theory", "Someone", "9780306406157"))
+        assert queue.get(first.id).book.to_dict() == {"title": "Number Theory", "author": "Someone",
+                                                      "isbn": "9780306406157"}
+
+        assert queue.claim().id == second.id
+        queue.fail(second.id, "Book with ISBN 0140620230 not found")
+        assert queue.get(second.id).error == "Book with ISBN 0140620230 not found"
+        assert queue.claim() is None
+        assert queue.counts() == {PENDING: 0, RUNNING: 0, DONE: 1, FAILED: 1}
+        assert queue.get(12345) is None
+
+    def test_retries_wait_for_their_delay(self, tmp_path):
+        """Test a retried job is only claimed again once its delay has passed"""
+        now = [1000.0]
+        queue = JobQueue(str(tmp_path / "jobs.db"), clock=lambda: now[0])
+        job = queue.submit("9780306406157")
+        queue.claim()
+        queue.retry(job.id, "Open Library is unavailable", 30)
+
+        assert queue.claim() is None
+        now[0] += 30
+        assert queue.claim().attempts == 2
+        queue.close()
+
+    def test_running_jobs_survive_a_restart(self, tmp_path):
+        """Test jobs that were running when the process stopped are pending again"""
+        queue = JobQueue(str(tmp_path / "jobs.db"))
+        job = queue.submit("9780306406157")
+        queue.submit("0140620230")
+        queue.claim()
+        queue.close()
+
+        reopened = JobQueue(str(tmp_path / "jobs.db"))
+        assert reopened.get(job.id).status == PENDING
+        assert reopened.claim().id == job.id
+        reopened.close()
+
+
+class TestEnrichmentWorkers:
+    """Test cases for the background workers resolving queued ISBNs"""
+
+    def test_workers_add_and_persist_books(self, queue, library):
+        """Test queued ISBNs are looked up, added, saved and reported"""
+        isbns = ["9780306406157", "0140620230", "9780306406157"]
+        with StubOpenLibrary(delay=0.01) as stub:
+            workers = EnrichmentWorkers(library, queue, lambda: AsyncOpenLibraryClient(base_url=stub.url),
+                                        workers=2, poll_interval=0.05)
+            workers.start()
+            jobs = [queue.submit(isbn) for isbn in isbns]
+            workers.notify()
+            finished = [wait_for(queue, job.id) for job in jobs]
+            workers.stop()
+
+        assert [job.status for job in finished] == [DONE, DONE, FAILED]
+        assert finished[0].book.to_dict() == {"title": "Title 9780306406157", "author": "Stub Author",
+                                              "isbn": "9780306406157"}
+        assert finished[1].book.isbn == "9780140620238"
+        assert "already exists" in finished[2].error.lower()
+        with redirect_stdout(StringIO()):
+            saved = Library(file_path=library.file_path)
+        assert sorted(book.isbn for book in saved.books) == ["9780140620238", "9780306406157"]
+
+    def test_pending_jobs_resume_on_start(self, queue, library):
+        """Test jobs queued before the workers started are processed"""
+        job = queue.submit("9780306406157")
+        with StubOpenLibrary() as stub:
+            workers = EnrichmentWorkers(library, queue, lambda: AsyncOpenLibraryClient(base_url=stub.url),
+                                        poll_interval=0.05)
+            workers.start()
+            assert wait_for(queue, job.id).status == DONE
+            workers.stop()
+        assert library.get_book("9780306406157") is not None
+
+    def test_unavailable_upstream_is_retried_then_fails(self, queue, library):
+        """Test Open Library outages put the job back with a delay until attempts run out"""
+        def down_client():
+            return AsyncOpenLibraryClient(base_url="http://127.0.0.1:9", retry=RetryPolicy(base_delay=0))
+
+        workers = EnrichmentWorkers(library, queue, down_client, poll_interval=0.05)
+        job = queue.submit("9780306406157")
+        with patch("job_queue.MAX_ATTEMPTS", 2), patch("job_queue.RETRY_DELAY", 0.05):
+            workers.start()
+            retried = wait_for(queue, job.id)
+            assert (retried.status, retried.attempts) == (PENDING, 1)
+            assert "unavailable" in retried.error.lower()
+            deadline = time.monotonic() + 10
+            while queue.get(job.id).status != FAILED and time.monotonic() < deadline:
+                time.sleep(0.01)
+            workers.stop()
+
+        assert queue.get(job.id).status == FAILED
+        assert queue.get(job.id).attempts == 2
+        assert len(library.books) == 0
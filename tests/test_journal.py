@@ -0,0 +1,95 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from book import Book
+from library import Library
+
+
+@pytest.fixture
+def library_path(tmp_path, sample_json_data):
+    """A library.json snapshot in a temporary directory"""
+    path = tmp_path / "library.json"
+    path.write_text(json.dumps(sample_json_data))
+    return str(path)
+
+
+def open_library(path):
+    with patch('library.OpenLibraryClient'):
+        return Library([], path, storage="journal")
+
+
+class TestJournal:
+    """Test cases for journal storage mode"""
+    
+    def test_mutations_are_appended_not_rewritten(self, library_path):
+        """Test changes go to the journal and the snapshot is left untouched"""
+        snapshot = open(library_path).read()
+        library = open_library(library_path)
+        
+        library.books.append(Book("New Book", "New Author", "3333333333"))
+        with patch('builtins.print'):
+            library.remove_book("1111111111")
+        library.persist()
+        library.journal.close()
+        
+        assert open(library_path).read() == snapshot
+        with open(library_path + ".journal") as journal:
+            ops = [json.loads(line)["op"] for line in journal]
+        assert ops == ["add", "remove"]
+    
+    def test_reload_replays_journal(self, library_path):
+        """Test reopening the library applies the journal to the snapshot"""
+        library = open_library(library_path)
+        library.books.append(Book("New Book", "New Author", "3333333333"))
+        library.books.pop_isbn("1111111111")
+        library.journal.close()
+        
+        reopened = open_library(library_path)
+        assert [book.isbn for book in reopened.books] == ["2222222222", "3333333333"]
+        assert reopened.find_book("new", "title")[0].isbn == "3333333333"
+    
+    def test_torn_last_line_is_ignored(self, library_path):
+        """Test a partially written journal record does not break loading"""
+        library = open_library(library_path)
+        library.books.append(Book("New Book", "New Author", "3333333333"))
+        library.journal.close()
+        with open(library_path + ".journal", "a") as journal:
+            journal.write('{"op": "add", "title": "Tor')
+        
+        reopened = open_library(library_path)
+        assert len(reopened.books) == 3
+    
+    def test_compaction_writes_snapshot(self, library_path):
+        """Test compaction folds the journal into a new snapshot"""
+        library = open_library(library_path)
+        library.journal.compact_every = 2
+        library.books.append(Book("Book Three", "Author", "3333333333"))
+        library.persist()
+        assert not library.journal.compacting
+        library.books.append(Book("Book Four", "Author", "4444444444"))
+        library.persist()
+        library.journal.close()
+        
+        with open(library_path) as file:
+            assert [book["isbn"] for book in json.load(file)] == [
+                "1111111111", "2222222222", "3333333333", "4444444444"
+            ]
+        assert os.path.getsize(library_path + ".journal") == 0
+        assert not os.path.exists(library_path + ".journal.compacting")
+        assert len(open_library(library_path).books) == 4
+    
+    def test_interrupted_compaction_is_replayed(self, library_path):
+        """Test a rotated journal left by a crash is replayed before the live one"""
+        with open(library_path + ".journal.compacting", "w") as rotated:
+            rotated.write(json.dumps({"op": "add", "title": "T", "author": "A", "isbn": "3333333333"}) + "\n")
+        with open(library_path + ".journal", "w") as journal:
+            journal.write(json.dumps({"op": "remove", "isbn": "3333333333"}) + "\n")
+            journal.write(json.dumps({"op": "remove", "isbn": "1111111111"}) + "\n")
+        
+        library = open_library(library_path)
+        assert [book.isbn for book in library.books] == ["2222222222"]
+        
+        library.save_books(library_path)
+        assert not os.path.exists(library_path + ".journal.compacting")
+        assert len(open_library(library_path).books) == 1
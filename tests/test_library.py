@@ -231,4 +231,86 @@ class TestLibrary:
             assert len(library.books) == 1
             
         finally:
-            os.unlink(temp_path)
\ No newline at end of file
+            os.unlink(temp_path)    
+    @patch.object(Library, 'load_books')
+    def test_books_appended_directly_are_indexed(self, mock_load):
+        """Test books appended to library.books are visible to ISBN lookups"""
+        library = Library([])
+        library.books.append(self.book1)
+        
+        assert library.get_book("1111111111") is self.book1
+        assert library.find_book("1111111111", "isbn") == [self.book1]
+        
+        with pytest.raises(ValueError, match="ISBN must be unique"):
+            library.add_book("1111111111")
+    
+    @patch.object(Library, 'load_books')
+    def test_find_book_modes(self, mock_load):
+        """Test indexed search matches word starts and substring mode matches anywhere"""
+        library = Library([self.book1, self.book2, self.book3])
+        
+        assert library.find_book("guide", "title") == [self.book3]
+        assert library.find_book("uide", "title") == []
+        assert library.find_book("uide", "title", mode="substring") == [self.book3]
+        
+        with pytest.raises(ValueError, match="Unknown search mode"):
+            library.find_book("guide", "title", mode="regex")
+    
+    @patch.object(Library, 'load_books')
+    def test_find_book_ranked_and_paged(self, mock_load):
+        """Test ranked mode orders by relevance and limit/offset page every mode"""
+        library = Library([self.book1, self.book2, self.book3])
+        
+        assert library.find_book("book", "title", limit=1, offset=1) == [self.book2]
+        assert library.find_book("1111111111", "isbn", offset=1) == []
+        ranked = library.ranked_search("book", "title")
+        assert sorted(match.book.isbn for match in ranked) == ["1111111111", "2222222222"]
+        assert library.find_book("book", "title", mode="ranked", limit=1) == [ranked[0].book]
+        
+        with pytest.raises(ValueError, match="Cannot search by isbn"):
+            library.ranked_search("1111111111", "isbn")
+    
+    @patch('library.OpenLibraryClient')
+    @patch.object(Library, 'load_books')
+    def test_add_books_bulk(self, mock_load, mock_client_class):
+        """Test bulk adding fetches new ISBNs in one call and reports the rest"""
+        mock_client_instance = mock_client_class.return_value
+        mock_client_instance.get_books_by_isbns.return_value = {
+            "2222222222": self.book2,
+            "4444444444": None,
+        }
+        library = Library([self.book1])
+        
+        result = library.add_books(["1111111111", "2222222222", "4444444444", "2222222222"])
+        
+        mock_client_instance.get_books_by_isbns.assert_called_once_with(["2222222222", "4444444444"])
+        assert result["added"] == [self.book2]
+        assert result["duplicates"] == ["1111111111", "2222222222"]
+        assert result["not_found"] == ["4444444444"]
+        assert list(library.books) == [self.book1, self.book2]
+        assert result["unavailable"] == []
+    
+    @patch('library.OpenLibraryClient')
+    @patch.object(Library, 'load_books')
+    def test_add_books_reports_unavailable(self, mock_load, mock_client_class):
+        """Test ISBNs Open Library could not be asked about are not reported as missing"""
+        mock_client_class.return_value.get_books_by_isbns.return_value = {"2222222222": self.book2}
+        library = Library([])
+        
+        result = library.add_books(["2222222222", "4444444444"])
+        
+        assert result["added"] == [self.book2]
+        assert result["not_found"] == []
+        assert result["unavailable"] == ["4444444444"]
+    
+    @patch('library.OpenLibraryClient')
+    @patch.object(Library, 'load_books')
+    def test_add_book_unavailable(self, mock_load, mock_client_class):
+        """Test an Open Library outage is raised instead of reported as not found"""
+        from open_library import OpenLibraryUnavailable
+        mock_client_class.return_value.get_book_by_isbn.side_effect = OpenLibraryUnavailable("down")
+        library = Library([])
+        
+        with pytest.raises(OpenLibraryUnavailable):
+            library.add_book("1111111111")
+        assert len(library.books) == 0
@@ -155,6 +155,22 @@ class TestLibraryCLI:
             output = ' '.join(calls)
             assert "Found 1 book" in output
     
+    @patch('builtins.input')
+    def test_find_books_menu_suggests_fuzzy_matches(self, mock_input):
+        """Test a misspelled search suggests close matches"""
+        self.cli.library.books.append(Book("Oliver Twist", "Charles Dickens", "5555555555"))
+        
+        mock_input.side_effect = ["2", "Dikens"]  # Search by author, misspelled
+        
+        with patch('builtins.print') as mock_print:
+            self.cli.find_books_menu()
+            
+            calls = [str(call) for call in mock_print.call_args_list]
+            output = ' '.join(calls)
+            assert "No books found" in output
+            assert "Did you mean" in output
+            assert "Oliver Twist" in output
+    
     @patch('builtins.input')
     def test_find_books_menu_invalid_choice(self, mock_input):
         """Test finding books with invalid search choice"""
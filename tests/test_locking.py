@@ -0,0 +1,143 @@
+import multiprocessing
+import threading
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+import pytest
+from isbn import with_check_digit
+from library import Library
+from locking import RWLock
+from open_library import OpenLibraryClient
+from tests.stub_server import StubOpenLibrary
+
+
+def run_worker(worker, file_path, storage, base_url, ops, results):
+    """One API-like worker process: adds, removes and reads through a shared Library."""
+    with redirect_stdout(StringIO()):
+        library = Library(file_path=file_path, storage=storage, shared=True)
+        library.open_library_client = OpenLibraryClient(base_url=base_url)
+        if library.journal:
+            library.journal.compact_every = 25
+        added, removed = [], []
+        for i in range(ops):
+            isbn = with_check_digit(f"978{worker:03d}{i:06d}")
+            library.add_book(isbn)
+            added.append(isbn)
+            if i % 3 == 2:
+                library.remove_book(added[-2])
+                removed.append(added[-2])
+            assert library.get_book(isbn) is not None
+            library.find_book("stub", "author")
+            library.get_books_page(limit=10)
+    results.put((added, removed))
+
+
+class TestRWLock:
+    """Test cases for the readers-writer lock"""
+
+    def test_readers_share_and_writers_exclude(self):
+        """Test readers run together while a writer waits for all of them"""
+        lock = RWLock()
+        events = []
+        both_reading = threading.Barrier(2, timeout=5)
+
+        def reader(name):
+            with lock.read():
+                both_reading.wait()
+                events.append(name)
+                time.sleep(0.05)
+
+        def writer():
+            with lock.write():
+                events.append("writer")
+
+        readers = [threading.Thread(target=reader, args=(name,)) for name in ("r1", "r2")]
+        for thread in readers:
+            thread.start()
+        time.sleep(0.01)
+        writing = threading.Thread(target=writer)
+        writing.start()
+        for thread in [*readers, writing]:
+            thread.join(timeout=5)
+
+        assert sorted(events[:2]) == ["r1", "r2"]
+        assert events[2] == "writer"
+
+    def test_writer_can_reenter(self):
+        """Test the writing thread may take the lock again"""
+        lock = RWLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            pass
+
+
+class TestSharedLibrary:
+    """Stress tests for libraries shared between threads and processes"""
+
+    def test_threads_mixed_reads_and_writes(self, tmp_path):
+        """Test concurrent threads never see or leave a torn catalogue"""
+        library = Library(file_path=str(tmp_path / "library.json"))
+        errors = []
+
+        with StubOpenLibrary() as stub:
+            library.open_library_client = OpenLibraryClient(base_url=stub.url)
+
+            def work(worker):
+                try:
+                    with redirect_stdout(StringIO()):
+                        for i in range(40):
+                            isbn = with_check_digit(f"978{worker:03d}{i:06d}")
+                            library.add_book(isbn)
+                            if i % 2:
+                                library.remove_book(isbn)
+                            library.find_book("stub", "author")
+                            list(library.get_books_page(limit=50)[0])
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=work, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=60)
+
+        assert errors == []
+        assert len(library.books) == 8 * 20
+        assert len(library.find_book("stub", "author")) == 8 * 20
+
+    @pytest.mark.parametrize("storage", ["json", "journal", "snapshot"])
+    def test_worker_processes_stay_consistent(self, tmp_path, storage):
+        """Test N worker processes sharing one library agree on its final contents"""
+        file_path = str(tmp_path / "library.json")
+        workers, ops = 4, 30
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+
+        with StubOpenLibrary() as stub:
+            processes = [
+                context.Process(target=run_worker, args=(worker, file_path, storage, stub.url, ops, results))
+                for worker in range(workers)
+            ]
+            start = time.perf_counter()
+            for process in processes:
+                process.start()
+            outcomes = [results.get(timeout=120) for _ in processes]
+            elapsed = time.perf_counter() - start
+            for process in processes:
+                process.join(timeout=10)
+
+        assert all(process.exitcode == 0 for process in processes)
+        expected = set()
+        for added, removed in outcomes:
+            expected |= set(added) - set(removed)
+
+        with redirect_stdout(StringIO()):
+            reloaded = Library(file_path=file_path, storage=storage, shared=True)
+        assert {book.isbn for book in reloaded.books} == expected
+        assert len(expected) == workers * (ops - ops // 3)
+        # Every operation (add, remove, three reads) goes through the file
+        # lock; even slow CI machines manage far more than this.
+        assert workers * ops / elapsed > 5
@@ -0,0 +1,107 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from api import app, make_metrics
+from book import Book
+from cache import MemoryCache
+from library import Library
+from metrics import Metrics, Registry
+from open_library import OpenLibraryClient
+from tests.stub_server import StubOpenLibrary
+
+
+@pytest.fixture
+def library(tmp_path):
+    """A library of three books saving to a temporary file"""
+    books = [Book("Dune", "Frank Herbert", "9780441013593"), Book("Emma", "Jane Austen", "9780141439587"),
+             Book("Dune Messiah", "Frank Herbert", "9780593098233")]
+    with redirect_stdout(StringIO()):
+        return Library(books, file_path=str(tmp_path / "library.json"))
+
+
+class TestMetrics:
+    """Test cases for the Prometheus metrics and the add_book tracer"""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test observations land in the right buckets and render in the text format"""
+        registry = Registry()
+        histogram = registry.histogram("test_seconds", "Test latency", ("kind",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "a")
+        registry.collect("test_items", "Items", lambda: {("x",): 2, ('say "hi"',): 1}, ("name",))
+        registry.collect("test_missing", "Not set up yet", lambda: None)
+
+        assert registry.render().splitlines() == [
+            "# HELP test_seconds Test latency",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{kind="a",le="0.1"} 2',
+            'test_seconds_bucket{kind="a",le="1.0"} 3',
+            'test_seconds_bucket{kind="a",le="+Inf"} 4',
+            'test_seconds_sum{kind="a"} 3.65',
+            'test_seconds_count{kind="a"} 4',
+            "# HELP test_items Items",
+            "# TYPE test_items gauge",
+            'test_items{name="say \\"hi\\""} 1',
+            'test_items{name="x"} 2',
+            "# HELP test_missing Not set up yet",
+            "# TYPE test_missing gauge",
+        ]
+
+    def test_library_times_searches_and_saves(self, library):
+        """Test a library with metrics records searches by kind and each save's duration and size"""
+        library.metrics = metrics = Metrics()
+        library.find_book("dune")
+        library.find_book("dune", mode="substring")
+        library.ranked_search("dune")
+        library.fuzzy_search("dnue")
+        library.save_books(library.file_path)
+
+        assert [metrics.search_seconds.count(kind) for kind in ("index", "substring", "ranked", "fuzzy")] == [
+            1, 1, 1, 1]
+        assert metrics.save_seconds.count("json") == 1
+        with open(library.file_path, 'rb') as file:
+            assert metrics.save_bytes.sum("json") == len(file.read())
+
+    def test_add_book_tracer_times_each_stage(self, library):
+        """Test the tracer hears about every stage of add_book in order"""
+        stages = []
+        library.tracer = lambda stage, seconds: stages.append((stage, seconds))
+        with patch.object(library.open_library_client, "get_book_by_isbn",
+                          return_value=Book("Number Theory", "Someone", "9780306406157")):
+            library.add_book("0-306-40615-2")
+
+        assert [stage for stage, _ in stages] == ["validate", "lookup", "insert"]
+        assert all(seconds >= 0 for _, seconds in stages)
+
+    def test_open_library_round_trips_and_coalescing(self):
+        """Test a client with metrics records each upstream request and its lookups"""
+        metrics = Metrics()
+        with StubOpenLibrary() as stub, OpenLibraryClient(base_url=stub.url, cache=MemoryCache(),
+                                                          metrics=metrics) as client:
+            client.get_book_by_isbn("9780306406157")
+            client.get_books_by_isbns(["9780441013593", "9780141439587"])
+            client.search_books("dune")
+
+        assert metrics.upstream_seconds.count("books", "200") == 2
+        assert metrics.upstream_seconds.count("search", "200") == 1
+        assert "librarian_openlibrary_lookups_total{result=\"requested\"} 2" in metrics.render()
+
+    def test_metrics_endpoint(self, library):
+        """Test GET /metrics serves request latency by route and the catalogue size, and 404s when disabled"""
+        client = TestClient(app)
+        assert client.get("/metrics").status_code == 404
+
+        with patch("api.metrics", make_metrics()), patch("api.library", library):
+            client.get("/books?limit=2")
+            client.delete("/books/9789999999991")
+            response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = response.text.splitlines()
+        assert 'librarian_http_request_duration_seconds_count{method="GET",route="/books",status="200"} 1' in lines
+        assert ('librarian_http_request_duration_seconds_count{method="DELETE",route="/books/{isbn}",status="404"} 1'
+                in lines)
+        assert "librarian_books 3" in lines
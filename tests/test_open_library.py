@@ -0,0 +1,432 @@
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from api import app
+from cache import MemoryCache
+from email.utils import formatdate
+from isbn import with_check_digit
+from open_library import AsyncOpenLibraryClient, OpenLibraryClient, OpenLibraryUnavailable
+from rate_limit import AdaptiveConcurrency, TokenBucket
+from retry import RetryPolicy, parse_retry_after
+from tests.stub_server import StubOpenLibrary
+
+
+@pytest.fixture
+def stub():
+    """Local Open Library stub server"""
+    with StubOpenLibrary() as server:
+        yield server
+
+
+class TestOpenLibraryClients:
+    """Test cases for the sync and async Open Library clients against a stub server"""
+    
+    def test_sync_client(self, stub):
+        """Test the sync client parses search and ISBN responses"""
+        with OpenLibraryClient(base_url=stub.url) as client:
+            book = client.get_book_by_isbn("9780140620238")
+            books = client.search_books("dickens", limit=3)
+        
+        assert book.title == "Title 9780140620238"
+        assert book.author == "Stub Author"
+        assert [b.title for b in books] == ["dickens 0", "dickens 1", "dickens 2"]
+    
+    def test_async_client(self, stub):
+        """Test the async client exposes the same surface as the sync client"""
+        async def run():
+            async with AsyncOpenLibraryClient(base_url=stub.url) as client:
+                return await client.get_book_by_isbn("9780140620238"), await client.search_books("dickens", limit=2)
+        
+        book, books = asyncio.run(run())
+        
+        assert book.title == "Title 9780140620238"
+        assert len(books) == 2
+    
+    def test_async_client_connection_error(self):
+        """Test the async client reports unreachable servers as unavailable, not as a miss"""
+        async def run(call):
+            async with AsyncOpenLibraryClient(base_url="http://127.0.0.1:9", retry=RetryPolicy(base_delay=0)) as client:
+                return await call(client)
+        
+        with pytest.raises(OpenLibraryUnavailable):
+            asyncio.run(run(lambda client: client.get_book_by_isbn("9780140620238")))
+        with pytest.raises(OpenLibraryUnavailable):
+            asyncio.run(run(lambda client: client.search_books("x")))
+    
+    def test_async_client_uses_cache(self, stub):
+        """Test the async client answers repeated lookups from its cache"""
+        cache = MemoryCache()
+        
+        async def run():
+            async with AsyncOpenLibraryClient(base_url=stub.url, cache=cache) as client:
+                await client.get_book_by_isbn("9780140620238")
+                await client.search_books("dickens")
+                await client.get_books_by_isbns(["9780140620238", "9780000000002"])
+                return await client.get_book_by_isbn("9780000000002"), await client.search_books("dickens")
+        
+        book, books = asyncio.run(run())
+        assert book.title == "Title 9780000000002"
+        assert len(books) == 10
+        assert stub.requests == 3
+    
+    def test_get_books_by_isbns_batches_requests(self, stub):
+        """Test bulk ISBN lookups are chunked into bibkeys batches"""
+        isbns = [with_check_digit(f"978{i:09d}") for i in range(250)]
+        
+        with OpenLibraryClient(base_url=stub.url) as client:
+            books = client.get_books_by_isbns(isbns + isbns[:10])
+        
+        assert stub.requests == 3
+        assert list(books) == isbns
+        assert books[isbns[0]].title == f"Title {isbns[0]}"
+    
+    def test_get_books_by_isbns_missing(self, stub):
+        """Test ISBNs absent from the response map to None"""
+        stub.respond = lambda path, params: (200, {}, {})
+        
+        async def run():
+            async with AsyncOpenLibraryClient(base_url=stub.url) as client:
+                return await client.get_books_by_isbns(["1111111111", "2222222222"])
+        
+        assert asyncio.run(run()) == {"1111111111": None, "2222222222": None}
+
+
+class TestAPIConcurrency:
+    """Load test showing upstream calls no longer block the event loop"""
+    
+    def test_concurrent_online_searches_overlap(self):
+        """Test concurrent /books/search/online requests are served in parallel"""
+        delay = 0.3
+        concurrency = 10
+        
+        async def run():
+            async with AsyncOpenLibraryClient(base_url=stub.url) as client:
+                app.state.open_library_client = client
+                try:
+                    transport = httpx.ASGITransport(app=app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://api") as api:
+                        start = time.perf_counter()
+                        responses = await asyncio.gather(*(
+                            api.get("/books/search/online", params={"query": f"q{i}"})
+                            for i in range(concurrency)
+                        ))
+                        return time.perf_counter() - start, responses
+                finally:
+                    app.state.open_library_client = None
+        
+        with StubOpenLibrary(delay=delay) as stub:
+            elapsed, responses = asyncio.run(run())
+        
+        assert all(response.status_code == 200 for response in responses)
+        assert stub.requests == concurrency
+        assert stub.max_in_flight > 1
+        # Serialized upstream calls would take concurrency * delay (3s).
+        assert elapsed < concurrency * delay / 2
+
+
+def flaky(stub, failures, status=503):
+    """Make the stub fail its first ``failures`` requests with ``status``"""
+    respond = stub.respond
+    calls = []
+    
+    def failing(path, params):
+        calls.append(path)
+        if len(calls) <= failures:
+            return status, {}, {}
+        return respond(path, params)
+    
+    stub.respond = failing
+    return calls
+
+
+class TestRetries:
+    """Test cases for retrying transient Open Library failures"""
+    
+    def test_retries_transient_errors(self, stub):
+        """Test 5xx responses are retried until one succeeds"""
+        calls = flaky(stub, failures=2)
+        retry = RetryPolicy(attempts=3, base_delay=0)
+        
+        with OpenLibraryClient(base_url=stub.url, retry=retry) as client:
+            book = client.get_book_by_isbn("9780140620238")
+        
+        assert book.title == "Title 9780140620238"
+        assert len(calls) == 3
+        assert retry.retries == 2
+    
+    def test_gives_up_after_attempts(self, stub):
+        """Test persistent failures raise OpenLibraryUnavailable after the last attempt"""
+        calls = flaky(stub, failures=10)
+        
+        with OpenLibraryClient(base_url=stub.url, retry=RetryPolicy(attempts=3, base_delay=0)) as client:
+            with pytest.raises(OpenLibraryUnavailable, match="HTTP 503"):
+                client.get_book_by_isbn("9780140620238")
+        
+        assert len(calls) == 3
+    
+    def test_client_errors_are_not_retried(self, stub):
+        """Test a 4xx response is a miss and is not retried"""
+        calls = flaky(stub, failures=10, status=404)
+        
+        with OpenLibraryClient(base_url=stub.url, retry=RetryPolicy(base_delay=0)) as client:
+            assert client.get_book_by_isbn("9780140620238") is None
+        
+        assert len(calls) == 1
+    
+    def test_retry_budget_caps_extra_load(self, stub):
+        """Test retries stop once the budget is spent and resume as requests refill it"""
+        calls = flaky(stub, failures=1000)
+        retry = RetryPolicy(attempts=5, base_delay=0, budget_ratio=0.5, budget_reserve=2)
+        
+        with OpenLibraryClient(base_url=stub.url, retry=retry) as client:
+            for _ in range(10):
+                with pytest.raises(OpenLibraryUnavailable):
+                    client.get_book_by_isbn("9780140620238")
+        
+        # 10 first attempts, the 2-token reserve, then 0.5 tokens per request.
+        assert retry.retries < 10
+        assert len(calls) == 10 + retry.retries
+        assert retry.budget_exhausted > 0
+    
+    def test_backoff_is_jittered_and_capped(self):
+        """Test delays grow exponentially, are scaled by jitter and never exceed max_delay"""
+        retry = RetryPolicy(attempts=10, base_delay=0.1, max_delay=0.5, jitter=lambda: 1.0)
+        
+        assert [retry.backoff(i) for i in range(4)] == [0.1, 0.2, 0.4, 0.5]
+        assert retry.backoff(9) is None
+        assert RetryPolicy(jitter=lambda: 0.5).backoff(1) == 0.1
+    
+    def test_bulk_lookup_reports_unavailable_batches(self, stub):
+        """Test ISBNs whose batch failed are left out instead of reported as missing"""
+        flaky(stub, failures=10)
+        
+        with OpenLibraryClient(base_url=stub.url, retry=RetryPolicy(attempts=2, base_delay=0)) as client:
+            books = client.get_books_by_isbns(["1111111111", "2222222222"])
+        
+        assert books == {}
+
+
+class TestCoalescing:
+    """Test cases for sharing one upstream request between identical concurrent lookups"""
+    
+    def test_async_lookups_share_one_request(self):
+        """Test 1,000 concurrent identical async lookups reach the stub once"""
+        async def run(url):
+            async with AsyncOpenLibraryClient(base_url=url) as client:
+                books = await asyncio.gather(*(client.get_book_by_isbn("9780140620238") for _ in range(1000)))
+                return books, client.single_flight.stats
+        
+        with StubOpenLibrary(delay=0.2) as stub:
+            books, stats = asyncio.run(run(stub.url))
+            requests_made = stub.requests
+        
+        assert requests_made == 1
+        assert all(book.title == "Title 9780140620238" for book in books)
+        assert stats.as_dict() == {"calls": 1000, "executions": 1, "coalesced": 999}
+    
+    def test_threaded_lookups_share_one_request(self):
+        """Test 1,000 threads searching the same query at once reach the stub once"""
+        import threading
+        results = []
+        
+        with StubOpenLibrary(delay=0.5) as stub, OpenLibraryClient(base_url=stub.url) as client:
+            start = threading.Barrier(1000, timeout=30)
+            
+            def search():
+                start.wait()
+                results.append(client.search_books("dickens", limit=3))
+            
+            threads = [threading.Thread(target=search) for _ in range(1000)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+            requests_made = stub.requests
+        
+        assert requests_made == 1
+        assert len(results) == 1000
+        assert all([book.title for book in books] == ["dickens 0", "dickens 1", "dickens 2"] for books in results)
+        assert client.single_flight.stats.coalesced == 999
+    
+    def test_failures_are_shared_and_not_remembered(self, stub):
+        """Test waiters receive the leader's error and the next call tries again"""
+        calls = flaky(stub, failures=1)
+        
+        async def run():
+            async with AsyncOpenLibraryClient(base_url=stub.url, retry=RetryPolicy(attempts=1)) as client:
+                first = await asyncio.gather(*(client.get_book_by_isbn("1111111111") for _ in range(5)),
+                                             return_exceptions=True)
+                return first, await client.get_book_by_isbn("1111111111")
+        
+        first, second = asyncio.run(run())
+        assert all(isinstance(result, OpenLibraryUnavailable) for result in first)
+        assert second.title == "Title 9781111111113"
+        assert len(calls) == 2
+
+
+def rate_limited(stub, rate, burst, retry_after="1"):
+    """Make the stub answer 429 with ``Retry-After`` above ``rate`` requests per second"""
+    state = {"tokens": burst, "updated": time.monotonic()}
+    rejected = []
+    lock = threading.Lock()
+    respond = stub.respond
+    
+    def limiting(path, params):
+        with lock:
+            now = time.monotonic()
+            state["tokens"] = min(burst, state["tokens"] + (now - state["updated"]) * rate)
+            state["updated"] = now
+            allowed = state["tokens"] >= 1
+            if allowed:
+                state["tokens"] -= 1
+            else:
+                rejected.append(now)
+        if not allowed:
+            return 429, {"Retry-After": retry_after}, {}
+        return respond(path, params)
+    
+    stub.respond = limiting
+    return rejected
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiting:
+    """Test cases for the client-side rate limiter and adaptive concurrency"""
+    
+    def test_token_bucket_spaces_requests_after_burst(self):
+        """Test a burst goes out at once and later requests wait for their token"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock)
+        
+        assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 0.1, 0.2])
+        clock.now += 1
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1)
+    
+    def test_token_bucket_pause_holds_every_request(self):
+        """Test a pause delays requests even while tokens are left"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=5, clock=clock)
+        bucket.pause(3)
+        
+        assert bucket.reserve() == pytest.approx(3)
+        clock.now += 3
+        assert bucket.reserve() == 0
+    
+    def test_adaptive_concurrency_aimd(self):
+        """Test the limit grows additively and halves at most once per latency target"""
+        clock = FakeClock()
+        concurrency = AdaptiveConcurrency(initial=4, maximum=8, latency_target=1.0, clock=clock)
+        
+        for _ in range(4):
+            concurrency.on_response(0.01)
+        assert 4.9 < concurrency.limit < 5
+        concurrency.on_response(0.01, overloaded=True)
+        concurrency.on_response(0.01, overloaded=True)
+        assert concurrency.limit == pytest.approx(2.45, abs=0.05)
+        clock.now += 1
+        concurrency.on_response(5.0)
+        assert concurrency.limit == pytest.approx(1.22, abs=0.05)
+        assert concurrency.decreases == 2
+        clock.now += 1
+        concurrency.on_response(0.01, overloaded=True)
+        assert concurrency.limit == 1
+    
+    def test_adaptive_concurrency_shared_by_threads_and_loop(self):
+        """Test one limiter hands its slot back and forth between a thread and an event loop"""
+        concurrency = AdaptiveConcurrency(initial=1, maximum=1)
+        acquired = threading.Event()
+
+        def in_thread():
+            concurrency.acquire()
+            acquired.set()
+            time.sleep(0.1)
+            concurrency.release()
+
+        async def run():
+            await concurrency.acquire_async()
+            thread = threading.Thread(target=in_thread)
+            thread.start()
+            await asyncio.sleep(0.05)
+            assert not acquired.is_set()
+            await concurrency.release_async()
+            await asyncio.to_thread(acquired.wait, 5)
+            # The thread holds the slot; its release must wake this waiter.
+            await asyncio.wait_for(concurrency.acquire_async(), 5)
+            await concurrency.release_async()
+            thread.join()
+
+        asyncio.run(run())
+        assert concurrency.in_flight == 0
+
+    def test_parse_retry_after(self):
+        """Test Retry-After accepts seconds and HTTP dates and ignores junk"""
+        assert parse_retry_after("2") == 2.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+        assert 8 < parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+        assert parse_retry_after(formatdate(time.time() - 10, usegmt=True)) == 0
+    
+    def test_limited_client_stays_under_server_limit(self, stub):
+        """Test a client limited below the server's rate gets no 429s and achieves its rate"""
+        # The server tolerates a little more burst than the client sends, as
+        # scheduling can bunch requests that the client spaced out.
+        rejected = rate_limited(stub, rate=50, burst=10)
+        limiter = TokenBucket(rate=40, burst=5)
+        lookups = 60
+        
+        async def run():
+            async with AsyncOpenLibraryClient(base_url=stub.url, rate_limiter=limiter,
+                                              concurrency=AdaptiveConcurrency()) as client:
+                start = time.perf_counter()
+                books = await asyncio.gather(*(client.get_book_by_isbn(with_check_digit(f"97800000{i:04d}")) for i in range(lookups)))
+                return books, time.perf_counter() - start
+        
+        books, elapsed = asyncio.run(run())
+        achieved = lookups / elapsed
+        
+        assert all(book is not None for book in books)
+        assert rejected == []
+        # 5 requests from the burst, then 55 at 40/s.
+        assert 40 * 0.7 < achieved <= 40 * 1.1 + 5
+    
+    def test_unlimited_client_honours_retry_after(self, stub):
+        """Test a 429 pauses the client for Retry-After and halves its concurrency"""
+        rejected = rate_limited(stub, rate=2, burst=1, retry_after="0.6")
+        limiter = TokenBucket(rate=1000)
+        concurrency = AdaptiveConcurrency(initial=8)
+        
+        with OpenLibraryClient(base_url=stub.url, rate_limiter=limiter, concurrency=concurrency,
+                               retry=RetryPolicy(base_delay=0)) as client:
+            assert client.get_book_by_isbn("1111111111") is not None
+            start = time.perf_counter()
+            book = client.get_book_by_isbn("2222222222")
+            elapsed = time.perf_counter() - start
+        
+        assert book.title == "Title 9782222222224"
+        assert len(rejected) == 1
+        assert elapsed >= 0.6
+        assert concurrency.limit < 8
+        assert concurrency.decreases == 1
+    
+    def test_long_retry_after_gives_up(self, stub):
+        """Test a Retry-After beyond max_retry_after fails fast instead of waiting"""
+        rejected = rate_limited(stub, rate=0, burst=0, retry_after="3600")
+        
+        with OpenLibraryClient(base_url=stub.url, retry=RetryPolicy(base_delay=0, max_retry_after=5)) as client:
+            start = time.perf_counter()
+            with pytest.raises(OpenLibraryUnavailable, match="HTTP 429"):
+                client.get_book_by_isbn("1111111111")
+        
+        assert len(rejected) == 1
+        assert time.perf_counter() - start < 1
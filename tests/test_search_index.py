@@ -0,0 +1,167 @@
+import random
+from math import log
+import pytest
+from book import Book
+from search_index import PREFIX_TF, SearchIndex, TermMatcher, bm25, edit_distance, fold, max_typos, tokenize
+
+
+class TestSearchIndex:
+    """Test cases for the title/author token index"""
+    
+    def setup_method(self):
+        """Set up test fixtures before each test method"""
+        self.book1 = Book("The Python Guide", "John Smith", "1111111111")
+        self.book2 = Book("Python Pocket Reference", "Mark Lutz", "2222222222")
+        self.book3 = Book("Pamuk'un Hayatı", "Yasemin Sungur", "3333333333")
+        self.index = SearchIndex([self.book1, self.book2, self.book3])
+    
+    def test_tokenize(self):
+        """Test tokens are folded words"""
+        assert tokenize("Pamuk'un Hayatı") == ["pamuk", "un", "hayati"]
+    
+    def test_fold(self):
+        """Test search keys ignore case, accents and Turkish dotted/dotless i"""
+        assert fold("İki Şehrin Hikayesi") == "iki sehrin hikayesi"
+        assert fold("IŞIK") == fold("ışık") == fold("Isik") == "isik"
+        assert fold("Çağ Ötesi Güneş") == "cag otesi gunes"
+        assert fold("Straße ﬁction") == "strasse fiction"
+        assert fold("Plain ASCII") == "plain ascii"
+    
+    def test_search_with_unicode_queries(self):
+        """Test Turkish titles are found however the query is cased or accented"""
+        book = Book("İki Şehrin Hikayesi", "Charles Dickens", "4444444444")
+        self.index.add(book)
+        for query in ("iki şehrin", "İKİ ŞEHRİN", "iki sehrin", "Hikayesi"):
+            assert self.index.search("title", query) == [book]
+        assert self.index.scan("title", "ki şeh") == [book]
+        assert self.index.search("title", "hayati") == [self.book3]
+    
+    def test_prefix_search_keeps_insertion_order(self):
+        """Test a token prefix finds every book in insertion order"""
+        assert self.index.search("title", "pyth") == [self.book1, self.book2]
+        assert self.index.search("author", "lutz") == [self.book2]
+    
+    def test_phrase_search(self):
+        """Test multi-word queries must appear as a phrase"""
+        assert self.index.search("title", "python guide") == [self.book1]
+        assert self.index.search("title", "guide python") == []
+    
+    def test_remove_and_readd(self):
+        """Test removed books disappear from results and can be re-indexed"""
+        self.index.remove(self.book1)
+        assert self.index.search("title", "python") == [self.book2]
+        
+        self.index.add(self.book1)
+        assert self.index.search("title", "guide") == [self.book1]
+    
+    def test_unindexable_query(self):
+        """Test queries without tokens or unknown fields fall back to the caller"""
+        assert self.index.search("title", "") is None
+        assert self.index.search("title", "--") is None
+        assert self.index.search("isbn", "1111") is None
+    
+    def test_edit_distance(self):
+        """Test insertions, deletions, substitutions and swaps count as one edit each"""
+        assert edit_distance("dickens", "dickens", 2) == 0
+        assert edit_distance("dikens", "dickens", 2) == 1
+        assert edit_distance("dickenz", "dickens", 2) == 1
+        assert edit_distance("dcikens", "dickens", 2) == 1
+        assert edit_distance("kitten", "sitting", 5) == 3
+        assert edit_distance("kitten", "sitting", 1) == 2
+        assert edit_distance("a", "abcd", 1) == 2
+    
+    def test_typo_allowance(self):
+        """Test short words and numbers must match exactly"""
+        assert [max_typos(word) for word in ("ab", "1984", "lutz", "london", "dickens")] == [0, 0, 1, 2, 2]
+    
+    def test_term_matcher(self):
+        """Test the trigram filter finds every term within the allowed distance"""
+        matcher = TermMatcher(["python", "pithon", "pyton", "guide", "2024"])
+        assert sorted(matcher.find("pyhton", 2)) == [("pithon", 2), ("python", 1), ("pyton", 1)]
+        assert matcher.find("2025", 1) == []
+        assert matcher.find("xyz", 1) == []
+    
+    def test_fuzzy_search_ranks_by_closeness(self):
+        """Test typo-tolerant search puts exact matches first and every word must match"""
+        book4 = Book("Pyhton for Beginners", "Someone", "4444444444")
+        self.index.add(book4)
+        
+        matches = self.index.fuzzy_search("title", "pyhton", 10)
+        assert [match.book for match in matches] == [book4, self.book1, self.book2]
+        assert [match.distance for match in matches] == [0, 1, 1]
+        assert [match.score for match in matches] == pytest.approx([1, 5 / 6, 5 / 6])
+        
+        assert [match.book for match in self.index.fuzzy_search("title", "pyton refrence", 10)] == [self.book2]
+        assert [match.book for match in self.index.fuzzy_search("title", "python", 1)] == [self.book1]
+        assert self.index.fuzzy_search("author", "Lutz", 10)[0].score == 1
+        assert self.index.fuzzy_search("title", "", 10) == []
+        with pytest.raises(ValueError):
+            self.index.fuzzy_search("isbn", "1111", 10)
+    
+    def test_fuzzy_search_after_changes(self):
+        """Test words added or removed after the first fuzzy search are picked up"""
+        assert self.index.fuzzy_search("author", "lutx", 10)[0].book == self.book2
+        self.index.remove(self.book2)
+        assert self.index.fuzzy_search("author", "lutx", 10) == []
+        book = Book("Kuyucaklı Yusuf", "Sabahattin Ali", "4444444444")
+        self.index.add(book)
+        assert [match.book for match in self.index.fuzzy_search("title", "kuyucakli", 10)] == [book]
+    
+    def test_ranked_search_prefers_rare_words_and_short_fields(self):
+        """Test BM25 ranking puts shorter and repeated matches first, ties in insertion order"""
+        short = Book("Python", "Someone", "4444444444")
+        repeated = Book("Python Python Python Guide", "Someone", "5555555555")
+        self.index.add(short)
+        self.index.add(repeated)
+        
+        matches = self.index.rank("title", "python")
+        assert [match.book for match in matches] == [repeated, short, self.book1, self.book2]
+        assert matches[2].score == matches[3].score
+        assert [match.book for match in self.index.rank("title", "python", limit=2, offset=1)] == [short, self.book1]
+        assert [match.book for match in self.index.rank("title", "guide python")] == [repeated, self.book1]
+        assert self.index.rank("title", "python cookbook") == []
+        assert self.index.rank("title", "!!") == []
+        with pytest.raises(ValueError):
+            self.index.rank("isbn", "1111")
+    
+    def test_ranked_search_matches_brute_force_bm25(self):
+        """Test top-k ranking returns exactly the best scores computed book by book"""
+        rng = random.Random(7)
+        words = ["gece", "gezi", "deniz", "deli", "yol", "yolculuk", "kitap", "kış"]
+        books = [Book(" ".join(rng.choice(words) for _ in range(rng.randint(1, 6))), "A", str(i)) for i in range(400)]
+        index = SearchIndex(books)
+        for book in books[::7]:
+            index.remove(book)
+        live = [book for position, book in enumerate(books) if position % 7]
+        
+        def expected(query):
+            fields = [tokenize(book.title) for book in live]
+            average = sum(map(len, fields)) / len(fields)
+            idfs = {}
+            for token in dict.fromkeys(tokenize(query)):
+                documents = sum(any(word.startswith(token) for word in field) for field in fields)
+                idfs[token] = log(1 + (len(fields) - documents + 0.5) / (documents + 0.5))
+            scored = []
+            for position, field in enumerate(fields):
+                score = 0.0
+                for token, idf in idfs.items():
+                    tf = field.count(token) or (PREFIX_TF if any(word.startswith(token) for word in field) else 0)
+                    if not tf:
+                        break
+                    score += bm25(idf, tf, len(field), average)
+                else:
+                    scored.append((-score, position))
+            return [live[position] for _, position in sorted(scored)]
+        
+        for query in ["gece", "ge", "deniz yol", "yol", "de ge", "kis yolculuk", "kitap kitap"]:
+            assert [match.book for match in index.rank("title", query)] == expected(query)
+            assert [match.book for match in index.rank("title", query, 5)] == expected(query)[:5]
+            assert [match.book for match in index.rank("title", query, 3, 4)] == expected(query)[4:7]
+    
+    def test_search_limit_and_offset(self):
+        """Test index and substring searches page in insertion order"""
+        books = [Book(f"Python {i}", "A", str(i)) for i in range(10)]
+        index = SearchIndex(books)
+        assert index.search("title", "python", 3, 2) == books[2:5]
+        assert index.scan("title", "ytho", 3, 8) == books[8:]
+        assert index.search("title", "python", 0) == []
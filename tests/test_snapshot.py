@@ -0,0 +1,168 @@
+import json
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+import pytest
+from book import Book
+from isbn import with_check_digit
+from library import Library
+from snapshot import SnapshotCatalog, convert_json, write_snapshot
+
+
+def isbn(i):
+    return with_check_digit(f"978{i:09d}")
+
+
+def make_books(n):
+    return [Book(f"Title {i} Şehir", f"Author {i % 7}", isbn(i)) for i in range(n)]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """A snapshot file holding 1000 books, written in reverse ISBN order"""
+    path = str(tmp_path / "library.snapshot")
+    write_snapshot(path, reversed(make_books(1000)))
+    return path
+
+
+class TestSnapshot:
+    """Test cases for the memory-mapped binary snapshot catalogue"""
+
+    def test_opening_decodes_nothing(self, snapshot_path):
+        """Test a snapshot library is ready without decoding a book, and reads decode only what they touch"""
+        with patch.object(SnapshotCatalog, "_book", autospec=True, side_effect=SnapshotCatalog._book) as decode:
+            library = Library(file_path=snapshot_path, storage="snapshot")
+            assert len(library.books) == 1000
+            assert decode.call_count == 0
+
+            assert library.get_book(isbn(123)).title == "Title 123 Şehir"
+            assert library.get_book("9789999999991") is None
+            assert decode.call_count == 1
+            books, cursor = library.get_books_page(limit=10)
+            assert decode.call_count == 11
+        assert [book.isbn for book in books] == [isbn(i) for i in range(999, 989, -1)]
+        assert cursor == 10
+
+    def test_lookup_by_binary_search(self, snapshot_path):
+        """Test every ISBN spelling finds its book and unknown keys do not"""
+        catalog = SnapshotCatalog(snapshot_path)
+        for i in (0, 1, 500, 999):
+            assert catalog.get(isbn(i)).to_dict() == {"title": f"Title {i} Şehir", "author": f"Author {i % 7}",
+                                                       "isbn": isbn(i)}
+        assert catalog.has_isbn("978-0-00-000005-7") is catalog.has_isbn(isbn(5)) is True
+        assert not catalog.has_isbn("0")
+        assert catalog[0].isbn == isbn(999) and catalog[-1].isbn == isbn(0)
+        catalog.close()
+
+    def test_changes_are_kept_over_the_file_until_saved(self, snapshot_path):
+        """Test additions and removals are served in order and written back by persist"""
+        with redirect_stdout(StringIO()):
+            library = Library(file_path=snapshot_path, storage="snapshot")
+            library.remove_book(isbn(999))
+        library.books.append(Book("Number Theory", "Someone", "0-306-40615-2"))
+        with pytest.raises(ValueError):
+            library.books.append(Book("Again", "Someone", "9780306406157"))
+        with pytest.raises(ValueError):
+            library.books.append(Book("Again", "Someone", isbn(3)))
+
+        assert len(library.books) == 1000
+        assert library.get_book(isbn(999)) is None
+        books, cursor = library.get_books_page(limit=2)
+        assert [book.isbn for book in books] == [isbn(998), isbn(997)]
+        books, cursor = library.get_books_page(cursor=999, limit=5)
+        assert [book.isbn for book in books] == [isbn(0), "0-306-40615-2"]
+        assert cursor is None
+
+        library.persist()
+        reopened = Library(file_path=snapshot_path, storage="snapshot")
+        assert [book.to_dict() for book in reopened.books] == [book.to_dict() for book in library.books]
+        assert reopened.books.get("9780306406157").title == "Number Theory"
+
+    def test_saving_serves_the_new_file(self, snapshot_path):
+        """Test persist maps the file it wrote, leaving no changes in memory and the search index intact"""
+        with redirect_stdout(StringIO()):
+            library = Library(file_path=snapshot_path, storage="snapshot")
+            library.remove_book(isbn(999))
+        library.books.append(Book("Silent Şehir", "Oğuz Atay", "9789754701159"))
+        library.books.search("title", "silent")
+        index = library.books.search_index
+
+        library.persist()
+        assert library.books._added == {} and library.books._removed == set()
+        assert len(library.books) == 1000
+        assert library.books.search_index is index
+        assert library.books.get("9789754701159").author == "Oğuz Atay"
+        assert library.get_book(isbn(999)) is None
+        library.books.pop_isbn("9789754701159")
+        assert library.books.search("title", "silent") == []
+        assert [book.isbn for book in Library(file_path=snapshot_path, storage="snapshot").books][-2:] == [
+            isbn(0), "9789754701159"]
+
+    def test_cursors_survive_saves(self, tmp_path):
+        """Test a cursor issued before a removal and a save still continues where it left off"""
+        path = str(tmp_path / "library.snapshot")
+        write_snapshot(path, make_books(10))
+        library = Library(file_path=path, storage="snapshot")
+        books, cursor = library.get_books_page(limit=5)
+        assert [book.isbn for book in books] == [isbn(i) for i in range(5)]
+
+        with redirect_stdout(StringIO()):
+            library.remove_book(isbn(1))
+        library.books.append(Book("Number Theory", "Someone", "9780306406157"))
+        library.persist()
+        books, cursor = library.get_books_page(cursor=cursor, limit=10)
+        assert [book.isbn for book in books] == [isbn(i) for i in range(5, 10)] + ["9780306406157"]
+
+        reopened = Library(file_path=path, storage="snapshot")
+        reopened.books.append(Book("Emma", "Jane Austen", "9780141439587"))
+        books, cursor = reopened.get_books_page(cursor=10, limit=10)
+        assert [book.isbn for book in books] == ["9780306406157", "9780141439587"]
+
+    def test_search_index_is_built_on_first_search(self, snapshot_path):
+        """Test searches see the file's books and later changes alike"""
+        catalog = SnapshotCatalog(snapshot_path)
+        assert catalog.search_index is None
+        assert [book.isbn for book in catalog.search("title", "title 12")][:2] == [isbn(129), isbn(128)]
+        assert catalog.search_index is not None
+
+        catalog.pop_isbn(isbn(12))
+        catalog.append(Book("Silent Şehir", "Oğuz Atay", "9789754701159"))
+        assert isbn(12) not in [book.isbn for book in catalog.search("title", "title 12")]
+        assert catalog.rank("title", "silent sehir")[0].book.isbn == "9789754701159"
+        assert catalog.fuzzy_search("author", "ogus")[0].book.author == "Oğuz Atay"
+        catalog.close()
+
+    def test_replace_all_books(self, snapshot_path):
+        """Test assigning Library.books replaces the file's books once saved"""
+        library = Library(file_path=snapshot_path, storage="snapshot")
+        library.books = make_books(3)
+        library.persist()
+        assert [book.isbn for book in Library(file_path=snapshot_path, storage="snapshot").books] == [
+            isbn(0), isbn(1), isbn(2)]
+
+    def test_convert_json(self, tmp_path):
+        """Test a library.json file converts to a snapshot with repeated ISBNs dropped"""
+        json_path, snapshot_path = tmp_path / "library.json", str(tmp_path / "library.snapshot")
+        records = [book.to_dict() for book in make_books(5)] + [{"title": "Again", "author": "X", "isbn": isbn(0)}]
+        json_path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+
+        assert convert_json(str(json_path), snapshot_path) == 5
+        library = Library(file_path=snapshot_path, storage="snapshot")
+        assert [book.to_dict() for book in library.books] == records[:5]
+
+    def test_missing_file_is_an_empty_library(self, tmp_path):
+        """Test a snapshot library starts empty and creates its file on the first save"""
+        path = str(tmp_path / "new.snapshot")
+        library = Library(file_path=path, storage="snapshot")
+        assert len(library.books) == 0
+        library.books.append(Book("Number Theory", "Someone", "9780306406157"))
+        library.persist()
+        assert len(Library(file_path=path, storage="snapshot").books) == 1
+
+    def test_not_a_snapshot(self, tmp_path):
+        """Test other files are refused instead of being misread"""
+        path = tmp_path / "library.json"
+        path.write_text("[]" + " " * 64)
+        with pytest.raises(ValueError):
+            SnapshotCatalog(str(path))
+
@@ -0,0 +1,142 @@
+import json
+import pytest
+from unittest.mock import patch
+from book import Book
+from library import Library
+from sqlite_catalog import SqliteCatalog, migrate_json
+
+
+@pytest.fixture
+def catalog(tmp_path, sample_books):
+    """A SQLite catalog holding the sample books"""
+    catalog = SqliteCatalog(str(tmp_path / "library.db"))
+    catalog.extend(sample_books)
+    yield catalog
+    catalog.close()
+
+
+class TestSqliteCatalog:
+    """Test cases for the SQLite storage backend"""
+    
+    def test_sequence_behaviour(self, catalog, sample_books):
+        """Test iteration, indexing and length follow insertion order"""
+        assert [book.isbn for book in catalog] == [book.isbn for book in sample_books]
+        assert catalog[0].title == "The Python Guide"
+        assert catalog[-1].title == "Machine Learning Basics"
+        assert len(catalog) == 3
+        assert sample_books[1] in catalog
+    
+    def test_isbn_operations(self, catalog):
+        """Test lookups, duplicate rejection and removal by ISBN"""
+        assert catalog.get("9780987654321").author == "Jane Doe"
+        assert catalog.has_isbn("9781111111111")
+        
+        with pytest.raises(ValueError, match="ISBN must be unique"):
+            catalog.append(Book("Other", "Other", "9780987654321"))
+        
+        assert catalog.pop_isbn("9780987654321").title == "Data Science Handbook"
+        assert catalog.pop_isbn("9780987654321") is None
+        assert len(catalog) == 2
+    
+    def test_pages_by_rowid(self, catalog, sample_books):
+        """Test paging follows insertion order and skips removed books"""
+        page, cursor = catalog.page(limit=1)
+        assert [book.isbn for book in page] == [sample_books[0].isbn]
+        
+        catalog.pop_isbn(sample_books[1].isbn)
+        page, cursor = catalog.page(cursor, limit=1)
+        assert [book.isbn for book in page] == [sample_books[2].isbn]
+        assert cursor is None
+    
+    def test_extend_is_atomic(self, catalog):
+        """Test a batch containing a duplicate inserts nothing"""
+        with pytest.raises(ValueError):
+            catalog.extend([Book("New", "New", "1"), Book("Dup", "Dup", "9781234567890")])
+        assert not catalog.has_isbn("1")
+    
+    def test_search_modes(self, catalog):
+        """Test FTS and substring searches return the same results as the memory catalog"""
+        assert [b.isbn for b in catalog.search("title", "pyth")] == ["9781234567890"]
+        assert catalog.search("title", "ython") == []
+        assert [b.isbn for b in catalog.search("title", "ython", "substring")] == ["9781234567890"]
+        assert [b.isbn for b in catalog.search("author", "jane doe")] == ["9780987654321"]
+        assert catalog.search("author", "doe jane") == []
+    
+    def test_search_updates_after_mutations(self, catalog):
+        """Test the FTS index follows inserts and deletes"""
+        catalog.pop_isbn("9781234567890")
+        catalog.append(Book("İki Şehrin Hikayesi", "Charles Dickens", "12312314143"))
+        
+        assert catalog.search("title", "python") == []
+        assert [b.isbn for b in catalog.search("author", "dick")] == ["12312314143"]
+
+
+    def test_ranked_search(self, catalog):
+        """Test FTS5 bm25 ranking pages through matches best first, with or without FTS"""
+        catalog.append(Book("Python", "Guido", "9780000000019"))
+        catalog.append(Book("Python Python Python Cookbook", "David Beazley", "9780000000026"))
+        
+        for fts in (True, False):
+            catalog.fts = fts
+            matches = catalog.rank("title", "python")
+            assert [match.book.title for match in matches] == [
+                "Python Python Python Cookbook", "Python", "The Python Guide"]
+            assert all(match.score > 0 for match in matches)
+            assert [match.book.title for match in catalog.rank("title", "python", 1, 1)] == ["Python"]
+            assert catalog.rank("author", "python") == []
+        
+        assert [b.isbn for b in catalog.search("title", "python", limit=1, offset=1)] == ["9780000000019"]
+        assert [b.isbn for b in catalog.search("title", "ython", "substring", limit=5, offset=2)] == ["9780000000026"]
+
+
+class TestSqliteLibrary:
+    
+    def test_fuzzy_search(self, catalog, tmp_path):
+        """Test typo-tolerant search works from the FTS vocabulary and sees new rows"""
+        assert [match.book.title for match in catalog.fuzzy_search("title", "pyhton gide")] == ["The Python Guide"]
+        catalog.append(Book("Pythn Cookbook", "David Beazley", "9780000000019"))
+        assert [match.book.title for match in catalog.fuzzy_search("title", "pythn")] == [
+            "Pythn Cookbook", "The Python Guide"]
+        
+        other = SqliteCatalog(catalog.db_path)
+        other.append(Book("Dune", "Frank Herbert", "9780000000026"))
+        other.close()
+        assert catalog.fuzzy_search("author", "herbrt")[0].book.title == "Dune"
+        
+        catalog.fts = False
+        assert [match.book.title for match in catalog.fuzzy_search("title", "pythn")] == [
+            "Pythn Cookbook", "The Python Guide"]
+    
+    def test_library_persists_without_saving(self, tmp_path, sample_books):
+        """Test a sqlite-backed Library keeps its books across instances"""
+        db_path = str(tmp_path / "library.db")
+        with patch('library.OpenLibraryClient'):
+            library = Library(sample_books, db_path, storage="sqlite")
+            with patch('builtins.print'):
+                library.remove_book("9781234567890")
+            library.persist()
+            
+            reopened = Library([], db_path, storage="sqlite")
+        
+        assert [b.isbn for b in reopened.books] == ["9780987654321", "9781111111111"]
+        assert reopened.find_book("machine", "title")[0].isbn == "9781111111111"
+        assert reopened.find_book("9780987654321", "isbn")[0].title == "Data Science Handbook"
+        assert reopened.find_book("x", "invalid") == []
+    
+    def test_unknown_storage_mode(self):
+        """Test an unsupported storage mode is rejected"""
+        with pytest.raises(ValueError, match="Unknown storage mode"):
+            Library([], storage="csv")
+    
+    def test_migrate_json(self, tmp_path, sample_json_data):
+        """Test the migrator copies library.json into a database once"""
+        json_path = tmp_path / "library.json"
+        json_path.write_text(json.dumps(sample_json_data + sample_json_data[:1]))
+        db_path = str(tmp_path / "library.db")
+        
+        assert migrate_json(str(json_path), db_path) == 2
+        assert migrate_json(str(json_path), db_path) == 0
+        
+        catalog = SqliteCatalog(db_path)
+        assert [book.isbn for book in catalog] == ["1111111111", "2222222222"]
+        catalog.close()
@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+from library import Library
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(program, tmp_path, **env):
+    """Run ``program`` in a fresh interpreter inside ``tmp_path`` and return its last output line as JSON"""
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys; sys.path.insert(0, {ROOT!r})\n{program}"],
+        cwd=tmp_path, env={**os.environ, "LIBRARIAN_JOBS_DB": str(tmp_path / "jobs.db"), **env},
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+class TestStartup:
+    """Test cases keeping imports and startup free of eager work"""
+
+    def test_importing_the_api_loads_nothing(self, tmp_path):
+        """Test importing api neither reads the catalogue nor opens clients, and the first request does"""
+        library_path = tmp_path / "library.json"
+        library_path.write_text('[{"title": "Dune", "author": "Frank Herbert", "isbn": "9780441013593"}]')
+        result = run("""
+import json, sys
+import api
+state = [api.library, api.job_queue, api.enrichment, api.open_library_options, "httpx" in sys.modules]
+from fastapi.testclient import TestClient
+books = TestClient(api.app).get("/books").json()
+print(json.dumps({"state": state, "books": books, "loaded": api.library is not None}))
+""", tmp_path, LIBRARIAN_LIBRARY_PATH=str(library_path))
+
+        assert result["state"] == [None, None, None, None, False]
+        assert result["books"] == [{"title": "Dune", "author": "Frank Herbert", "isbn": "9780441013593"}]
+        assert result["loaded"] is True
+        assert not (tmp_path / "jobs.db").exists()
+
+    def test_importing_the_cli_skips_heavy_modules(self, tmp_path):
+        """Test importing main leaves httpx and the dump parser's multiprocessing unimported"""
+        result = run("""
+import json, sys
+import main
+print(json.dumps([name for name in ("httpx", "concurrent.futures.process", "dump_import") if name in sys.modules]))
+""", tmp_path)
+        assert result == []
+
+    def test_open_library_client_is_created_on_first_use(self, tmp_path):
+        """Test a Library only creates its Open Library client when it is first needed"""
+        with redirect_stdout(StringIO()), patch("library.OpenLibraryClient") as client_class:
+            library = Library(file_path=str(tmp_path / "library.json"), offline=True)
+            library.get_book("9780441013593")
+            client_class.assert_not_called()
+
+            assert library.open_library_client is library.open_library_client
+        client_class.assert_called_once()
+        assert client_class.call_args.kwargs["offline"] is True